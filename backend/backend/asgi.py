@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_asgi_application()
+
+# Build what the first requests would otherwise build lazily
+from feedback_app.warmup import warm_up_on_startup  # noqa: E402
+
+warm_up_on_startup()
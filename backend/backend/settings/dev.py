@@ -1 +1,14 @@
+import os
+
 from .base import *
+from .base import CACHES, JOB_QUEUE
+
+# Run background jobs inline during development unless a worker is started
+JOB_QUEUE = {**JOB_QUEUE, "EAGER": os.getenv("JOB_QUEUE_EAGER", "True") == "True"}
+
+# A single development process has nothing to share these caches with
+CACHES = {
+    **CACHES,
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "idempotency": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
+
+# Build what the first requests would otherwise build lazily
+from feedback_app.warmup import warm_up_on_startup  # noqa: E402
+
+warm_up_on_startup()
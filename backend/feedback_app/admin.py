@@ -1,6 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Board, Tag, Feedback, Comment
+from .models import (
+    User,
+    Board,
+    Tag,
+    Feedback,
+    Comment,
+    FeedbackTransition,
+    WebhookEndpoint,
+    WebhookDelivery,
+)
 
 
 # Simple admin registration for User
@@ -25,7 +34,7 @@ class FeedbackAdmin(admin.ModelAdmin):
 
 
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ("feedback", "author", "created_at")
+    list_display = ("feedback", "author", "depth", "reply_count", "created_at")
     list_filter = ("created_at",)
 
 
@@ -33,9 +42,37 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ("name",)
 
 
+class FeedbackTransitionAdmin(admin.ModelAdmin):
+    list_display = ("feedback", "field", "from_value", "to_value", "changed_at")
+    list_filter = ("field",)
+    list_select_related = ("feedback",)
+
+    # The history is append-only
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "url", "is_active", "created_at")
+    list_filter = ("is_active",)
+
+
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("event", "endpoint", "status", "attempts", "next_attempt_at")
+    list_filter = ("status", "endpoint")
+    list_select_related = ("event", "endpoint")
+    readonly_fields = ("event", "delivered_at", "last_error")
+
+
 # Register models
 admin.site.register(User, UserAdmin)
 admin.site.register(Board, BoardAdmin)
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Feedback, FeedbackAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(FeedbackTransition, FeedbackTransitionAdmin)
+admin.site.register(WebhookEndpoint, WebhookEndpointAdmin)
+admin.site.register(WebhookDelivery, WebhookDeliveryAdmin)
@@ -0,0 +1,346 @@
+"""
+Feedback Management System Workflow Analytics
+
+This module computes how fast feedback moves through the workflow: time to
+first response, time from open to in progress to completed, and weekly
+throughput per board and tag. Both read ``FeedbackCycle``, the one row per
+feedback item that ``history.py`` and ``signals.py`` keep current as the
+item is commented on and moves through the workflow, so a period costs one
+range scan of a covering index rather than grouping the raw history.
+
+Durations are stored as seconds since creation, so no timestamps are parsed
+in Python. The rows become compact ``array('d')`` columns; durations,
+percentiles and histograms are taken over them with C-level builtins
+(``map``, ``compress``, ``sorted``, ``bisect``) rather than per-row Python
+code. Throughput and the tag distribution are counted entirely in the
+database. Results are cached per board, visibility scope and period
+for ``ANALYTICS["CACHE_TTL"]`` seconds.
+
+The dashboard widgets are independent queries over one visibility scope;
+``gather`` runs them on pooled threads, each with its own database
+connection, where the database serves connections concurrently. The pool is
+shared by the process and sized for ``SERVER_THREADS`` requests each running
+``CONCURRENT_QUERIES`` queries, so concurrent requests do not queue behind
+each other. Calls made from a pool thread, such as the dashboard inside a
+parallel batch (``batch.py``), run in turn on that thread instead of waiting
+for more pool threads.
+"""
+
+import math
+import operator
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from itertools import compress, repeat
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .metrics import metrics
+from .models import Feedback, FeedbackCycle, Tag
+
+DEFAULT_ANALYTICS = {
+    "CACHE_TTL": 300,
+    "DEFAULT_DAYS": 30,
+    "MAX_DAYS": 365,
+    # Upper bounds of the duration histogram buckets, in hours
+    "HISTOGRAM_HOURS": [1, 4, 24, 72, 168, 336, 720],
+    "DASHBOARD_CACHE_TTL": 30,
+    # Threads running dashboard queries side by side; 0 runs them in turn
+    "CONCURRENT_QUERIES": 3,
+    # Requests a worker process serves at once (e.g. gunicorn --threads)
+    "SERVER_THREADS": 8,
+}
+
+PERCENTILES = (50, 75, 90, 95)
+
+
+def get_analytics_setting(name):
+    """Read an ANALYTICS option, falling back to the defaults."""
+    return getattr(settings, "ANALYTICS", {}).get(name, DEFAULT_ANALYTICS[name])
+
+
+def columns(rows, width):
+    """Transpose query rows into ``width`` float arrays."""
+    rows = list(rows)
+    if not rows:
+        return [array("d") for _ in range(width)]
+    return [array("d", column) for column in zip(*rows)]
+
+
+def percentile(values, p):
+    """Linearly interpolated percentile ``p`` of sorted ``values``."""
+    position = (len(values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(durations):
+    """Percentiles, mean and histogram of a duration array, in hours."""
+    values = sorted(durations)
+    count = len(values)
+    summary = {"count": count, "mean_hours": None}
+    summary.update({f"p{p}_hours": None for p in PERCENTILES})
+    edges = get_analytics_setting("HISTOGRAM_HOURS")
+    if count:
+        summary["mean_hours"] = round(math.fsum(values) / count / 3600, 2)
+        for p in PERCENTILES:
+            summary[f"p{p}_hours"] = round(percentile(values, p) / 3600, 2)
+    # Cumulative counts per bucket edge, then differences between edges
+    cumulative = [bisect_right(values, edge * 3600) for edge in edges] + [count]
+    summary["histogram"] = [
+        {"le_hours": edge, "count": upper - lower}
+        for edge, lower, upper in zip(edges + [None], [0] + cumulative[:-1], cumulative)
+    ]
+    return summary
+
+
+def period_bounds(days):
+    end = timezone.now()
+    return end - timedelta(days=days), end
+
+
+def cycles(board_ids, field, start, end):
+    """Cycles whose ``field`` time is in the period, on ``board_ids``."""
+    rows = FeedbackCycle.objects.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+    if board_ids is not None:
+        rows = rows.filter(board_id__in=board_ids)
+    return rows
+
+
+def completions(board_ids, start, end):
+    """Feedback last completed in the period, on ``board_ids`` (None for all)."""
+    return cycles(board_ids, "completed_at", start, end)
+
+
+def cycle_times(board_ids, days):
+    """
+    Workflow durations of the feedback on ``board_ids`` (None for all).
+
+    Time to first response covers feedback created in the period; the status
+    durations cover feedback completed in the period, from its first start to
+    its latest completion.
+    """
+    start, end = period_bounds(days)
+
+    created = cycles(board_ids, "created_at", start, end)
+    first_response = array(
+        "d",
+        created.filter(first_response_seconds__isnull=False).values_list(
+            "first_response_seconds", flat=True
+        ),
+    )
+    # -1 marks items that skipped in progress
+    rows = completions(board_ids, start, end).values_list(
+        Coalesce("started_seconds", -1.0), "completed_seconds"
+    )
+    started, completed = columns(rows, 2)
+    was_started = list(map(operator.ge, started, repeat(0.0)))
+    return {
+        "period": {"start": start, "end": end, "days": days},
+        "created": created.count(),
+        "first_response": summarize(first_response),
+        "open_to_in_progress": summarize(compress(started, was_started)),
+        "in_progress_to_completed": summarize(
+            compress(map(operator.sub, completed, started), was_started)
+        ),
+        "open_to_completed": summarize(completed),
+    }
+
+
+def week_starts(start, end):
+    """Start of each week (Monday, local time) overlapping ``[start, end)``."""
+    monday = timezone.localtime(start).date()
+    monday -= timedelta(days=monday.weekday())
+    weeks = []
+    while True:
+        week = timezone.make_aware(datetime.combine(monday, datetime.min.time()))
+        if week >= end:
+            return weeks
+        weeks.append(week)
+        monday += timedelta(days=7)
+
+
+def weekly_counts(querysets, group):
+    """
+    Count the rows of each week's queryset per ``group``, in one query.
+
+    Returns ``(week index, group, count)`` rows. Each week is a range scan of
+    its own; unlike bucketing the whole period with an expression, tags are
+    then counted by probing the tag assignments of the week's feedback
+    directly, without reading the feedback rows.
+    """
+    parts = [
+        queryset.values(group)
+        .annotate(week=Value(index), completed=Count("*"))
+        .order_by()
+        .values_list("week", group, "completed")
+        for index, queryset in enumerate(querysets)
+    ]
+    return parts[0].union(*parts[1:], all=True)
+
+
+def throughput(board_ids, days):
+    """
+    Completions per week, overall, per board and per tag.
+
+    Feedback completed more than once counts once, in the week of its latest
+    completion, under its current tags.
+    """
+    start, end = period_bounds(days)
+    weeks = week_starts(start, end)
+    bounds = [start, *weeks[1:], end]
+    completed = [
+        completions(board_ids, low, high) for low, high in zip(bounds, bounds[1:])
+    ]
+    by_board = [
+        {"week": weeks[week].date(), "board": board_id, "completed": count}
+        for week, board_id, count in sorted(weekly_counts(completed, "board_id"))
+    ]
+    tag_counts = list(
+        weekly_counts(
+            [
+                Feedback.tags.through.objects.filter(
+                    feedback_id__in=queryset.values("feedback_id")
+                )
+                for queryset in completed
+            ],
+            "tag_id",
+        )
+    )
+    names = dict(
+        Tag.objects.filter(pk__in={row[1] for row in tag_counts}).values_list(
+            "pk", "name"
+        )
+    )
+    totals = Counter()
+    for row in by_board:
+        totals[row["week"]] += row["completed"]
+    return {
+        "period": {"start": start, "end": end, "days": days},
+        "weeks": [
+            {"week": week.date(), "completed": totals[week.date()]} for week in weeks
+        ],
+        "by_board": by_board,
+        "by_tag": sorted(
+            (
+                {"week": weeks[week].date(), "tag": names[tag_id], "completed": count}
+                for week, tag_id, count in tag_counts
+                # Deleted since the count
+                if tag_id in names
+            ),
+            key=operator.itemgetter("week", "tag"),
+        ),
+    }
+
+
+def tag_distribution(board_ids):
+    """
+    Feedback per tag and per tag and status, on ``board_ids`` (None for all).
+
+    One grouped query over the ``Feedback.tags`` through table.
+    """
+    assignments = Feedback.tags.through.objects.all()
+    if board_ids is not None:
+        assignments = assignments.filter(feedback__board_id__in=board_ids)
+    tags = {}
+    for tag_id, name, feedback_status, count in (
+        assignments.values("tag_id", "tag__name", "feedback__status")
+        .annotate(count=Count("pk"))
+        .values_list("tag_id", "tag__name", "feedback__status", "count")
+    ):
+        entry = tags.get(tag_id)
+        if entry is None:
+            entry = tags[tag_id] = {
+                "tag": tag_id,
+                "name": name,
+                "total": 0,
+                "by_status": dict.fromkeys(Feedback.Status.values, 0),
+            }
+        entry["total"] += count
+        entry["by_status"][feedback_status] = count
+    return sorted(tags.values(), key=lambda entry: (-entry["total"], entry["name"]))
+
+
+def tag_names(tag_ids):
+    """Map tag ids to names."""
+    return dict(Tag.objects.filter(pk__in=tag_ids).values_list("pk", "name"))
+
+
+def cached_report(report, scope, days, compute, timeout=None):
+    """Return a cached report for ``scope`` and ``days``, computing it if needed."""
+    key = f"analytics:{report}:{scope}:{days}"
+    result = cache.get(key)
+    metrics.record_cache_lookup("analytics", hit=result is not None)
+    if result is None:
+        result = compute()
+        if timeout is None:
+            timeout = get_analytics_setting("CACHE_TTL")
+        cache.set(key, result, timeout)
+    return result
+
+
+POOL_THREAD_PREFIX = "analytics"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _run_in_thread(compute):
+    try:
+        return compute()
+    finally:
+        # Pool threads own their connections; honour CONN_MAX_AGE
+        close_old_connections()
+
+
+def gather(**computations):
+    """
+    Call each function and return a dict of the results by name.
+
+    The calls run concurrently when ``CONCURRENT_QUERIES`` allows it and the
+    database can serve several connections: not on SQLite, and not inside a
+    transaction, whose uncommitted rows other connections would not see. On
+    a pool thread they run in turn: waiting there for other pool threads
+    could leave every thread of the pool waiting.
+    """
+    workers = get_analytics_setting("CONCURRENT_QUERIES")
+    if (
+        not workers
+        or connection.vendor == "sqlite"
+        or connection.in_atomic_block
+        or threading.current_thread().name.startswith(POOL_THREAD_PREFIX)
+    ):
+        return {name: compute() for name, compute in computations.items()}
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Threads are only started as calls need them
+            _pool = ThreadPoolExecutor(
+                workers * get_analytics_setting("SERVER_THREADS"),
+                thread_name_prefix=POOL_THREAD_PREFIX,
+            )
+    # At most ``workers`` calls of this request run at once
+    pending = iter(computations.items())
+    running = {}
+    results = {}
+    while True:
+        while len(running) < workers:
+            name, compute = next(pending, (None, None))
+            if compute is None:
+                break
+            running[_pool.submit(_run_in_thread, compute)] = name
+        if not running:
+            break
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[running.pop(future)] = future.result()
+    return {name: results[name] for name in computations}
@@ -0,0 +1,56 @@
+"""
+Feedback Management System Authentication
+
+This module contains custom authentication classes used alongside the
+default JWT authentication.
+"""
+
+import hmac
+
+from django.contrib.auth.models import AnonymousUser
+from rest_framework import authentication
+
+from .metrics import get_metrics_setting
+
+
+class MetricsTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate Prometheus scrapers with the static METRICS["TOKEN"].
+
+    Scrapers send ``Authorization: Bearer <token>``. Any other bearer value is
+    left for the JWT authentication class that follows.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        token = get_metrics_setting("TOKEN")
+        if not token:
+            return None
+        header = authentication.get_authorization_header(request).split()
+        if len(header) != 2 or header[0].decode() != self.keyword:
+            return None
+        if not hmac.compare_digest(header[1], token.encode()):
+            return None
+        return AnonymousUser(), "metrics"
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
+
+
+class BatchAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate the sub-requests of a batch as the batch itself.
+
+    ``batch.build_request`` attaches the identity the batch was authenticated
+    with to the ``HttpRequest`` objects it builds, so the token is verified
+    once per batch. Requests from clients never carry it and fall through to
+    the next authentication class.
+    """
+
+    def authenticate(self, request):
+        return getattr(request._request, "batch_auth", None)
+
+    def authenticate_header(self, request):
+        # Listed first; unauthenticated clients are asked for a JWT
+        return 'Bearer realm="api"'
@@ -0,0 +1,145 @@
+"""
+Feedback Management System Tag Autocomplete
+
+This module contains the in-process prefix index behind
+``TagViewSet.autocomplete``. Normalized tag names are kept in a sorted list,
+so a prefix lookup is two bisections plus a top-N selection over the matching
+range, ranked by how many feedback items use each tag.
+
+The index is loaded with one grouped query and then kept current by the
+signal receivers in ``signals.py``: new and deleted tags and tag assignments
+are applied once their transaction commits. Writes made by other worker
+processes are picked up by a full reload every ``TAG_AUTOCOMPLETE["TTL"]``
+seconds (see ``snapshots.py``).
+"""
+
+import heapq
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import Tag
+from .snapshots import TTLSnapshot
+
+DEFAULT_TAG_AUTOCOMPLETE = {
+    "TTL": 300,
+    "LIMIT": 10,
+    "MAX_LIMIT": 50,
+}
+
+# Sorts after every character a tag name can contain.
+PREFIX_END = "\U0010ffff"
+
+
+def get_tag_autocomplete_setting(name):
+    """Read a TAG_AUTOCOMPLETE option, falling back to the defaults."""
+    return getattr(settings, "TAG_AUTOCOMPLETE", {}).get(
+        name, DEFAULT_TAG_AUTOCOMPLETE[name]
+    )
+
+
+def normalize(name):
+    """Normalize a tag name the way ``TagSerializer`` stores it."""
+    return name.strip().lower()
+
+
+class _Entry:
+    __slots__ = ("id", "name", "usage_count")
+
+    def __init__(self, pk, name, usage_count):
+        self.id = pk
+        self.name = name
+        self.usage_count = usage_count
+
+
+class TagIndex(TTLSnapshot):
+    """
+    Sorted prefix index over tag names.
+
+    Readers never lock: the sorted name list and the lookup tables are
+    replaced together as one tuple (copy-on-write) when tags are added or
+    removed. Usage counts change in place, which is safe for single integer
+    updates.
+    """
+
+    cache_name = "tag_autocomplete"
+
+    def ttl(self):
+        return get_tag_autocomplete_setting("TTL")
+
+    def build(self):
+        """Load every tag and its usage count with one grouped query."""
+        rows = Tag.objects.annotate(num_feedback=Count("feedbacks")).values_list(
+            "pk", "name", "num_feedback"
+        )
+        by_name = {}
+        by_id = {}
+        for pk, name, count in rows:
+            entry = _Entry(pk, name, count)
+            by_name[normalize(name)] = entry
+            by_id[pk] = entry
+        return (sorted(by_name), by_name, by_id)
+
+    def search(self, prefix, limit):
+        """Return up to ``limit`` tags starting with ``prefix``, most used first."""
+        names, by_name, _ = self._load()
+        prefix = normalize(prefix)
+        start = bisect_left(names, prefix)
+        end = bisect_left(names, prefix + PREFIX_END, start)
+        best = heapq.nsmallest(
+            limit,
+            (by_name[names[i]] for i in range(start, end)),
+            key=lambda entry: (-entry.usage_count, entry.name),
+        )
+        return [
+            {"id": entry.id, "name": entry.name, "usage_count": entry.usage_count}
+            for entry in best
+        ]
+
+    def add(self, tag):
+        """Insert a newly created tag."""
+        with self._lock:
+            if self._state is None:
+                return
+            names, by_name, by_id = self._state
+            key = normalize(tag.name)
+            if key in by_name:
+                return
+            entry = _Entry(tag.pk, tag.name, 0)
+            names = names[:]
+            insort(names, key)
+            self._state = (
+                names,
+                {**by_name, key: entry},
+                {**by_id, tag.pk: entry},
+            )
+
+    def remove(self, tag_id):
+        """Drop a deleted tag."""
+        with self._lock:
+            if self._state is None:
+                return
+            names, by_name, by_id = self._state
+            entry = by_id.get(tag_id)
+            if entry is None:
+                return
+            key = normalize(entry.name)
+            names = [name for name in names if name != key]
+            by_name = {name: e for name, e in by_name.items() if name != key}
+            by_id = {pk: e for pk, e in by_id.items() if pk != tag_id}
+            self._state = (names, by_name, by_id)
+
+    def adjust_usage(self, tag_ids, delta):
+        """Add ``delta`` to the usage count of each tag in ``tag_ids``."""
+        with self._lock:
+            if self._state is None:
+                return
+            by_id = self._state[2]
+            for tag_id in tag_ids:
+                entry = by_id.get(tag_id)
+                if entry is not None:
+                    entry.usage_count = max(entry.usage_count + delta, 0)
+
+
+tag_index = TagIndex()
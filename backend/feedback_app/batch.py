@@ -0,0 +1,202 @@
+"""
+Feedback Management System Batch Requests
+
+This module runs the sub-requests of ``BatchView`` (``POST /api/batch/``)
+in-process: each one is turned into an ``HttpRequest`` and dispatched to the
+view its path resolves to among the API routes, without another round trip
+or another JWT verification. Of the middleware stack only the request
+metrics and profiling middleware run again (``SUB_REQUEST_MIDDLEWARE``), so
+every sub-request is recorded under its own view; sessions, CSRF and the
+rest already ran for the batch.
+
+The batch is authenticated once; its sub-requests carry that identity for
+``BatchAuthentication``. Views that authenticate differently (for example
+the stateless tag autocomplete) still see the client's ``Authorization``
+header. Batches made only of reads may run on pooled threads, each
+sub-request on its own database connection (see ``analytics.gather``);
+sub-requests that gather queries themselves, like the dashboard, then run
+those queries in turn. An
+error in one sub-request is reported in its slot and does not fail the
+others. Each result carries the sub-response's headers, such as
+``Retry-After``, ``Location`` or ``Idempotent-Replayed``.
+"""
+
+import json
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+from django.utils.module_loading import import_string
+
+from .analytics import gather
+
+logger = logging.getLogger("feedback_app.batch")
+
+DEFAULT_BATCH = {
+    "MAX_REQUESTS": 20,
+}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+METHODS = SAFE_METHODS + ("POST", "PUT", "PATCH", "DELETE")
+
+# The middleware of MIDDLEWARE that also wraps each sub-request
+SUB_REQUEST_MIDDLEWARE = (
+    "feedback_app.middleware.QueryCountMiddleware",
+    "feedback_app.middleware.RequestProfilingMiddleware",
+)
+
+# Describe the body as sent by the view, not as rendered in the batch
+DROPPED_HEADERS = ("content-type", "content-length")
+
+# Copied from the batch request to every sub-request
+INHERITED_META = (
+    "REMOTE_ADDR",
+    "SERVER_NAME",
+    "SERVER_PORT",
+    "SERVER_PROTOCOL",
+    "wsgi.url_scheme",
+    "HTTP_HOST",
+    "HTTP_AUTHORIZATION",
+    "HTTP_X_FORWARDED_FOR",
+    "HTTP_USER_AGENT",
+    "HTTP_ACCEPT_LANGUAGE",
+)
+
+
+def get_batch_setting(name):
+    """Read a BATCH option, falling back to the defaults."""
+    return getattr(settings, "BATCH", {}).get(name, DEFAULT_BATCH[name])
+
+
+def build_request(request, method, path, body=None, headers=None):
+    """Make the ``HttpRequest`` for one sub-request of ``request``."""
+    url = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = url.path
+    sub.META = {
+        name: request.META[name] for name in INHERITED_META if name in request.META
+    }
+    for name, value in (headers or {}).items():
+        if name.lower() != "authorization":
+            sub.META[f"HTTP_{name.upper().replace('-', '_')}"] = value
+    sub.META["REQUEST_METHOD"] = method
+    sub.META["PATH_INFO"] = url.path
+    sub.META["QUERY_STRING"] = url.query
+    sub.GET = QueryDict(url.query)
+    sub.COOKIES = request.COOKIES
+    content = b"" if body is None else json.dumps(body).encode()
+    sub.META["CONTENT_TYPE"] = "application/json"
+    sub.META["CONTENT_LENGTH"] = str(len(content))
+    sub._stream = BytesIO(content)
+    sub._read_started = False
+    # Read by BatchAuthentication
+    sub.batch_auth = (request.user, request.auth)
+    return sub
+
+
+class SubRequestHandler:
+    """
+    Call the view of a resolved sub-request through ``SUB_REQUEST_MIDDLEWARE``.
+
+    The middleware is chained in ``MIDDLEWARE`` order, with its
+    ``process_view`` and ``process_template_response`` hooks, the way
+    Django's own handler does it.
+    """
+
+    def __init__(self):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        handler = self._call_view
+        for path in reversed(settings.MIDDLEWARE):
+            if path not in SUB_REQUEST_MIDDLEWARE:
+                continue
+            middleware = import_string(path)(handler)
+            if hasattr(middleware, "process_view"):
+                self._view_middleware.insert(0, middleware.process_view)
+            if hasattr(middleware, "process_template_response"):
+                self._template_response_middleware.append(
+                    middleware.process_template_response
+                )
+            handler = middleware
+        self._chain = handler
+
+    def __call__(self, request):
+        return self._chain(request)
+
+    def _call_view(self, request):
+        match = request.resolver_match
+        for process_view in self._view_middleware:
+            response = process_view(request, match.func, match.args, match.kwargs)
+            if response is not None:
+                return response
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            for process_template_response in self._template_response_middleware:
+                response = process_template_response(request, response)
+            response = response.render()
+        return response
+
+
+def dispatch(request, spec, handler=None):
+    """Run one sub-request and return its status, headers and body."""
+    handler = handler or SubRequestHandler()
+    method = spec["method"]
+    path = spec["path"]
+    api_root = reverse("api-root")
+    try:
+        if not path.startswith(api_root):
+            raise Resolver404
+        match = resolve(urlsplit(path).path)
+        if match.url_name == "batch":
+            raise Resolver404
+    except Resolver404:
+        return {
+            "status": 404,
+            "headers": {},
+            "body": {"error": f"Unknown API path {path!r}"},
+        }
+    sub = build_request(request, method, path, spec.get("body"), spec.get("headers"))
+    sub.resolver_match = match
+    try:
+        response = handler(sub)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", method, path)
+        return {
+            "status": 500,
+            "headers": {},
+            "body": {"error": "Internal server error"},
+        }
+    if hasattr(response, "data"):
+        # Rendered again with the batch response, in the client's format
+        body = response.data
+    else:
+        body = response.content.decode(response.charset)
+    headers = {
+        name: value
+        for name, value in response.items()
+        if name.lower() not in DROPPED_HEADERS
+    }
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def run_batch(request, specs, parallel=False):
+    """
+    Run validated sub-request ``specs`` and return their results in order.
+
+    Only batches of safe methods run in parallel; writes always run in turn
+    so their order is the order requested.
+    """
+    handler = SubRequestHandler()
+    calls = {
+        str(index): (lambda spec=spec: dispatch(request, spec, handler))
+        for index, spec in enumerate(specs)
+    }
+    if parallel and all(spec["method"] in SAFE_METHODS for spec in specs):
+        results = gather(**calls)
+    else:
+        results = {name: call() for name, call in calls.items()}
+    return [results[str(index)] for index in range(len(specs))]
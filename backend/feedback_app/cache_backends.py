@@ -0,0 +1,46 @@
+"""
+Feedback Management System Cache Backends
+
+This module contains cache backends for the caches that must be shared by
+every worker process on a host, such as the throttle buckets and the stored
+idempotent responses.
+"""
+
+import os
+import random
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class SampledCullFileBasedCache(FileBasedCache):
+    """
+    ``FileBasedCache`` that checks its size on a sample of writes.
+
+    The stock backend lists the whole cache directory on every ``set`` to
+    decide whether to cull, which costs more than the rest of the write and
+    grows with the number of entries. ``CULL_PROBABILITY`` (an ``OPTIONS``
+    entry) sets the share of writes that check.
+
+    ``add`` is atomic across threads and processes, so it can claim a key
+    the way the idempotency keys do.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get("OPTIONS", {})
+        self._cull_probability = float(options.get("CULL_PROBABILITY", 0.001))
+
+    def _cull(self):
+        if random.random() < self._cull_probability:
+            super()._cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # The stock add is has_key followed by set, which concurrent callers
+        # can interleave; hold the directory's lock around both
+        import fcntl
+
+        self._createdir()
+        with open(os.path.join(self._dir, ".add.lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            return super().add(key, value, timeout, version)
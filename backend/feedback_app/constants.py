@@ -0,0 +1,5 @@
+from .models import User, Feedback
+
+UserRoles = User.Role
+FeedbackStatus = Feedback.Status
+FeedbackPriority = Feedback.Priority
@@ -0,0 +1,154 @@
+"""
+Feedback Management System Tag Co-occurrence
+
+This module contains the in-process matrix behind
+``FeedbackViewSet.tag_co_occurrence``: for every board, how many feedback
+items carry each tag and each pair of tags. The matrix is sparse, a
+``Counter`` keyed by ``(tag_id, tag_id)`` pairs, so its size follows the
+pairs that actually occur rather than the square of the number of tags.
+
+The matrix is built in one pass over the ``Feedback.tags`` through table,
+ordered by feedback item; each item's pairs are counted in a single
+``Counter.update`` call, which runs in C. It is then kept current by the
+signal receivers in ``signals.py`` once writes commit, and rebuilt every
+``TAG_CO_OCCURRENCE["TTL"]`` seconds to pick up writes made by other worker
+processes; while one request rebuilds, others keep answering from the old
+matrix (see ``snapshots.py``).
+"""
+
+from collections import Counter
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.conf import settings
+
+from .models import Feedback
+from .snapshots import TTLSnapshot
+
+DEFAULT_TAG_CO_OCCURRENCE = {
+    "TTL": 600,
+    "LIMIT": 50,
+    "MAX_LIMIT": 500,
+}
+
+
+def get_tag_co_occurrence_setting(name):
+    """Read a TAG_CO_OCCURRENCE option, falling back to the defaults."""
+    return getattr(settings, "TAG_CO_OCCURRENCE", {}).get(
+        name, DEFAULT_TAG_CO_OCCURRENCE[name]
+    )
+
+
+class _Matrix:
+    """Tag and tag pair counts per board; mutated only under the lock."""
+
+    def __init__(self):
+        # feedback_id: (board_id, sorted tag ids)
+        self.items = {}
+        self.tags = {}
+        self.pairs = {}
+
+    def count(self, board_id, tags, sign):
+        tag_counts = self.tags.setdefault(board_id, Counter())
+        pair_counts = self.pairs.setdefault(board_id, Counter())
+        if sign > 0:
+            tag_counts.update(tags)
+            pair_counts.update(combinations(tags, 2))
+        else:
+            tag_counts.subtract(tags)
+            pair_counts.subtract(combinations(tags, 2))
+
+    def set_item(self, feedback_id, board_id, tags):
+        previous = self.items.pop(feedback_id, None)
+        if previous is not None:
+            self.count(*previous, -1)
+        if tags:
+            tags = tuple(sorted(tags))
+            self.items[feedback_id] = (board_id, tags)
+            self.count(board_id, tags, 1)
+
+
+def build_matrix():
+    """Count every tag and tag pair from the through table."""
+    matrix = _Matrix()
+    rows = (
+        Feedback.tags.through.objects.order_by("feedback_id", "tag_id")
+        .values_list("feedback_id", "feedback__board_id", "tag_id")
+        .iterator(chunk_size=10000)
+    )
+    for (feedback_id, board_id), group in groupby(rows, key=itemgetter(0, 1)):
+        tags = tuple(row[2] for row in group)
+        matrix.items[feedback_id] = (board_id, tags)
+        matrix.count(board_id, tags, 1)
+    return matrix
+
+
+class TagCoOccurrence(TTLSnapshot):
+    """The matrix plus its refresh policy."""
+
+    cache_name = "tag_co_occurrence"
+
+    def ttl(self):
+        return get_tag_co_occurrence_setting("TTL")
+
+    def build(self):
+        return build_matrix()
+
+    def set_tags(self, boards, tag_ids, present):
+        """
+        Add or remove tag assignments.
+
+        ``boards`` maps each affected feedback item to its board.
+        """
+        with self._lock:
+            matrix = self._state
+            if matrix is None:
+                return
+            for feedback_id, board_id in boards.items():
+                _, tags = matrix.items.get(feedback_id, (board_id, ()))
+                if present:
+                    tags = set(tags).union(tag_ids)
+                else:
+                    tags = set(tags).difference(tag_ids)
+                matrix.set_item(feedback_id, board_id, tags)
+
+    def move(self, feedback_id, board_id):
+        """Count an item's tags on the board it moved to."""
+        with self._lock:
+            matrix = self._state
+            if matrix is not None and feedback_id in matrix.items:
+                _, tags = matrix.items[feedback_id]
+                matrix.set_item(feedback_id, board_id, tags)
+
+    def remove(self, feedback_id):
+        """Stop counting a deleted feedback item."""
+        with self._lock:
+            if self._state is not None:
+                self._state.set_item(feedback_id, None, ())
+
+    def query(self, board_ids=None, tag_id=None, limit=None):
+        """
+        Return tag counts and the most frequent pairs on ``board_ids``.
+
+        ``board_ids`` of None covers every board; with ``tag_id`` only the
+        pairs including that tag are returned. Returns ``(tags, pairs)``:
+        a ``Counter`` of tag ids and a list of ``((tag_id, tag_id), count)``.
+        """
+        limit = limit or get_tag_co_occurrence_setting("LIMIT")
+        matrix = self._load()
+        tags = Counter()
+        pairs = Counter()
+        with self._lock:
+            boards = matrix.pairs.keys() if board_ids is None else board_ids
+            for board_id in boards:
+                tags.update(matrix.tags.get(board_id, {}))
+                pairs.update(matrix.pairs.get(board_id, {}))
+        if tag_id is not None:
+            pairs = Counter(
+                {pair: count for pair, count in pairs.items() if tag_id in pair}
+            )
+        # Removals leave zero counts behind
+        return +tags, (+pairs).most_common(limit)
+
+
+tag_co_occurrence = TagCoOccurrence()
@@ -0,0 +1,352 @@
+"""
+Feedback Management System Facts Snapshot
+
+This module keeps an in-process, columnar snapshot of feedback facts for
+interactive dashboard queries (``/api/analytics/query/``), so filter and
+group-by combinations never reach the OLTP tables.
+
+Rows are ordered by creation day, so a date range is a contiguous range of
+row positions. Every board, status, priority and tag has a bitset over the
+rows, held as one Python integer; vote counts are stored bit-sliced (one
+bitset per binary digit). Filtering is ``&``/``|`` over those integers and
+counting is ``int.bit_count()``, both implemented in C and independent of
+the number of distinct values in the data. Memory is one bit per row per
+board, status, priority, tag and vote digit.
+
+The snapshot is built with two queries and then kept current by the signal
+receivers in ``signals.py`` once writes commit. Writes made by other worker
+processes are picked up by a full rebuild every ``FEEDBACK_FACTS["TTL"]``
+seconds; while one request rebuilds, others keep answering from the old
+snapshot (see ``snapshots.py``). Days are counted in ``TIME_ZONE``.
+"""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import product
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Feedback
+from .snapshots import TTLSnapshot
+
+DEFAULT_FEEDBACK_FACTS = {
+    "TTL": 600,
+    "MAX_GROUPS": 1000,
+}
+
+DIMENSIONS = ("board", "status", "priority", "tag")
+TIME_BUCKETS = ("day", "week", "month")
+
+
+def get_feedback_facts_setting(name):
+    """Read a FEEDBACK_FACTS option, falling back to the defaults."""
+    return getattr(settings, "FEEDBACK_FACTS", {}).get(
+        name, DEFAULT_FEEDBACK_FACTS[name]
+    )
+
+
+def bucket_start(day, bucket):
+    """First day of the ``bucket`` containing ``day`` (an ordinal)."""
+    if bucket == "week":
+        return day - date.fromordinal(day).weekday()
+    if bucket == "month":
+        return date.fromordinal(day).replace(day=1).toordinal()
+    return day
+
+
+def range_mask(low, high):
+    """Bitset of the row positions ``low <= position < high``."""
+    return ((1 << high) - 1) ^ ((1 << low) - 1)
+
+
+class _Snapshot:
+    """Columnar feedback facts; mutated only under ``FeedbackFacts._lock``."""
+
+    def __init__(self):
+        self.positions = {}
+        self.ids = array("q")
+        self.days = array("l")
+        self.votes = array("l")
+        self.board = array("q")
+        self.status = []
+        self.priority = []
+        self.alive = 0
+        self.masks = {dimension: {} for dimension in DIMENSIONS}
+        self.vote_planes = []
+        self.built_at = time.time()
+
+    def set_bit(self, dimension, value, bit):
+        masks = self.masks[dimension]
+        masks[value] = masks.get(value, 0) | bit
+
+    def clear_bit(self, dimension, value, bit):
+        masks = self.masks[dimension]
+        if value in masks:
+            masks[value] &= ~bit
+
+    def set_votes(self, position, votes):
+        old = self.votes[position]
+        self.votes[position] = votes
+        changed = old ^ votes
+        while changed.bit_length() > len(self.vote_planes):
+            self.vote_planes.append(0)
+        bit = 1 << position
+        for digit in range(changed.bit_length()):
+            if changed >> digit & 1:
+                self.vote_planes[digit] ^= bit
+
+
+def build_snapshot():
+    """Load every feedback item and tag assignment into a new snapshot."""
+    snapshot = _Snapshot()
+    rows = Feedback.objects.order_by("created_at", "id").values_list(
+        "id", "board_id", "status", "priority", "created_at", "vote_count"
+    )
+    # Bitsets are assembled in byte buffers, then converted once
+    buffers = {dimension: {} for dimension in DIMENSIONS}
+    plane_buffers = []
+
+    def set_bit(dimension, value, position):
+        buffer = buffers[dimension].get(value)
+        if buffer is None:
+            buffer = buffers[dimension][value] = bytearray(size)
+        buffer[position >> 3] |= 1 << (position & 7)
+
+    rows = list(rows)
+    size = (len(rows) >> 3) + 1
+    for position, (pk, board_id, status, priority, created_at, votes) in enumerate(
+        rows
+    ):
+        snapshot.positions[pk] = position
+        snapshot.ids.append(pk)
+        snapshot.days.append(timezone.localdate(created_at).toordinal())
+        snapshot.votes.append(votes)
+        snapshot.board.append(board_id)
+        snapshot.status.append(status)
+        snapshot.priority.append(priority)
+        set_bit("board", board_id, position)
+        set_bit("status", status, position)
+        set_bit("priority", priority, position)
+        digit = 0
+        while votes:
+            if votes & 1:
+                while digit >= len(plane_buffers):
+                    plane_buffers.append(bytearray(size))
+                plane_buffers[digit][position >> 3] |= 1 << (position & 7)
+            votes >>= 1
+            digit += 1
+
+    positions = snapshot.positions
+    for feedback_id, tag_id in Feedback.tags.through.objects.values_list(
+        "feedback_id", "tag_id"
+    ).iterator(chunk_size=10000):
+        position = positions.get(feedback_id)
+        if position is not None:
+            set_bit("tag", tag_id, position)
+
+    for dimension, values in buffers.items():
+        snapshot.masks[dimension] = {
+            value: int.from_bytes(buffer, "little") for value, buffer in values.items()
+        }
+    snapshot.vote_planes = [
+        int.from_bytes(buffer, "little") for buffer in plane_buffers
+    ]
+    snapshot.alive = range_mask(0, len(rows))
+    return snapshot
+
+
+class FeedbackFacts(TTLSnapshot):
+    """The snapshot plus its refresh policy and query engine."""
+
+    cache_name = "feedback_facts"
+
+    def ttl(self):
+        return get_feedback_facts_setting("TTL")
+
+    def build(self):
+        return build_snapshot()
+
+    # Incremental updates, applied by signal receivers after commit
+
+    def add(self, feedback):
+        """Append a newly created feedback item."""
+        with self._lock:
+            snapshot = self._state
+            if snapshot is None or feedback.pk in snapshot.positions:
+                return
+            day = timezone.localdate(feedback.created_at).toordinal()
+            if snapshot.days and day < snapshot.days[-1]:
+                # Rows must stay in day order; backdated rows need a rebuild
+                self._discard()
+                return
+            position = len(snapshot.ids)
+            bit = 1 << position
+            snapshot.positions[feedback.pk] = position
+            snapshot.ids.append(feedback.pk)
+            snapshot.days.append(day)
+            snapshot.votes.append(0)
+            snapshot.board.append(feedback.board_id)
+            snapshot.status.append(feedback.status)
+            snapshot.priority.append(feedback.priority)
+            snapshot.set_bit("board", feedback.board_id, bit)
+            snapshot.set_bit("status", feedback.status, bit)
+            snapshot.set_bit("priority", feedback.priority, bit)
+            snapshot.set_votes(position, feedback.vote_count)
+            snapshot.alive |= bit
+
+    def update(self, feedback_id, **values):
+        """Apply new ``board``, ``status`` and/or ``priority`` values to a row."""
+        with self._lock:
+            snapshot = self._state
+            position = None if snapshot is None else snapshot.positions.get(feedback_id)
+            if position is None:
+                return
+            bit = 1 << position
+            for dimension, value in values.items():
+                column = getattr(snapshot, dimension)
+                if column[position] != value:
+                    snapshot.clear_bit(dimension, column[position], bit)
+                    snapshot.set_bit(dimension, value, bit)
+                    column[position] = value
+
+    def remove(self, feedback_id):
+        """Drop a deleted feedback item."""
+        with self._lock:
+            snapshot = self._state
+            position = None if snapshot is None else snapshot.positions.get(feedback_id)
+            if position is not None:
+                snapshot.alive &= ~(1 << position)
+
+    def add_votes(self, feedback_ids, delta):
+        """Add ``delta`` to the vote count of each item."""
+        with self._lock:
+            snapshot = self._state
+            if snapshot is None:
+                return
+            for feedback_id in feedback_ids:
+                position = snapshot.positions.get(feedback_id)
+                if position is not None:
+                    votes = max(snapshot.votes[position] + delta, 0)
+                    snapshot.set_votes(position, votes)
+
+    def set_tags(self, feedback_ids, tag_ids, present):
+        """Add or remove tag assignments."""
+        with self._lock:
+            snapshot = self._state
+            if snapshot is None:
+                return
+            for feedback_id, tag_id in product(feedback_ids, tag_ids):
+                position = snapshot.positions.get(feedback_id)
+                if position is None:
+                    continue
+                if present:
+                    snapshot.set_bit("tag", tag_id, 1 << position)
+                else:
+                    snapshot.clear_bit("tag", tag_id, 1 << position)
+
+    def remove_tag(self, tag_id):
+        """Forget a deleted tag."""
+        with self._lock:
+            if self._state is not None:
+                self._state.masks["tag"].pop(tag_id, None)
+
+    # Queries
+
+    def query(self, filters=None, group_by=(), start=None, end=None, boards=None):
+        """
+        Count feedback and sum its votes, filtered and grouped.
+
+        ``filters`` maps dimensions to accepted values (any of them matches);
+        ``boards`` optionally limits rows to the boards the caller may see;
+        ``start`` and ``end`` bound the creation date, inclusive. ``group_by``
+        lists up to two dimensions or time buckets. Returns
+        ``(groups, totals, snapshot)``; each group is a dict with the group
+        keys, ``count`` and ``votes``. Raises ValueError when the grouping
+        would yield more than ``FEEDBACK_FACTS["MAX_GROUPS"]`` groups.
+        """
+        snapshot = self._load()
+        mask = snapshot.alive
+        if boards is not None:
+            mask &= self._union(snapshot, "board", boards)
+        for dimension, values in (filters or {}).items():
+            mask &= self._union(snapshot, dimension, values)
+        if start is not None or end is not None:
+            low = 0 if start is None else bisect_left(snapshot.days, start.toordinal())
+            high = (
+                len(snapshot.days)
+                if end is None
+                else bisect_right(snapshot.days, end.toordinal())
+            )
+            mask &= range_mask(low, high)
+
+        totals = self._measure(snapshot, mask)
+        axes = [self._groups(snapshot, key, mask) for key in group_by]
+        combinations = 1
+        for axis in axes:
+            combinations *= len(axis)
+        if combinations > get_feedback_facts_setting("MAX_GROUPS"):
+            raise ValueError(
+                f"The grouping yields {combinations} groups; narrow the filters."
+            )
+        groups = []
+        for combination in product(*axes):
+            group_mask = mask
+            for _, _, group in combination:
+                group_mask &= group
+            if not group_mask:
+                continue
+            row = {key: value for key, value, _ in combination}
+            row.update(self._measure(snapshot, group_mask))
+            groups.append(row)
+        return groups, totals, snapshot
+
+    def _union(self, snapshot, dimension, values):
+        masks = snapshot.masks[dimension]
+        result = 0
+        for value in values:
+            result |= masks.get(value, 0)
+        return result
+
+    def _measure(self, snapshot, mask):
+        votes = 0
+        for digit, plane in enumerate(snapshot.vote_planes):
+            votes += (plane & mask).bit_count() << digit
+        return {"count": mask.bit_count(), "votes": votes}
+
+    def _groups(self, snapshot, key, mask):
+        """``(key, value, bitset)`` for each value of a dimension or bucket."""
+        if key in DIMENSIONS:
+            return [
+                (key, value, group)
+                for value, group in sorted(snapshot.masks[key].items())
+                if group & mask
+            ]
+        # Time buckets are contiguous row ranges; only the selected span
+        days = snapshot.days
+        if not mask:
+            return []
+        low = (mask & -mask).bit_length() - 1
+        high = mask.bit_length()
+        groups = []
+        while low < high:
+            first = bucket_start(days[low], key)
+            if key == "day":
+                following = first + 1
+            elif key == "week":
+                following = first + 7
+            else:
+                following = (
+                    (date.fromordinal(first) + timedelta(days=32))
+                    .replace(day=1)
+                    .toordinal()
+                )
+            end = bisect_left(days, following, low, high)
+            groups.append((key, date.fromordinal(first), range_mask(low, end)))
+            low = end
+        return groups
+
+
+feedback_facts = FeedbackFacts()
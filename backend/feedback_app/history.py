@@ -0,0 +1,212 @@
+"""
+Feedback Management System Status History
+
+This module records every change of a feedback item's status or priority as
+an append-only ``FeedbackTransition`` row, in the transaction of the change.
+
+Single saves are recorded by a ``post_save`` receiver in ``signals.py`` from
+the previous values its ``pre_save`` receiver already reads, so an edit costs
+one extra ``INSERT``, and only when one of the fields changed.
+``bulk_change`` sets a status or priority on many items with one ``UPDATE``
+and one bulk ``INSERT``.
+
+Status changes also keep each item's ``FeedbackCycle`` row current: when it
+was first started and last completed, in seconds since creation. Together
+with the first response, which ``signals.py`` fills in when the first
+comment by someone else is saved, that row is all workflow analytics read.
+``rebuild_cycles`` recomputes the rows from the history, for data inserted
+without signals.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+
+from .models import Comment, Feedback, FeedbackCycle, FeedbackTransition
+
+TRACKED_FIELDS = ("status", "priority")
+
+
+def build_transitions(feedback_id, board_id, created_at, previous, current, user, now):
+    """Return unsaved transitions for the fields that differ between states."""
+    age_seconds = (now - created_at).total_seconds()
+    return [
+        FeedbackTransition(
+            feedback_id=feedback_id,
+            board_id=board_id,
+            field=field,
+            from_value=previous[field],
+            to_value=current[field],
+            changed_by=user,
+            changed_at=now,
+            age_seconds=age_seconds,
+        )
+        for field in TRACKED_FIELDS
+        if field in previous and field in current and previous[field] != current[field]
+    ]
+
+
+def record_transitions(feedback, previous, user=None):
+    """Record how a saved feedback item differs from its ``previous`` values."""
+    current = {field: getattr(feedback, field) for field in TRACKED_FIELDS}
+    transitions = build_transitions(
+        feedback.pk,
+        feedback.board_id,
+        feedback.created_at,
+        previous,
+        current,
+        user,
+        timezone.now(),
+    )
+    if transitions:
+        FeedbackTransition.objects.bulk_create(transitions)
+        record_cycles(transitions)
+    return transitions
+
+
+def bulk_change(feedback_ids, changes, user=None):
+    """
+    Set ``changes`` (status and/or priority) on many feedback items.
+
+    Items that already have the requested values are left alone. Returns the
+    previous state of the changed items as dicts with ``pk``, ``board_id``,
+    ``author_id``, ``title`` and the tracked fields.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = (
+            Feedback.objects.filter(pk__in=feedback_ids)
+            .select_for_update()
+            .order_by("pk")
+            .values(
+                "pk", "board_id", "created_at", "author_id", "title", *TRACKED_FIELDS
+            )
+        )
+        changed = []
+        transitions = []
+        for row in rows:
+            row_transitions = build_transitions(
+                row["pk"], row["board_id"], row["created_at"], row, changes, user, now
+            )
+            if row_transitions:
+                changed.append(row)
+                transitions.extend(row_transitions)
+        if changed:
+            Feedback.objects.filter(pk__in=[row["pk"] for row in changed]).update(
+                updated_at=now, **changes
+            )
+            FeedbackTransition.objects.bulk_create(transitions)
+            record_cycles(transitions)
+    return changed
+
+
+def record_cycles(transitions):
+    """Fold saved status ``transitions`` into the items' cycle rows."""
+    milestones = [
+        transition
+        for transition in transitions
+        if transition.field == FeedbackTransition.Field.STATUS
+        and transition.to_value
+        in (Feedback.Status.IN_PROGRESS, Feedback.Status.COMPLETED)
+    ]
+    if not milestones:
+        return
+    cycles = FeedbackCycle.objects.in_bulk(
+        {transition.feedback_id for transition in milestones}
+    )
+    missing = {}
+    for transition in milestones:
+        cycle = cycles.get(transition.feedback_id)
+        if cycle is None:
+            # Feedback inserted without signals; the cycle starts here
+            cycle = cycles[transition.feedback_id] = missing[transition.feedback_id] = (
+                FeedbackCycle(
+                    feedback_id=transition.feedback_id,
+                    board_id=transition.board_id,
+                    created_at=transition.changed_at
+                    - timedelta(seconds=transition.age_seconds),
+                )
+            )
+        if transition.to_value == Feedback.Status.IN_PROGRESS:
+            if cycle.started_seconds is None:
+                cycle.started_seconds = transition.age_seconds
+        else:
+            cycle.completed_seconds = transition.age_seconds
+            cycle.completed_at = transition.changed_at
+    FeedbackCycle.objects.bulk_create(missing.values())
+    FeedbackCycle.objects.bulk_update(
+        [cycle for pk, cycle in cycles.items() if pk not in missing],
+        ["started_seconds", "completed_seconds", "completed_at"],
+    )
+
+
+def rebuild_cycles(batch_size=5000):
+    """
+    Recompute every ``FeedbackCycle`` row from feedback, comments and history.
+
+    For feedback, comments or transitions inserted in bulk, which bypasses
+    the signals that keep the rows current. Returns the number of rows.
+    """
+    total = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Feedback.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "board_id", "created_at")[:batch_size]
+        )
+        if not rows:
+            return total
+        ids = [row[0] for row in rows]
+        responses = dict(
+            Comment.objects.filter(feedback_id__in=ids)
+            .exclude(author_id=F("feedback__author_id"))
+            .values("feedback_id")
+            .annotate(first=Min("created_at"))
+            .values_list("feedback_id", "first")
+        )
+        milestones = {
+            row[0]: row[1:]
+            for row in FeedbackTransition.objects.filter(
+                feedback_id__in=ids, field=FeedbackTransition.Field.STATUS
+            )
+            .values("feedback_id")
+            .annotate(
+                started=Min(
+                    "age_seconds", filter=Q(to_value=Feedback.Status.IN_PROGRESS)
+                ),
+                completed=Max(
+                    "age_seconds", filter=Q(to_value=Feedback.Status.COMPLETED)
+                ),
+                completed_at=Max(
+                    "changed_at", filter=Q(to_value=Feedback.Status.COMPLETED)
+                ),
+            )
+            .values_list("feedback_id", "started", "completed", "completed_at")
+        }
+        cycles = []
+        for pk, board_id, created_at in rows:
+            started, completed, completed_at = milestones.get(pk, (None,) * 3)
+            response = responses.get(pk)
+            cycles.append(
+                FeedbackCycle(
+                    feedback_id=pk,
+                    board_id=board_id,
+                    created_at=created_at,
+                    first_response_seconds=(
+                        None
+                        if response is None
+                        else (response - created_at).total_seconds()
+                    ),
+                    started_seconds=started,
+                    completed_seconds=completed,
+                    completed_at=completed_at,
+                )
+            )
+        with transaction.atomic():
+            FeedbackCycle.objects.filter(feedback_id__in=ids).delete()
+            FeedbackCycle.objects.bulk_create(cycles)
+        total += len(cycles)
+        last_pk = ids[-1]
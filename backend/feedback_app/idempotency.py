@@ -0,0 +1,118 @@
+"""
+Feedback Management System Idempotency Keys
+
+This module contains the ``idempotent`` decorator for write actions that
+clients retry, such as feedback and comment creation and the toggle-style
+``vote``. A request carrying an ``Idempotency-Key`` header runs once; its
+response (status, data and headers) is stored and replayed for every retry
+with the same key, marked with ``Idempotent-Replayed: true``, without
+touching the database again.
+
+Keys are scoped to the user and the request path. Reusing a key with a
+different request body is rejected with 422, and a retry arriving while the
+first request is still running gets 409. Server errors are not stored, so
+the request can be retried.
+
+Responses live in the ``idempotency`` cache for ``IDEMPOTENCY["TTL"]``
+seconds; the cache is file based by default so every worker process sees
+them. A request claims its key with ``cache.add``, which must be atomic:
+it is for ``SampledCullFileBasedCache``, the local-memory cache, Redis and
+Memcached, but not for Django's plain ``FileBasedCache``.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_CACHE = "idempotency"
+
+DEFAULT_IDEMPOTENCY = {
+    "TTL": 86400,
+    # How long a request may run before a retry may take over its key
+    "LOCK_TIMEOUT": 60,
+    "MAX_KEY_LENGTH": 255,
+}
+
+IN_PROGRESS = "in_progress"
+
+
+def get_idempotency_setting(name):
+    """Read an IDEMPOTENCY option, falling back to the defaults."""
+    return getattr(settings, "IDEMPOTENCY", {}).get(name, DEFAULT_IDEMPOTENCY[name])
+
+
+def fingerprint(request):
+    """Digest of the request body, to detect keys reused for other requests."""
+    # Canonical JSON of any parsed body: objects, arrays or scalars
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """Store the response of a view method and replay it for retried keys."""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > get_idempotency_setting("MAX_KEY_LENGTH"):
+            return Response(
+                {"error": "Invalid Idempotency-Key"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = caches[IDEMPOTENCY_CACHE]
+        scope = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+        cache_key = f"idempotency:{hashlib.sha256(scope.encode()).hexdigest()}"
+        digest = fingerprint(request)
+        lock_timeout = get_idempotency_setting("LOCK_TIMEOUT")
+        if store.add(cache_key, (IN_PROGRESS, digest), lock_timeout):
+            entry = None
+        else:
+            entry = store.get(cache_key)
+
+        if entry is not None:
+            if entry[1] != digest:
+                return Response(
+                    {"error": "Idempotency-Key was used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if entry[0] == IN_PROGRESS:
+                return Response(
+                    {"error": "A request with this Idempotency-Key is in progress"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            status_code, _, data, headers = entry
+            response = Response(data, status=status_code, headers=headers)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            # Client errors are raised as exceptions too; let them be retried
+            store.delete(cache_key)
+            raise
+        if response.status_code >= 500:
+            store.delete(cache_key)
+        else:
+            # The content type is chosen again when the replay is rendered
+            headers = {
+                name: value
+                for name, value in response.items()
+                if name.lower() != "content-type"
+            }
+            store.set(
+                cache_key,
+                (response.status_code, digest, response.data, headers),
+                get_idempotency_setting("TTL"),
+            )
+        return response
+
+    return wrapper
@@ -0,0 +1,321 @@
+"""
+Feedback Management System Background Jobs
+
+This module contains a small job queue stored in the ``Job`` table, so slow
+side effects can leave the request path without running a message broker.
+Handlers are registered by name with ``@task`` (see ``tasks.py``) and queued
+with ``enqueue``; ``manage.py run_worker`` claims and runs them.
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database
+supports it (PostgreSQL), so any number of workers can poll the same table
+without blocking each other. Elsewhere (SQLite) a conditional ``UPDATE`` only
+flips jobs that are still queued and tags them with a unique claim token,
+which is just as safe, if less concurrent. Jobs sharing a ``dedupe_key``
+run one at a time: a queued one is not claimed while another is running.
+Failed jobs are retried with exponential backoff until ``max_attempts``;
+jobs left running by a worker that died are requeued after
+``JOB_QUEUE["LOCK_TIMEOUT"]``.
+
+With ``JOB_QUEUE["EAGER"]`` (the development default) ``enqueue`` runs the
+handler inline instead, so no worker is needed locally. Tasks registered with
+``eager=False``, such as webhook delivery, which makes network requests, are
+always queued.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .metrics import metrics
+from .models import Job
+
+logger = logging.getLogger("feedback_app.jobs")
+
+DEFAULT_JOB_QUEUE = {
+    "EAGER": False,
+    "CONCURRENCY": 4,
+    "BATCH_SIZE": 50,
+    "POLL_INTERVAL": 1.0,
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": 2.0,
+    "BACKOFF_MAX": 3600,
+    "LOCK_TIMEOUT": 600,
+    "RETENTION_HOURS": 24,
+}
+
+
+def get_job_queue_setting(name):
+    """Read a JOB_QUEUE option, falling back to the defaults."""
+    return getattr(settings, "JOB_QUEUE", {}).get(name, DEFAULT_JOB_QUEUE[name])
+
+
+class Task:
+    """A registered job handler."""
+
+    def __init__(self, name, func, batched, max_attempts, eager):
+        self.name = name
+        self.func = func
+        self.batched = batched
+        self.max_attempts = max_attempts
+        self.eager = eager
+
+    def run(self, payloads):
+        """Call the handler once per payload, or once for all if batched."""
+        if self.batched:
+            self.func(payloads)
+        else:
+            for payload in payloads:
+                self.func(payload)
+
+
+_registry = {}
+
+
+def task(name, batched=False, max_attempts=None, eager=True):
+    """
+    Register a job handler under ``name``.
+
+    A batched handler receives the list of payloads of every job of this
+    task claimed together, so it can coalesce repeated work. With
+    ``eager=False`` the task is queued for a worker even when
+    ``JOB_QUEUE["EAGER"]`` is set.
+    """
+
+    def decorator(func):
+        _registry[name] = Task(name, func, batched, max_attempts, eager)
+        return func
+
+    return decorator
+
+
+def enqueue(name, payload=None, delay=None, dedupe_key=""):
+    """
+    Queue a job and return it, or None when it ran eagerly or was redundant.
+
+    A job is redundant when a queued job with the same ``dedupe_key`` is due
+    no later than this one; that job has not started yet and will see the
+    same data. A job queued while one with its key runs waits for it to
+    finish (see ``claim_jobs``).
+    """
+    handler = _registry.get(name)
+    if handler is None:
+        raise ValueError(f"Unknown task {name!r}")
+    payload = payload or {}
+    if handler.eager and get_job_queue_setting("EAGER"):
+        handler.run([payload])
+        return None
+    run_at = timezone.now() + (delay or timedelta())
+    if (
+        dedupe_key
+        and Job.objects.filter(
+            dedupe_key=dedupe_key, status=Job.Status.QUEUED, run_at__lte=run_at
+        ).exists()
+    ):
+        return None
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        max_attempts=handler.max_attempts or get_job_queue_setting("MAX_ATTEMPTS"),
+        run_at=run_at,
+    )
+
+
+def unique_keys(rows):
+    """Ids of ``(pk, dedupe_key)`` rows, keeping the first job of each key."""
+    seen = set()
+    ids = []
+    for pk, dedupe_key in rows:
+        if dedupe_key:
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+        ids.append(pk)
+    return ids
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Atomically mark up to ``limit`` due jobs as running and return them.
+
+    Jobs whose ``dedupe_key`` is held by a running job are left queued, and
+    at most one job per key is claimed.
+    """
+    now = timezone.now()
+    token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    running = Job.objects.filter(
+        status=Job.Status.RUNNING, dedupe_key=OuterRef("dedupe_key")
+    ).exclude(dedupe_key="")
+    due = (
+        Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+        .exclude(Exists(running))
+        .order_by("run_at", "id")
+    )
+    claim = {
+        "status": Job.Status.RUNNING,
+        "locked_by": token,
+        "locked_at": now,
+        "attempts": F("attempts") + 1,
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = unique_keys(
+                due.select_for_update(skip_locked=True).values_list("pk", "dedupe_key")[
+                    :limit
+                ]
+            )
+            Job.objects.filter(pk__in=ids).update(**claim)
+    else:
+        # Without row locks another worker may flip the same rows first; the
+        # status condition makes the UPDATE skip them.
+        ids = unique_keys(due.values_list("pk", "dedupe_key")[:limit])
+        Job.objects.filter(pk__in=ids, status=Job.Status.QUEUED).update(**claim)
+    return list(Job.objects.filter(pk__in=ids, locked_by=token).order_by("id"))
+
+
+def requeue_stale():
+    """Requeue jobs running for over LOCK_TIMEOUT, e.g. after a worker died."""
+    cutoff = timezone.now() - timedelta(seconds=get_job_queue_setting("LOCK_TIMEOUT"))
+    stale = Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff)
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        last_error="Worker lost while running the job",
+        finished_at=timezone.now(),
+    )
+    return stale.update(status=Job.Status.QUEUED, locked_by="", locked_at=None)
+
+
+def purge_finished():
+    """Delete jobs that completed more than RETENTION_HOURS ago."""
+    cutoff = timezone.now() - timedelta(hours=get_job_queue_setting("RETENTION_HOURS"))
+    deleted, _ = Job.objects.filter(
+        status=Job.Status.DONE, finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``, with jitter."""
+    delay = min(
+        get_job_queue_setting("BACKOFF_BASE") * 2 ** (attempts - 1),
+        get_job_queue_setting("BACKOFF_MAX"),
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run_jobs(jobs):
+    """Run jobs of one task together and record the outcome on each."""
+    name = jobs[0].name
+    handler = _registry.get(name)
+    try:
+        if handler is None:
+            raise LookupError(f"Unknown task {name!r}")
+        with transaction.atomic():
+            handler.run([job.payload for job in jobs])
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s %s failed:\n%s", name, [j.pk for j in jobs], error)
+        now = timezone.now()
+        for job in jobs:
+            if handler is None or job.attempts >= job.max_attempts:
+                updates = {"status": Job.Status.FAILED, "finished_at": now}
+                metrics.inc("jobs", task=name, result="failed")
+            else:
+                updates = {
+                    "status": Job.Status.QUEUED,
+                    "run_at": now + timedelta(seconds=backoff(job.attempts)),
+                }
+                metrics.inc("jobs", task=name, result="retried")
+            Job.objects.filter(pk=job.pk).update(
+                locked_by="", locked_at=None, last_error=error, **updates
+            )
+        return False
+    Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+        status=Job.Status.DONE, finished_at=timezone.now(), locked_by=""
+    )
+    metrics.inc("jobs", len(jobs), task=name, result="done")
+    return True
+
+
+def group_jobs(jobs):
+    """Split claimed jobs into units of work: batched tasks run together."""
+    units = {}
+    for job in jobs:
+        handler = _registry.get(job.name)
+        key = job.name if handler is not None and handler.batched else job.pk
+        units.setdefault(key, []).append(job)
+    return list(units.values())
+
+
+class Worker:
+    """
+    Poll the queue and run jobs on a pool of ``concurrency`` threads.
+
+    With a concurrency of 1 jobs run on the calling thread.
+    """
+
+    def __init__(self, concurrency=None, batch_size=None, poll_interval=None):
+        self.concurrency = concurrency or get_job_queue_setting("CONCURRENCY")
+        self.batch_size = batch_size or get_job_queue_setting("BATCH_SIZE")
+        self.poll_interval = poll_interval or get_job_queue_setting("POLL_INTERVAL")
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.pool = None
+        if self.concurrency > 1:
+            self.pool = ThreadPoolExecutor(
+                self.concurrency, thread_name_prefix="job-worker"
+            )
+
+    def stop(self):
+        """Finish the current batch, then return from ``run``."""
+        self.stopping.set()
+
+    def run_once(self):
+        """Claim and run one batch; return the number of jobs claimed."""
+        jobs = claim_jobs(self.worker_id, self.batch_size)
+        units = group_jobs(jobs)
+        if self.pool is None:
+            for unit in units:
+                run_jobs(unit)
+        else:
+            list(self.pool.map(self._run_in_thread, units))
+        return len(jobs)
+
+    def _run_in_thread(self, jobs):
+        try:
+            return run_jobs(jobs)
+        finally:
+            # Pool threads own their connections; honour CONN_MAX_AGE
+            close_old_connections()
+
+    def run(self, drain=False):
+        """Process jobs until stopped, or until the queue is empty if ``drain``."""
+        maintenance_due = 0.0
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                now = timezone.now().timestamp()
+                if now >= maintenance_due:
+                    requeue_stale()
+                    purge_finished()
+                    maintenance_due = now + 60
+                claimed = self.run_once()
+                metrics.maybe_flush()
+                if not claimed:
+                    if drain:
+                        break
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
@@ -0,0 +1,483 @@
+"""
+Benchmark every API route registered in ``feedback_app/urls.py``.
+
+Each route is exercised through the full Django/DRF stack with the test
+client. Latency percentiles, queries per request and throughput are written
+as JSON so results from different commits can be compared with ``--compare``.
+Throttling is off while it runs, so repeated writes are timed rather than
+answered with 429; rolling a write back does not refill its token bucket.
+
+``--cold-start N`` measures the first request instead: every route is called
+once in N freshly started processes without the worker warm-up and N with it
+(see ``feedback_app/warmup.py``), and the median latencies are reported.
+"""
+
+import json
+import argparse
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from feedback_app.middleware import QueryCollector
+from feedback_app.models import User, Board, Tag, Feedback, Comment
+from feedback_app.urls import router, urlpatterns
+from feedback_app.warmup import warm_up
+
+API_PREFIX = "/api/"
+
+# Request bodies for write routes, built from objects present in the dataset.
+WRITE_PAYLOADS = {
+    ("feedback", "create"): lambda ctx: {
+        "title": "Benchmark feedback item",
+        "content": "Created by the endpoint benchmark suite.",
+        "board": ctx["board"],
+    },
+    ("comments", "create"): lambda ctx: {
+        "content": "Benchmark comment",
+        "feedback": ctx["feedback"],
+    },
+    ("tags", "create"): lambda ctx: {"name": "benchmark-tag"},
+}
+
+# Request bodies for the routes outside the router that only accept POST;
+# the others are called with GET.
+POST_PAYLOADS = {
+    "token_obtain_pair": lambda ctx: {
+        "username": ctx["username"],
+        "password": ctx["password"],
+    },
+    "token_refresh": lambda ctx: {"refresh": ctx["refresh"]},
+    "batch": lambda ctx: {
+        "requests": [
+            {"path": f"{API_PREFIX}boards/"},
+            {"path": f"{API_PREFIX}tags/"},
+            {"path": f"{API_PREFIX}feedback/{ctx['feedback']}/"},
+        ],
+        "parallel": True,
+    },
+}
+
+# Query strings for read actions that need input to do representative work.
+GET_QUERIES = {
+    ("feedback", "similar"): "?title=Export+dashboard+report+to+csv"
+    "&content=Please+add+a+csv+export+to+the+reporting+dashboard",
+    "analytics_query": "?group_by=board,status",
+}
+
+
+def percentile(sorted_values, fraction):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Measure latency, queries per request and throughput of every route."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--user",
+            help="Username to authenticate as (defaults to the first admin)",
+        )
+        parser.add_argument(
+            "--password",
+            default="seedpass123",
+            help="Password of the user, for the token route (defaults to the "
+            "one seed_data sets)",
+        )
+        parser.add_argument(
+            "--include-writes",
+            action="store_true",
+            help="Also benchmark write routes; every call is rolled back",
+        )
+        parser.add_argument(
+            "--routes",
+            nargs="*",
+            help="Only run routes whose name contains one of these substrings",
+        )
+        parser.add_argument("--output", help="Write JSON results to this file")
+        parser.add_argument(
+            "--compare", help="Compare against a previous JSON results file"
+        )
+        parser.add_argument(
+            "--cold-start",
+            type=int,
+            metavar="N",
+            help="Time the first request to each route in N fresh processes "
+            "without and N with the worker warm-up",
+        )
+        # Used by --cold-start for the processes it starts
+        parser.add_argument(
+            "--first-request", choices=["cold", "warm"], help=argparse.SUPPRESS
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        context = self.build_context(user, options["password"])
+        routes = self.collect_routes(context, options["include_writes"])
+        if options["routes"]:
+            routes = [
+                route
+                for route in routes
+                if any(part in route["name"] for part in options["routes"])
+            ]
+
+        if options["cold_start"]:
+            results = self.run_cold_start(options)
+            payload = {
+                "commit": current_commit(),
+                "timestamp": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "user": user.username,
+                "processes": options["cold_start"],
+                "cold_start": results,
+            }
+            if options["output"]:
+                with open(options["output"], "w") as fh:
+                    json.dump(payload, fh, indent=2)
+                self.stdout.write(f"Results written to {options['output']}")
+            return
+
+        token = str(RefreshToken.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        # The slow-request log would drown the report; show it with -v 2.
+        slow_log = logging.getLogger("feedback_app.performance")
+        slow_log_disabled = slow_log.disabled
+        slow_log.disabled = options["verbosity"] < 2
+
+        if options["first_request"]:
+            try:
+                with self.benchmark_settings():
+                    result = self.first_requests(
+                        client, routes, options["first_request"] == "warm"
+                    )
+            finally:
+                slow_log.disabled = slow_log_disabled
+            self.stdout.write(json.dumps(result))
+            return
+
+        results = []
+        try:
+            with self.benchmark_settings():
+                for route in routes:
+                    results.append(
+                        self.run_route(
+                            client, route, options["iterations"], options["warmup"]
+                        )
+                    )
+                    self.report(results[-1])
+        finally:
+            slow_log.disabled = slow_log_disabled
+
+        payload = {
+            "commit": current_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "user": user.username,
+            "iterations": options["iterations"],
+            "dataset": {
+                "users": User.objects.count(),
+                "boards": Board.objects.count(),
+                "tags": Tag.objects.count(),
+                "feedback": Feedback.objects.count(),
+                "comments": Comment.objects.count(),
+            },
+            "results": results,
+        }
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(payload, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def benchmark_settings(self):
+        """Accept the test client's host and switch the throttles off."""
+        return override_settings(
+            ALLOWED_HOSTS=["*"],
+            # ActionRateThrottle lets scopes without a rate through
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": {},
+            },
+        )
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist")
+        user = User.objects.filter(role=User.Role.ADMIN).order_by("pk").first()
+        if user is None:
+            raise CommandError("No admin user found; pass --user or run seed_data")
+        return user
+
+    def build_context(self, user, password):
+        """Pick representative objects used to fill URL and body parameters."""
+        public_feedback = Feedback.objects.filter(board__is_public=True)
+        return {
+            "user": user.pk,
+            "username": user.username,
+            "password": password,
+            "refresh": str(RefreshToken.for_user(user)),
+            "board": Board.objects.filter(is_public=True)
+            .values_list("pk", flat=True)
+            .first(),
+            "tag": Tag.objects.values_list("pk", flat=True).first(),
+            "feedback": public_feedback.values_list("pk", flat=True).first(),
+            "comment": Comment.objects.filter(feedback__board__is_public=True)
+            .values_list("pk", flat=True)
+            .first(),
+        }
+
+    def collect_routes(self, context, include_writes):
+        """Expand the API URL patterns into concrete (method, path) routes."""
+        detail_objects = {
+            "users": context["user"],
+            "boards": context["board"],
+            "tags": context["tag"],
+            "feedback": context["feedback"],
+            "comments": context["comment"],
+        }
+        routes = []
+        for prefix, viewset, basename in router.registry:
+            pk = detail_objects.get(prefix)
+            base = f"{API_PREFIX}{prefix}/"
+            routes.append(self.route(basename, "list", "GET", base))
+            if pk is not None:
+                routes.append(self.route(basename, "retrieve", "GET", f"{base}{pk}/"))
+            if include_writes and (prefix, "create") in WRITE_PAYLOADS:
+                routes.append(
+                    self.route(
+                        basename,
+                        "create",
+                        "POST",
+                        base,
+                        WRITE_PAYLOADS[(prefix, "create")](context),
+                    )
+                )
+
+            for extra in viewset.get_extra_actions():
+                if extra.detail and pk is None:
+                    continue
+                path = (
+                    f"{base}{pk}/{extra.url_path}/"
+                    if extra.detail
+                    else f"{base}{extra.url_path}/"
+                )
+                for method in extra.mapping:
+                    if method == "get":
+                        query = GET_QUERIES.get((prefix, extra.url_path), "")
+                        routes.append(
+                            self.route(basename, extra.__name__, "GET", path + query)
+                        )
+                    elif include_writes and extra.detail:
+                        routes.append(
+                            self.route(
+                                basename, extra.__name__, method.upper(), path, {}
+                            )
+                        )
+
+        # Views routed outside the router
+        for pattern in urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            path = f"{API_PREFIX}{pattern.pattern}"
+            if pattern.name in POST_PAYLOADS:
+                body = POST_PAYLOADS[pattern.name](context)
+                routes.append(self.route(pattern.name, None, "POST", path, body))
+            else:
+                query = GET_QUERIES.get(pattern.name, "")
+                routes.append(self.route(pattern.name, None, "GET", path + query))
+        return routes
+
+    def route(self, basename, action, method, path, body=None):
+        name = f"{basename}-{action}" if action else basename
+        return {
+            "name": name.replace("_", "-"),
+            "method": method,
+            "path": path,
+            "body": body,
+        }
+
+    def call(self, client, route):
+        if route["method"] == "GET":
+            return client.get(route["path"])
+        # Writes run in a transaction that is always rolled back.
+        with transaction.atomic():
+            response = client.generic(
+                route["method"],
+                route["path"],
+                json.dumps(route["body"] or {}),
+                content_type="application/json",
+            )
+            transaction.set_rollback(True)
+        return response
+
+    def run_route(self, client, route, iterations, warmup):
+        for _ in range(warmup):
+            self.call(client, route)
+
+        latencies = []
+        query_counts = []
+        status_codes = set()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            collector = QueryCollector(limit=0)
+            with connection.execute_wrapper(collector):
+                request_start = time.perf_counter()
+                response = self.call(client, route)
+                latencies.append((time.perf_counter() - request_start) * 1000)
+            query_counts.append(collector.count)
+            status_codes.add(response.status_code)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "name": route["name"],
+            "method": route["method"],
+            "path": route["path"],
+            "status_codes": sorted(status_codes),
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies), 3),
+                "p50": round(percentile(latencies, 0.50), 3),
+                "p95": round(percentile(latencies, 0.95), 3),
+                "p99": round(percentile(latencies, 0.99), 3),
+                "max": round(latencies[-1], 3),
+            },
+            "queries": {
+                "mean": round(statistics.fmean(query_counts), 2),
+                "max": max(query_counts),
+            },
+            "throughput_rps": round(iterations / elapsed, 2) if elapsed else None,
+            "response_bytes": len(response.content),
+        }
+
+    def first_requests(self, client, routes, warm):
+        """Time one call per route, as the first requests of a new worker."""
+        # A WSGI server loads the middleware and nothing else before serving;
+        # drop the connection used above to pick the routes.
+        client.handler.load_middleware()
+        for conn in connections.all():
+            conn.close()
+        warmup_ms = 0.0
+        if warm:
+            warmup_ms = sum(warm_up().values())
+        latencies = {}
+        for route in routes:
+            started = time.perf_counter()
+            self.call(client, route)
+            latencies[route["name"]] = (time.perf_counter() - started) * 1000
+        return {"warmup_ms": warmup_ms, "latency_ms": latencies}
+
+    def run_cold_start(self, options):
+        """Start fresh processes and compare their first requests."""
+        command = [sys.executable, "-m", "django", "benchmark_endpoints"]
+        for name in ("user", "settings"):
+            if options.get(name):
+                command += [f"--{name}", options[name]]
+        if options["include_writes"]:
+            command.append("--include-writes")
+        if options["routes"]:
+            command += ["--routes", *options["routes"]]
+
+        runs = {"cold": [], "warm": []}
+        for _ in range(options["cold_start"]):
+            for mode, mode_runs in runs.items():
+                output = subprocess.run(
+                    command + ["--first-request", mode],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    cwd=settings.BASE_DIR,
+                ).stdout
+                mode_runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        results = []
+        for name in runs["cold"][0]["latency_ms"]:
+            cold = statistics.median(run["latency_ms"][name] for run in runs["cold"])
+            warm = statistics.median(run["latency_ms"][name] for run in runs["warm"])
+            results.append(
+                {"name": name, "cold_ms": round(cold, 3), "warm_ms": round(warm, 3)}
+            )
+            self.stdout.write(
+                f"{name:35} first request {cold:8.2f} -> {warm:8.2f}ms " f"with warm-up"
+            )
+        first_cold = statistics.median(
+            sum(run["latency_ms"].values()) for run in runs["cold"]
+        )
+        first_warm = statistics.median(
+            sum(run["latency_ms"].values()) for run in runs["warm"]
+        )
+        warmup_ms = statistics.median(run["warmup_ms"] for run in runs["warm"])
+        self.stdout.write(
+            f"\nAll first requests: {first_cold:.2f}ms cold, {first_warm:.2f}ms "
+            f"after a {warmup_ms:.2f}ms warm-up"
+        )
+        return {
+            "routes": results,
+            "total_cold_ms": round(first_cold, 3),
+            "total_warm_ms": round(first_warm, 3),
+            "warmup_ms": round(warmup_ms, 3),
+        }
+
+    def report(self, result):
+        self.stdout.write(
+            f"{result['method']:6} {result['path']:45} "
+            f"p50={result['latency_ms']['p50']:8.2f}ms "
+            f"p95={result['latency_ms']['p95']:8.2f}ms "
+            f"queries={result['queries']['mean']:6.1f} "
+            f"rps={result['throughput_rps']} "
+            f"status={result['status_codes']}"
+        )
+
+    def compare(self, path, results):
+        with open(path) as fh:
+            baseline = {r["name"]: r for r in json.load(fh)["results"]}
+        self.stdout.write(f"\nComparison against {path}:")
+        for result in results:
+            before = baseline.get(result["name"])
+            if before is None:
+                continue
+            p50_before = before["latency_ms"]["p50"]
+            p50_after = result["latency_ms"]["p50"]
+            change = (p50_after - p50_before) / p50_before * 100 if p50_before else 0
+            self.stdout.write(
+                f"{result['name']:35} p50 {p50_before:8.2f} -> {p50_after:8.2f}ms "
+                f"({change:+.1f}%)  queries "
+                f"{before['queries']['mean']} -> {result['queries']['mean']}"
+            )
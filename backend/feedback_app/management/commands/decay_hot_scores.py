@@ -0,0 +1,39 @@
+"""
+Decay every feedback item's hot score to the current time.
+
+Schedule this well inside the configured half-life (e.g. every 10 minutes
+with the default 24 hours) so rows that received no votes lately still rank
+correctly against rows that did.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from feedback_app.ranking import decay_all, rebuild_scores
+
+
+class Command(BaseCommand):
+    help = "Decay hot scores in batches, or rebuild them from the upvote table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute vote counts and scores from scratch, e.g. after "
+            "an import that bypassed signals",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options["rebuild"]:
+            rebuild_scores(options["batch_size"])
+            self.stdout.write(self.style.SUCCESS("Hot scores rebuilt."))
+            return
+        updated = decay_all(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Decayed {updated} hot scores in {time.perf_counter() - start:.2f}s."
+            )
+        )
@@ -0,0 +1,31 @@
+"""
+Issue a signed token that enables on-demand request profiling.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.models import User
+from feedback_app.profiling import get_request_profiling_setting, make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a profiling token for an admin user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+        if user.role != User.Role.ADMIN:
+            raise CommandError("Profiling tokens can only be issued to admins")
+
+        token = make_profile_token(user)
+        max_age = get_request_profiling_setting("TOKEN_MAX_AGE")
+        self.stdout.write(token)
+        self.stderr.write(
+            f"Valid for {max_age}s. Send it as the X-Profile-Token header or the "
+            "_profile query parameter along with the user's normal credentials."
+        )
@@ -0,0 +1,49 @@
+"""
+Recompute the duplicate detection keys of every feedback item.
+
+Signals keep the keys current for writes made through the ORM; run this
+after bulk imports, after ``seed_data`` or when the LSH parameters in
+``feedback_app/similarity.py`` change.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from feedback_app.models import Feedback, FeedbackSimilarityKey
+from feedback_app.similarity import band_keys, shingles
+
+
+class Command(BaseCommand):
+    help = "Rebuild the near-duplicate index over feedback titles and content."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination keeps every batch an indexed range scan.
+            rows = list(
+                Feedback.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "title", "content")[:batch_size]
+            )
+            if not rows:
+                break
+            keys = [
+                FeedbackSimilarityKey(feedback_id=pk, key=key)
+                for pk, title, content in rows
+                for key in set(band_keys(shingles(title, content)))
+            ]
+            # Replace one range at a time so lookups keep working meanwhile.
+            with transaction.atomic():
+                FeedbackSimilarityKey.objects.filter(
+                    feedback_id__gt=last_pk, feedback_id__lte=rows[-1][0]
+                ).delete()
+                FeedbackSimilarityKey.objects.bulk_create(keys, batch_size=5000)
+            total += len(rows)
+            last_pk = rows[-1][0]
+            self.stdout.write(f"  indexed {total} feedback items")
+        self.stdout.write(self.style.SUCCESS("Similarity index rebuilt."))
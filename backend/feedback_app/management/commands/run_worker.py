@@ -0,0 +1,47 @@
+"""
+Run background jobs from the database queue.
+
+Start one or more of these next to the web processes. Each process runs
+``--concurrency`` jobs at a time and stops gracefully on SIGINT/SIGTERM after
+finishing its current batch.
+"""
+
+import signal
+
+from django.core.management.base import BaseCommand
+
+from feedback_app.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Jobs run at once (threads); use 1 with SQLite",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--poll-interval", type=float, default=None)
+        parser.add_argument(
+            "--drain",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+        self.stdout.write(
+            f"Worker {worker.worker_id} started "
+            f"(concurrency {worker.concurrency}, batch {worker.batch_size})"
+        )
+        worker.run(drain=options["drain"])
+        self.stdout.write(self.style.SUCCESS("Worker stopped."))
@@ -0,0 +1,318 @@
+"""
+Seed the database with a realistic, production-scale synthetic dataset.
+
+Everything is written with ``bulk_create`` in batches, so millions of rows
+can be generated in minutes. Board membership, votes and tag usage follow
+Zipf distributions to mimic the long tail seen in production.
+"""
+
+import random
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from feedback_app.history import rebuild_cycles
+from feedback_app.models import (
+    User,
+    Board,
+    BoardStats,
+    Tag,
+    Feedback,
+    FeedbackSimilarityKey,
+    Comment,
+)
+from feedback_app.ranking import rebuild_scores
+from feedback_app.similarity import band_keys, shingles
+
+WORDS = (
+    "dashboard export import search filter login sso billing invoice report "
+    "chart api webhook slack email notification mobile android ios dark mode "
+    "performance slow crash error sync calendar integration permission role "
+    "board kanban table tag comment vote csv pdf attachment upload timezone"
+).split()
+
+
+class ZipfSampler:
+    """Draw ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** s."""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.cum_weights = list(accumulate(1.0 / (k**s) for k in range(1, n + 1)))
+        self.total = self.cum_weights[-1]
+
+    def sample(self):
+        return bisect_left(self.cum_weights, self.rng.random() * self.total)
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let seeded rows keep their generated ``created_at``/``updated_at``."""
+    fields = []
+    for model in models:
+        fields.append((model._meta.get_field("created_at"), "auto_now_add"))
+        fields.append((model._meta.get_field("updated_at"), "auto_now"))
+    for field, flag in fields:
+        setattr(field, flag, False)
+    try:
+        yield
+    finally:
+        for field, flag in fields:
+            setattr(field, flag, True)
+
+
+class Command(BaseCommand):
+    help = "Fast-seed users, boards, feedback, votes, comments and tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--boards", type=int, default=20)
+        parser.add_argument("--tags", type=int, default=50)
+        parser.add_argument("--feedback", type=int, default=10000)
+        parser.add_argument(
+            "--votes",
+            type=int,
+            default=50000,
+            help="Approximate total number of upvotes",
+        )
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument(
+            "--private-ratio",
+            type=float,
+            default=0.3,
+            help="Fraction of boards that are private",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix for generated usernames, board and tag names",
+        )
+
+    def handle(self, *args, **options):
+        # Boards, memberships and feedback are drawn from the users and boards.
+        for name in ("users", "boards"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        self.now = timezone.now()
+        self.days = options["days"]
+
+        with transaction.atomic(), manual_timestamps(Feedback, Comment):
+            user_ids = self.create_users(options["users"])
+            board_ids = self.create_boards(
+                options["boards"], options["private_ratio"], user_ids
+            )
+            tag_ids = self.create_tags(options["tags"])
+            feedback_ids, feedback_dates = self.create_feedback(
+                options["feedback"], board_ids, user_ids, tag_ids
+            )
+            self.create_votes(options["votes"], feedback_ids, user_ids)
+            self.create_comments(
+                options["comments"], feedback_ids, feedback_dates, user_ids
+            )
+            # bulk_create bypasses the signals that maintain board statistics,
+            # vote counts and workflow cycles
+            for board_id in board_ids:
+                BoardStats.refresh(board_id)
+            rebuild_scores(self.batch_size)
+            rebuild_cycles(self.batch_size)
+
+        self.stdout.write(self.style.SUCCESS("Seeding complete."))
+
+    def log(self, label, count):
+        self.stdout.write(f"  {label}: {count}")
+
+    def random_past(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.days * 86400)
+
+    def sentence(self, words):
+        return " ".join(self.rng.choice(WORDS) for _ in range(words))
+
+    def create_users(self, count):
+        # Hashing once keeps seeding fast; every user gets the same password.
+        password = make_password("seedpass123")
+        roles = [User.Role.ADMIN] * 1 + [User.Role.MODERATOR] * 4
+        roles += [User.Role.CONTRIBUTOR] * 95
+        users = (
+            User(
+                username=f"{self.prefix}_user_{i}",
+                email=f"{self.prefix}_user_{i}@example.com",
+                first_name=self.rng.choice(WORDS).title(),
+                last_name=self.rng.choice(WORDS).title(),
+                password=password,
+                role=self.rng.choice(roles),
+            )
+            for i in range(count)
+        )
+        ids = self.bulk_create(User, users)
+        self.log("users", len(ids))
+        return ids
+
+    def create_boards(self, count, private_ratio, user_ids):
+        boards = [
+            Board(
+                name=f"{self.prefix} board {i}",
+                description=self.sentence(12),
+                is_public=self.rng.random() >= private_ratio,
+            )
+            for i in range(count)
+        ]
+        board_ids = self.bulk_create(Board, boards)
+
+        # Skewed membership: a few boards hold most members.
+        sampler = ZipfSampler(len(board_ids), 1.1, self.rng)
+        memberships = set()
+        for user_id in user_ids:
+            for _ in range(1 + int(self.rng.expovariate(1.0))):
+                memberships.add((board_ids[sampler.sample()], user_id))
+        through = Board.members.through
+        self.bulk_create(
+            through,
+            (through(board_id=b, user_id=u) for b, u in memberships),
+            return_ids=False,
+        )
+        self.log("boards", len(board_ids))
+        self.log("board memberships", len(memberships))
+        return board_ids
+
+    def create_tags(self, count):
+        tags = (Tag(name=f"{self.prefix}-tag-{i}") for i in range(count))
+        ids = self.bulk_create(Tag, tags)
+        self.log("tags", len(ids))
+        return ids
+
+    def create_feedback(self, count, board_ids, user_ids, tag_ids):
+        board_sampler = ZipfSampler(len(board_ids), 1.0, self.rng)
+        tag_sampler = ZipfSampler(len(tag_ids), 1.2, self.rng) if tag_ids else None
+        statuses = [choice for choice, _ in Feedback.Status.choices]
+        status_weights = [50, 15, 10, 20, 5]
+        priorities = [choice for choice, _ in Feedback.Priority.choices]
+
+        feedback_ids = []
+        feedback_dates = []
+        tag_through = Feedback.tags.through
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            batch = []
+            for _ in range(size):
+                created_at = self.random_past()
+                batch.append(
+                    Feedback(
+                        board_id=board_ids[board_sampler.sample()],
+                        author_id=self.rng.choice(user_ids),
+                        title=self.sentence(self.rng.randint(3, 8)).capitalize(),
+                        content=self.sentence(self.rng.randint(15, 60)),
+                        status=self.rng.choices(statuses, status_weights)[0],
+                        priority=self.rng.choice(priorities),
+                        created_at=created_at,
+                        updated_at=created_at,
+                    )
+                )
+            ids = [obj.pk for obj in Feedback.objects.bulk_create(batch)]
+            feedback_ids.extend(ids)
+            feedback_dates.extend(obj.created_at for obj in batch)
+            # bulk_create skips the signal that writes duplicate detection keys
+            FeedbackSimilarityKey.objects.bulk_create(
+                [
+                    FeedbackSimilarityKey(feedback_id=obj.pk, key=key)
+                    for obj in batch
+                    for key in set(band_keys(shingles(obj.title, obj.content)))
+                ],
+                batch_size=self.batch_size,
+            )
+
+            if tag_sampler:
+                pairs = {
+                    (feedback_id, tag_ids[tag_sampler.sample()])
+                    for feedback_id in ids
+                    for _ in range(self.rng.randint(0, 3))
+                }
+                tag_through.objects.bulk_create(
+                    [tag_through(feedback_id=f, tag_id=t) for f, t in pairs],
+                    batch_size=self.batch_size,
+                )
+        self.log("feedback", len(feedback_ids))
+        return feedback_ids, feedback_dates
+
+    def create_votes(self, total, feedback_ids, user_ids):
+        if not feedback_ids or not user_ids:
+            return
+        # Rank feedback by popularity, then give each item a Zipf share of votes.
+        ranked = feedback_ids[:]
+        self.rng.shuffle(ranked)
+        weights = [1.0 / (rank**1.07) for rank in range(1, len(ranked) + 1)]
+        scale = total / sum(weights)
+
+        through = Feedback.upvotes.through
+
+        def rows():
+            for feedback_id, weight in zip(ranked, weights):
+                votes = min(len(user_ids), int(weight * scale + self.rng.random()))
+                for user_id in self.rng.sample(user_ids, votes):
+                    yield through(feedback_id=feedback_id, user_id=user_id)
+
+        count = self.bulk_create(through, rows(), return_ids=False)
+        self.log("votes", count)
+
+    def create_comments(self, count, feedback_ids, feedback_dates, user_ids):
+        if not feedback_ids:
+            return
+        sampler = ZipfSampler(len(feedback_ids), 1.0, self.rng)
+
+        def comments():
+            for _ in range(count):
+                index = sampler.sample()
+                # Comments land somewhere between the feedback's creation and now.
+                created_at = (
+                    feedback_dates[index]
+                    + (self.now - feedback_dates[index]) * self.rng.random()
+                )
+                yield Comment(
+                    feedback_id=feedback_ids[index],
+                    author_id=self.rng.choice(user_ids),
+                    content=self.sentence(self.rng.randint(5, 40)),
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+
+        ids = self.bulk_create(Comment, comments())
+        # bulk_create skips Comment.save(), so assign top-level thread paths here.
+        for start in range(0, len(ids), self.batch_size):
+            Comment.objects.bulk_update(
+                [
+                    Comment(pk=pk, path=Comment.path_segment(pk))
+                    for pk in ids[start : start + self.batch_size]
+                ],
+                ["path"],
+            )
+        self.log("comments", len(ids))
+
+    def bulk_create(self, model, objects, return_ids=True):
+        """Insert an iterable of unsaved objects in batches."""
+        ids = []
+        inserted = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                inserted += self._flush(model, batch, ids, return_ids)
+                batch = []
+        if batch:
+            inserted += self._flush(model, batch, ids, return_ids)
+        return ids if return_ids else inserted
+
+    def _flush(self, model, batch, ids, return_ids):
+        created = model.objects.bulk_create(batch)
+        if return_ids:
+            ids.extend(obj.pk for obj in created)
+        return len(created)
@@ -0,0 +1,31 @@
+"""
+Run the worker warm-up in this process and report how long each step took.
+
+Serving processes run it themselves on startup (``WARMUP["ON_STARTUP"]``);
+this command is for checking the cost of each step on a dataset, or for
+servers that start workers some other way.
+"""
+
+from django.core.management.base import BaseCommand
+
+from feedback_app.warmup import STEPS, warm_up
+
+
+class Command(BaseCommand):
+    help = "Pre-build URL, serializer, filter, connection and index state."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--steps",
+            nargs="*",
+            choices=list(STEPS),
+            help="Only run these steps (defaults to WARMUP['STEPS'])",
+        )
+
+    def handle(self, *args, **options):
+        timings = warm_up(options["steps"])
+        for name, ms in timings.items():
+            self.stdout.write(f"  {name:12} {ms:9.1f}ms")
+        self.stdout.write(
+            self.style.SUCCESS(f"Warmed up in {sum(timings.values()):.1f}ms.")
+        )
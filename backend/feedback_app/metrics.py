@@ -0,0 +1,495 @@
+"""
+Feedback Management System Metrics
+
+This module contains the in-process metrics registry used by the request
+instrumentation middleware, the domain counters incremented by the views,
+and the Prometheus text exposition served by ``MetricsView``.
+
+Every thread records into its own shard, so the hot path never takes a lock;
+shards are only merged when metrics are read, and the shards of finished
+threads are folded into one retired shard then. With
+``METRICS["MULTIPROCESS_DIR"]`` set, each worker process periodically dumps
+its merged snapshot to that directory and a scrape of any worker aggregates
+the whole pool. Dumps of exited workers are folded into ``retired.json`` by
+the next scrape, so the directory does not grow as workers are recycled and
+their counts are not lost; their gauges are dropped. The directory is
+coordinated with POSIX file locks.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Bucket upper bounds. The last implicit bucket collects everything above.
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name: (buckets, exposed name, unit scale, help)
+HISTOGRAMS = {
+    "duration_ms": (
+        DURATION_BUCKETS_MS,
+        "feedback_http_request_duration_seconds",
+        0.001,
+        "Request latency per view and action.",
+    ),
+    "db_ms": (
+        DURATION_BUCKETS_MS,
+        "feedback_http_request_db_seconds",
+        0.001,
+        "Time spent in SQL per request.",
+    ),
+    "render_ms": (
+        DURATION_BUCKETS_MS,
+        "feedback_http_request_render_seconds",
+        0.001,
+        "Time spent serializing the response body.",
+    ),
+    "queries": (
+        QUERY_COUNT_BUCKETS,
+        "feedback_http_request_queries",
+        1,
+        "SQL queries issued per request.",
+    ),
+    "response_bytes": (
+        SIZE_BUCKETS_BYTES,
+        "feedback_http_response_size_bytes",
+        1,
+        "Response body size.",
+    ),
+}
+
+# name: (exposed name, type, help)
+COUNTERS = {
+    "requests_in_flight": (
+        "feedback_http_requests_in_flight",
+        "gauge",
+        "Requests currently being served.",
+    ),
+    "votes": (
+        "feedback_votes_total",
+        "counter",
+        "Upvotes added or removed.",
+    ),
+    "feedback_created": (
+        "feedback_feedback_created_total",
+        "counter",
+        "Feedback items created.",
+    ),
+    "comments_created": (
+        "feedback_comments_created_total",
+        "counter",
+        "Comments created.",
+    ),
+    "cache_requests": (
+        "feedback_cache_requests_total",
+        "counter",
+        "Cache lookups by cache and result.",
+    ),
+    "jobs": (
+        "feedback_jobs_total",
+        "counter",
+        "Background jobs run, by task and result.",
+    ),
+    "webhook_deliveries": (
+        "feedback_webhook_deliveries_total",
+        "counter",
+        "Webhook event deliveries, by result.",
+    ),
+    "throttled": (
+        "feedback_throttled_requests_total",
+        "counter",
+        "Requests rejected by a throttle, by scope.",
+    ),
+}
+
+DEFAULT_METRICS = {
+    "MULTIPROCESS_DIR": None,
+    "FLUSH_INTERVAL": 5,
+    "TOKEN": None,
+}
+
+
+def get_metrics_setting(name):
+    """Read a METRICS option, falling back to the defaults."""
+    return getattr(settings, "METRICS", {}).get(name, DEFAULT_METRICS[name])
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    Observations only increment list slots and two scalars, so recording
+    stays cheap enough to run on every sampled request.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record a single observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, counts, count, total):
+        for index, value in enumerate(counts):
+            self.counts[index] += value
+        self.count += count
+        self.sum += total
+
+    def snapshot(self):
+        """Return cumulative bucket counts in a serializable form."""
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            cumulative.append([bound, running])
+        return {"count": self.count, "sum": round(self.sum, 3), "buckets": cumulative}
+
+
+class _Shard:
+    """Metrics recorded by a single thread."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def merge(self, other):
+        """Add the metrics recorded in shard ``other`` to this one."""
+        for key, histogram in list(other.histograms.items()):
+            merged = self.histograms.get(key)
+            if merged is None:
+                merged = self.histograms[key] = Histogram(histogram.buckets)
+            merged.merge(histogram.counts, histogram.count, histogram.sum)
+        for key, value in list(other.counters.items()):
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def clear(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+
+class MetricsRegistry:
+    """Per-process registry of histograms, counters and gauges."""
+
+    def __init__(self):
+        self._local = threading.local()
+        # Guards the shard list, never the recording itself
+        self._lock = threading.Lock()
+        # (weak reference to the recording thread, its shard)
+        self._shards = []
+        self._retired = _Shard()
+        self._next_flush = 0.0
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._prune()
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def _prune(self):
+        """Fold the shards of finished threads into the retired shard."""
+        live = []
+        for reference, shard in self._shards:
+            thread = reference()
+            if thread is not None and thread.is_alive():
+                live.append((reference, shard))
+            else:
+                # A finished thread never records again
+                self._retired.merge(shard)
+        self._shards = live
+
+    def observe(self, name, value, **labels):
+        """Record ``value`` in histogram ``name``."""
+        histograms = self._shard().histograms
+        key = (name, tuple(sorted(labels.items())))
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(HISTOGRAMS[name][0])
+        histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        """Add ``amount`` to counter or gauge ``name``."""
+        counters = self._shard().counters
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + amount
+
+    def record_request(
+        self, view, action, duration_ms, db_ms, render_ms, queries, size
+    ):
+        """Record one instrumented request."""
+        self.observe("duration_ms", duration_ms, view=view, action=action)
+        self.observe("db_ms", db_ms, view=view, action=action)
+        self.observe("render_ms", render_ms, view=view, action=action)
+        self.observe("queries", queries, view=view, action=action)
+        if size is not None:
+            self.observe("response_bytes", size, view=view, action=action)
+
+    def record_cache_lookup(self, cache, hit):
+        """Count a cache hit or miss for ``cache``."""
+        self.inc("cache_requests", cache=cache, result="hit" if hit else "miss")
+
+    def local_snapshot(self):
+        """Merge every thread's shard into one serializable snapshot."""
+        merged = _Shard()
+        with self._lock:
+            self._prune()
+            merged.merge(self._retired)
+            for _, shard in self._shards:
+                merged.merge(shard)
+        return serialize_snapshot(merged.histograms, merged.counters)
+
+    def snapshot(self):
+        """Return this process's snapshot, merged with sibling workers if any."""
+        snapshots = [self.local_snapshot()]
+        directory = get_metrics_setting("MULTIPROCESS_DIR")
+        if directory and os.path.isdir(directory):
+            retire_exited_workers(directory)
+            own = f"{os.getpid()}.json"
+            with locked(directory, exclusive=False):
+                for filename in os.listdir(directory):
+                    if not filename.endswith(".json") or filename == own:
+                        continue
+                    try:
+                        with open(os.path.join(directory, filename)) as fh:
+                            snapshots.append(json.load(fh))
+                    except (OSError, ValueError):
+                        continue
+        return merge_snapshots(snapshots)
+
+    def maybe_flush(self):
+        """Dump this worker's snapshot for multi-process aggregation."""
+        directory = get_metrics_setting("MULTIPROCESS_DIR")
+        now = time.monotonic()
+        if not directory or now < self._next_flush:
+            return
+        self._next_flush = now + get_metrics_setting("FLUSH_INTERVAL")
+        self.flush(directory)
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as fh:
+            json.dump(self.local_snapshot(), fh)
+        os.replace(temporary, path)
+
+    def request_histograms(self):
+        """Return request histograms grouped by view and action."""
+        snapshot = self.snapshot()
+        views = {}
+        for (name, labels), histogram in snapshot["histograms"].items():
+            labels = dict(labels)
+            if "view" not in labels:
+                continue
+            entry = views.setdefault(
+                (labels["view"], labels["action"]),
+                {"view": labels["view"], "action": labels["action"]},
+            )
+            entry[name] = histogram.snapshot()
+        return [views[key] for key in sorted(views)]
+
+    def reset(self):
+        with self._lock:
+            self._retired.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+
+def serialize_snapshot(histograms, counters):
+    """Return histograms and counters keyed by name and labels as JSON data."""
+    return {
+        "histograms": [
+            [name, list(labels), h.counts, h.count, h.sum]
+            for (name, labels), h in histograms.items()
+        ],
+        "counters": [
+            [name, list(labels), value] for (name, labels), value in counters.items()
+        ],
+    }
+
+
+def merge_snapshots(snapshots):
+    """Combine snapshots into Histogram objects and counter totals."""
+    histograms = {}
+    counters = {}
+    for snapshot in snapshots:
+        for name, labels, counts, count, total in snapshot["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None:
+                merged = histograms[key] = Histogram(HISTOGRAMS[name][0])
+            merged.merge(counts, count, total)
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+    return {"histograms": histograms, "counters": counters}
+
+
+@contextmanager
+def locked(directory, exclusive=True):
+    """Hold the lock of a multi-process directory."""
+    import fcntl
+
+    with open(os.path.join(directory, ".lock"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def retire_exited_workers(directory):
+    """
+    Fold the dumps of exited workers into ``retired.json`` and delete them.
+
+    Their counters and histograms stay in the pool totals, so they never go
+    backwards; gauges only describe live processes and are dropped.
+    """
+
+    def exited(filename):
+        pid = filename.split(".", 1)[0]
+        return pid.isdigit() and not process_exists(int(pid))
+
+    if not any(map(exited, os.listdir(directory))):
+        return
+    with locked(directory):
+        # Another worker may have retired them while this one waited
+        stale = [name for name in os.listdir(directory) if exited(name)]
+        dumps = [name for name in stale if name.endswith(".json")]
+        retired = os.path.join(directory, "retired.json")
+        snapshots = []
+        for path in [retired] + [os.path.join(directory, name) for name in dumps]:
+            try:
+                with open(path) as fh:
+                    snapshots.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        merged = merge_snapshots(snapshots)
+        counters = {
+            key: value
+            for key, value in merged["counters"].items()
+            if COUNTERS[key[0]][1] != "gauge"
+        }
+        with open(f"{retired}.tmp", "w") as fh:
+            json.dump(serialize_snapshot(merged["histograms"], counters), fh)
+        os.replace(f"{retired}.tmp", retired)
+        # Including half-written dumps of killed workers
+        for name in stale:
+            os.remove(os.path.join(directory, name))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(round(value, 6))
+    return str(int(value))
+
+
+def render_prometheus(snapshot):
+    """Render a merged snapshot in the Prometheus text exposition format."""
+    lines = []
+
+    for name, (exposed, metric_type, help_text) in COUNTERS.items():
+        series = sorted(
+            (
+                (labels, value)
+                for (key, labels), value in snapshot["counters"].items()
+                if key == name
+            ),
+            key=lambda item: item[0],
+        )
+        if not series and metric_type == "counter":
+            continue
+        lines.append(f"# HELP {exposed} {help_text}")
+        lines.append(f"# TYPE {exposed} {metric_type}")
+        if not series:
+            lines.append(f"{exposed} 0")
+        for labels, value in series:
+            lines.append(f"{exposed}{_format_labels(labels)} {_format_number(value)}")
+
+    cache_totals = {}
+    for (key, labels), value in snapshot["counters"].items():
+        if key == "cache_requests":
+            labels = dict(labels)
+            totals = cache_totals.setdefault(labels["cache"], [0, 0])
+            totals[0 if labels["result"] == "hit" else 1] += value
+    if cache_totals:
+        lines.append("# HELP feedback_cache_hit_ratio Cache hit ratio since start.")
+        lines.append("# TYPE feedback_cache_hit_ratio gauge")
+        for cache, (hits, misses) in sorted(cache_totals.items()):
+            ratio = hits / (hits + misses) if hits + misses else 0.0
+            lines.append(
+                f"feedback_cache_hit_ratio{_format_labels([('cache', cache)])} "
+                f"{ratio:.6f}"
+            )
+
+    for name, (buckets, exposed, scale, help_text) in HISTOGRAMS.items():
+        series = sorted(
+            (
+                (labels, histogram)
+                for (key, labels), histogram in snapshot["histograms"].items()
+                if key == name
+            ),
+            key=lambda item: item[0],
+        )
+        if not series:
+            continue
+        lines.append(f"# HELP {exposed} {help_text}")
+        lines.append(f"# TYPE {exposed} histogram")
+        for labels, histogram in series:
+            running = 0
+            for bound, count in zip(buckets + (None,), histogram.counts):
+                running += count
+                le = "+Inf" if bound is None else _format_number(bound * scale)
+                lines.append(
+                    f"{exposed}_bucket{_format_labels(labels, [('le', le)])} {running}"
+                )
+            lines.append(
+                f"{exposed}_sum{_format_labels(labels)} "
+                f"{_format_number(float(histogram.sum * scale))}"
+            )
+            lines.append(f"{exposed}_count{_format_labels(labels)} {histogram.count}")
+
+    return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@atexit.register
+def _flush_on_exit():
+    directory = get_metrics_setting("MULTIPROCESS_DIR") if settings.configured else None
+    if directory:
+        metrics.flush(directory)
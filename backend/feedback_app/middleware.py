@@ -0,0 +1,302 @@
+"""
+Feedback Management System Middleware
+
+This module contains request instrumentation middleware that records the
+number of SQL queries, database time, render time and response size of
+every sampled request, and the opt-in profiling middleware for admins.
+"""
+
+import cProfile
+import heapq
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .metrics import metrics
+from .models import User
+from .profiling import (
+    build_report,
+    get_request_profiling_setting,
+    read_profile_token,
+    store_report,
+)
+
+logger = logging.getLogger("feedback_app.performance")
+
+DEFAULT_REQUEST_METRICS = {
+    "ENABLED": True,
+    "SAMPLE_RATE": 1.0,
+    "SERVER_TIMING": True,
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_QUERY_LIMIT": 5,
+}
+
+
+def get_request_metrics_setting(name):
+    """Read a REQUEST_METRICS option, falling back to the defaults."""
+    return getattr(settings, "REQUEST_METRICS", {}).get(
+        name, DEFAULT_REQUEST_METRICS[name]
+    )
+
+
+def resolve_view_action(request, view_func):
+    """Return the (view, action) labels used to key metrics for a request."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return view_func.__name__, request.method.lower()
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return view_class.__name__, action
+
+
+class QueryCollector:
+    """
+    Database execute wrapper counting queries and timing them.
+
+    Only the slowest ``limit`` statements are kept, in a bounded heap, so the
+    slow-request log can show the top offenders without storing every query.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            entry = (elapsed, self.count, sql)
+            if len(self.slowest) < self.limit:
+                heapq.heappush(self.slowest, entry)
+            elif self.slowest and elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def top_queries(self):
+        """Return the slowest captured statements, slowest first."""
+        return [
+            {"ms": round(elapsed * 1000, 2), "sql": sql[:500]}
+            for elapsed, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+class QueryCountMiddleware:
+    """
+    Record per-view query counts, DB time, render time and response size.
+
+    Requests are sampled according to ``REQUEST_METRICS["SAMPLE_RATE"]``.
+    Sampled requests are aggregated into ``metrics``, annotated with a
+    ``Server-Timing`` header and logged with their slowest SQL when they exceed
+    ``REQUEST_METRICS["SLOW_REQUEST_MS"]``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = get_request_metrics_setting("ENABLED")
+        self.sample_rate = get_request_metrics_setting("SAMPLE_RATE")
+        self.server_timing = get_request_metrics_setting("SERVER_TIMING")
+        self.slow_request_ms = get_request_metrics_setting("SLOW_REQUEST_MS")
+        self.slow_query_limit = get_request_metrics_setting("SLOW_QUERY_LIMIT")
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        metrics.inc("requests_in_flight")
+        try:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return self.get_response(request)
+            return self.instrument(request)
+        finally:
+            metrics.inc("requests_in_flight", -1)
+            metrics.maybe_flush()
+
+    def instrument(self, request):
+
+        collector = QueryCollector(self.slow_query_limit)
+        request._metrics_view = ("-", request.method.lower())
+        request._metrics_render_ms = 0.0
+
+        start = time.perf_counter()
+        wrapped = []
+        try:
+            for connection in connections.all():
+                connection.execute_wrappers.append(collector)
+                wrapped.append(connection)
+            response = self.get_response(request)
+        finally:
+            for connection in wrapped:
+                connection.execute_wrappers.remove(collector)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        db_ms = collector.duration * 1000
+        render_ms = request._metrics_render_ms
+        size = None if response.streaming else len(response.content)
+        view, action = request._metrics_view
+
+        metrics.record_request(
+            view, action, duration_ms, db_ms, render_ms, collector.count, size
+        )
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={db_ms:.2f};desc="{collector.count} queries", '
+                f"render;dur={render_ms:.2f}, "
+                f"total;dur={duration_ms:.2f}"
+            )
+
+        if duration_ms >= self.slow_request_ms:
+            logger.warning(
+                "Slow request %s %s (%s.%s): %.1fms, %d queries, %.1fms in DB%s",
+                request.method,
+                request.path,
+                view,
+                action,
+                duration_ms,
+                collector.count,
+                db_ms,
+                "".join(
+                    f"\n  {query['ms']:.2f}ms {query['sql']}"
+                    for query in collector.top_queries()
+                ),
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "_metrics_view"):
+            request._metrics_view = resolve_view_action(request, view_func)
+
+    def process_template_response(self, request, response):
+        if hasattr(request, "_metrics_view"):
+            render_start = time.perf_counter()
+
+            def record_render_time(rendered):
+                request._metrics_render_ms = (time.perf_counter() - render_start) * 1000
+
+            response.add_post_render_callback(record_render_time)
+        return response
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile a single request on demand.
+
+    Profiling is triggered by a signed token (see ``manage.py profile_token``)
+    sent in the ``X-Profile-Token`` header or the ``_profile`` query parameter.
+    It is only honored when the request authenticates as the admin the token
+    was issued for. The request runs under cProfile with every SQL statement
+    captured; the report is returned inline when ``_profile_output=inline`` is
+    given or no REPORT_DIR is configured (the default), otherwise it is stored
+    and its id returned in the ``X-Profile-Report`` header.
+
+    Only one profiler can be active in a process, so one request is profiled
+    at a time. A request asking for a profile while another one (or anything
+    else, such as a batch sub-request's parent) is being profiled is served
+    normally, without a report.
+    """
+
+    header = "HTTP_X_PROFILE_TOKEN"
+    query_param = "_profile"
+    output_param = "_profile_output"
+
+    # Shared by every instance, including the batch sub-request chains
+    lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = get_request_profiling_setting("ENABLED")
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        token = request.META.get(self.header) or request.GET.get(self.query_param)
+        if not token or not self.is_authorized(request, token):
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            logger.info("Not profiling %s: a profile is running", request.path)
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            self.lock.release()
+
+    def profile(self, request):
+        """Run the request under cProfile and return or store the report."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool, e.g. a debugger, is already active
+            logger.info("Not profiling %s: a profiler is active", request.path)
+            return self.get_response(request)
+
+        queries = []
+
+        def capture_sql(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                queries.append({"ms": round(elapsed, 3), "sql": sql})
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(capture_sql))
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        report = build_report(request, response, profiler, queries, duration_ms)
+        # An inline report is only returned, never written to disk
+        if request.GET.get(self.output_param) == "inline":
+            return JsonResponse(report)
+        if store_report(report) is None:
+            return JsonResponse(report)
+        response["X-Profile-Report"] = report["id"]
+        return response
+
+    def is_authorized(self, request, token):
+        """Only the admin a token was issued for may profile requests."""
+        user_id = read_profile_token(token)
+        if user_id is None:
+            return False
+        user = self.authenticate(request)
+        return (
+            user is not None
+            and user.pk == user_id
+            and user.is_active
+            and user.role == User.Role.ADMIN
+        )
+
+    def authenticate(self, request):
+        """Authenticate with the same classes DRF views use."""
+        session_user = getattr(request, "user", None)
+        if session_user is not None and session_user.is_authenticated:
+            return session_user
+        drf_request = Request(request)
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication_class().authenticate(drf_request)
+            except APIException:
+                return None
+            if result is not None:
+                return result[0]
+        return None
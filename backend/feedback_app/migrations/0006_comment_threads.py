@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    """Existing comments are all top level: their path is their own id."""
+    Comment = apps.get_model("feedback_app", "Comment")
+    batch = []
+    for comment in Comment.objects.only("pk").iterator(chunk_size=2000):
+        comment.path = f"{comment.pk:010d}"
+        batch.append(comment)
+        if len(batch) >= 2000:
+            Comment.objects.bulk_update(batch, ["path"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0005_alter_board_options_alter_comment_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, help_text="Nesting level, 0 for top level"
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The comment this is a reply to",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="replies",
+                to="feedback_app.comment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(
+                default="",
+                editable=False,
+                help_text="Materialized path of ancestor ids, used for subtree queries",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="reply_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of replies in this comment's subtree",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["feedback", "path"], name="comment_thread_path_idx"
+            ),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
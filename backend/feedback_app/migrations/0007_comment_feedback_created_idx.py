@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0006_comment_threads"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["feedback", "created_at", "id"],
+                name="comment_feedback_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_board_stats(apps, schema_editor):
+    """Compute totals for every existing board with two grouped queries."""
+    Board = apps.get_model("feedback_app", "Board")
+    BoardStats = apps.get_model("feedback_app", "BoardStats")
+    Feedback = apps.get_model("feedback_app", "Feedback")
+
+    totals = {
+        row.pop("board"): row
+        for row in Feedback.objects.order_by()
+        .values("board")
+        .annotate(
+            feedback_total=Count("pk"),
+            open_total=Count("pk", filter=Q(status="open")),
+            in_progress_total=Count("pk", filter=Q(status="in_progress")),
+            completed_total=Count("pk", filter=Q(status="completed")),
+        )
+    }
+    votes = dict(
+        Feedback.upvotes.through.objects.order_by()
+        .values("feedback__board")
+        .annotate(total=Count("pk"))
+        .values_list("feedback__board", "total")
+    )
+    BoardStats.objects.bulk_create(
+        [
+            BoardStats(
+                board_id=board_id,
+                vote_total=votes.get(board_id, 0),
+                **totals.get(board_id, {}),
+            )
+            for board_id in Board.objects.values_list("pk", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0007_comment_feedback_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoardStats",
+            fields=[
+                (
+                    "board",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="feedback_app.board",
+                    ),
+                ),
+                ("feedback_total", models.PositiveIntegerField(default=0)),
+                ("open_total", models.PositiveIntegerField(default=0)),
+                ("in_progress_total", models.PositiveIntegerField(default=0)),
+                ("completed_total", models.PositiveIntegerField(default=0)),
+                ("vote_total", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Board statistics",
+                "verbose_name_plural": "Board statistics",
+            },
+        ),
+        migrations.RunPython(populate_board_stats, migrations.RunPython.noop),
+    ]
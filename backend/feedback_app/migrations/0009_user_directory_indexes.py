@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:50
+
+from django.db import migrations, models
+
+SEARCH_COLUMNS = ("username", "email", "first_name", "last_name")
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    Index the expression PostgreSQL compares for ``istartswith`` lookups.
+
+    Django renders them as ``UPPER(col::text) LIKE UPPER('term%')``; a
+    text_pattern_ops index on that expression turns each prefix search into
+    an index range scan. Other backends keep the plain scan.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS user_{column}_upper_like "
+            f'ON feedback_app_user (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS user_{column}_upper_like")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("feedback_app", "0008_board_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["role", "is_active", "username"], name="user_role_active_idx"
+            ),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0009_user_directory_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedbackSimilarityKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.BigIntegerField()),
+                (
+                    "feedback",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similarity_keys",
+                        to="feedback_app.feedback",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Feedback similarity key",
+                "verbose_name_plural": "Feedback similarity keys",
+                "indexes": [
+                    models.Index(fields=["key", "feedback"], name="similarity_key_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:07
+
+import math
+import time
+
+from django.db import migrations, models
+from django.db.models import Count
+
+HALF_LIFE_SECONDS = 24 * 3600
+
+
+def populate_scores(apps, schema_editor):
+    """Fill vote counts and hot scores, treating votes as cast at creation."""
+    Feedback = apps.get_model("feedback_app", "Feedback")
+    rate = math.log(2) / HALF_LIFE_SECONDS
+    now = time.time()
+    last_pk = 0
+    while True:
+        rows = list(
+            Feedback.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .annotate(num_votes=Count("upvotes"))
+            .values_list("pk", "created_at", "num_votes")[:5000]
+        )
+        if not rows:
+            return
+        Feedback.objects.bulk_update(
+            [
+                Feedback(
+                    pk=pk,
+                    vote_count=votes,
+                    hot_score=(votes + 1)
+                    * math.exp(-rate * max(now - created_at.timestamp(), 0)),
+                    hot_decayed_at=now,
+                )
+                for pk, created_at, votes in rows
+            ],
+            ["vote_count", "hot_score", "hot_decayed_at"],
+        )
+        last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0010_feedback_similarity_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feedback",
+            name="hot_decayed_at",
+            field=models.FloatField(
+                default=time.time,
+                editable=False,
+                help_text="Unix time hot_score was last decayed to",
+            ),
+        ),
+        migrations.AddField(
+            model_name="feedback",
+            name="hot_score",
+            field=models.FloatField(
+                default=1.0,
+                editable=False,
+                help_text="Time-decayed vote count used for the hot ranking",
+            ),
+        ),
+        migrations.AddField(
+            model_name="feedback",
+            name="vote_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of upvotes, maintained on every vote",
+            ),
+        ),
+        migrations.RunPython(populate_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="feedback",
+            index=models.Index(fields=["-hot_score", "-id"], name="feedback_hot_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="feedback",
+            index=models.Index(
+                fields=["-vote_count", "-created_at"], name="feedback_top_voted_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0013_webhooks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedbackTransition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "field",
+                    models.CharField(
+                        choices=[("status", "Status"), ("priority", "Priority")],
+                        max_length=10,
+                    ),
+                ),
+                ("from_value", models.CharField(max_length=20)),
+                ("to_value", models.CharField(max_length=20)),
+                ("changed_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("age_seconds", models.FloatField(default=0.0)),
+                (
+                    "board",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="feedback_app.board",
+                    ),
+                ),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "feedback",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="transitions",
+                        to="feedback_app.feedback",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Feedback transition",
+                "verbose_name_plural": "Feedback transitions",
+                "ordering": ["changed_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["feedback", "changed_at"],
+                        name="transition_feedback_idx",
+                    ),
+                    models.Index(
+                        fields=["board", "changed_at"], name="transition_board_idx"
+                    ),
+                    models.Index(
+                        fields=["field", "to_value", "changed_at"],
+                        name="transition_period_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Max, Min, Q
+
+
+def populate_cycles(apps, schema_editor):
+    """Build the cycle of existing feedback from its comments and history."""
+    Comment = apps.get_model("feedback_app", "Comment")
+    Feedback = apps.get_model("feedback_app", "Feedback")
+    FeedbackCycle = apps.get_model("feedback_app", "FeedbackCycle")
+    FeedbackTransition = apps.get_model("feedback_app", "FeedbackTransition")
+    last_pk = 0
+    while True:
+        rows = list(
+            Feedback.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "board_id", "created_at")[:5000]
+        )
+        if not rows:
+            return
+        ids = [row[0] for row in rows]
+        responses = dict(
+            Comment.objects.filter(feedback_id__in=ids)
+            .exclude(author_id=F("feedback__author_id"))
+            .values("feedback_id")
+            .annotate(first=Min("created_at"))
+            .values_list("feedback_id", "first")
+        )
+        milestones = {
+            row[0]: row[1:]
+            for row in FeedbackTransition.objects.filter(
+                feedback_id__in=ids, field="status"
+            )
+            .values("feedback_id")
+            .annotate(
+                started=Min("age_seconds", filter=Q(to_value="in_progress")),
+                completed=Max("age_seconds", filter=Q(to_value="completed")),
+                completed_at=Max("changed_at", filter=Q(to_value="completed")),
+            )
+            .values_list("feedback_id", "started", "completed", "completed_at")
+        }
+        cycles = []
+        for pk, board_id, created_at in rows:
+            started, completed, completed_at = milestones.get(pk, (None,) * 3)
+            response = responses.get(pk)
+            cycles.append(
+                FeedbackCycle(
+                    feedback_id=pk,
+                    board_id=board_id,
+                    created_at=created_at,
+                    first_response_seconds=(
+                        None
+                        if response is None
+                        else (response - created_at).total_seconds()
+                    ),
+                    started_seconds=started,
+                    completed_seconds=completed,
+                    completed_at=completed_at,
+                )
+            )
+        FeedbackCycle.objects.bulk_create(cycles)
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback_app", "0014_feedback_transitions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedbackCycle",
+            fields=[
+                (
+                    "feedback",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="cycle",
+                        serialize=False,
+                        to="feedback_app.feedback",
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("first_response_seconds", models.FloatField(blank=True, null=True)),
+                ("started_seconds", models.FloatField(blank=True, null=True)),
+                ("completed_seconds", models.FloatField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "board",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="feedback_app.board",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Feedback cycle",
+                "verbose_name_plural": "Feedback cycles",
+                "indexes": [
+                    models.Index(
+                        fields=["created_at", "board", "first_response_seconds"],
+                        name="cycle_created_idx",
+                    ),
+                    models.Index(
+                        fields=[
+                            "completed_at",
+                            "board",
+                            "started_seconds",
+                            "completed_seconds",
+                            "feedback",
+                        ],
+                        name="cycle_completed_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_cycles, migrations.RunPython.noop),
+    ]
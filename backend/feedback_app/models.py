@@ -5,9 +5,16 @@ This module contains the data models for the feedback management system,
 including User roles, Boards, Feedback items, Tags, and Comments.
 """
 
-from django.db import models
+import secrets
+import time
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinLengthValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -39,6 +46,13 @@ class User(AbstractUser):
     class Meta:
         verbose_name = _("User")
         verbose_name_plural = _("Users")
+        indexes = [
+            # Directory filters, walked in username order by the cursor
+            models.Index(
+                fields=["role", "is_active", "username"],
+                name="user_role_active_idx",
+            ),
+        ]
 
 
 class Board(models.Model):
@@ -78,11 +92,15 @@ class Board(models.Model):
     @property
     def member_count(self):
         """Return the number of members in this board."""
+        if hasattr(self, "num_members"):
+            return self.num_members
         return self.members.count()
 
     @property
     def feedback_count(self):
         """Return the number of feedback items in this board."""
+        if hasattr(self, "num_feedback"):
+            return self.num_feedback
         return self.feedbacks.count()
 
     class Meta:
@@ -182,12 +200,34 @@ class Feedback(models.Model):
         blank=True,
         help_text=_("Tags for categorizing this feedback"),
     )
+    vote_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=_("Number of upvotes, maintained on every vote"),
+    )
+    hot_score = models.FloatField(
+        default=1.0,
+        editable=False,
+        help_text=_("Time-decayed vote count used for the hot ranking"),
+    )
+    hot_decayed_at = models.FloatField(
+        default=time.time,
+        editable=False,
+        help_text=_("Unix time hot_score was last decayed to"),
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets pre_save receivers see what a save changes without a query
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     @property
     def upvote_count(self):
         """Return the number of upvotes for this feedback."""
@@ -206,13 +246,27 @@ class Feedback(models.Model):
         ordering = ["-created_at"]
         verbose_name = _("Feedback")
         verbose_name_plural = _("Feedback")
+        indexes = [
+            models.Index(fields=["-hot_score", "-id"], name="feedback_hot_idx"),
+            models.Index(
+                fields=["-vote_count", "-created_at"], name="feedback_top_voted_idx"
+            ),
+        ]
 
 
 class Comment(models.Model):
     """
     Comment model for discussions on feedback items.
+
+    Replies are stored as a tree using a materialized path: ``path`` is the
+    concatenation of the zero-padded ids of every ancestor and the comment
+    itself. A whole thread or subtree is therefore a single indexed range scan
+    on ``(feedback, path)``, already in display order.
     """
 
+    PATH_SEGMENT_WIDTH = 10
+    MAX_DEPTH = 20
+
     feedback = models.ForeignKey(
         Feedback,
         related_name="comments",
@@ -225,16 +279,453 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         help_text=_("The user who wrote this comment"),
     )
+    parent = models.ForeignKey(
+        "self",
+        related_name="replies",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text=_("The comment this is a reply to"),
+    )
     content = models.TextField(
         validators=[MinLengthValidator(3)], help_text=_("The comment content")
     )
+    path = models.CharField(
+        max_length=255,
+        editable=False,
+        default="",
+        help_text=_("Materialized path of ancestor ids, used for subtree queries"),
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0, editable=False, help_text=_("Nesting level, 0 for top level")
+    )
+    reply_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=_("Number of replies in this comment's subtree"),
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.feedback.title}"
 
+    @classmethod
+    def path_segment(cls, pk):
+        """Return the fixed-width path segment for a comment id."""
+        return f"{pk:0{cls.PATH_SEGMENT_WIDTH}d}"
+
+    @property
+    def ancestor_ids(self):
+        """Return the ids of every ancestor, root first."""
+        width = self.PATH_SEGMENT_WIDTH
+        return [
+            int(self.path[start : start + width])
+            for start in range(0, len(self.path) - width, width)
+        ]
+
+    def subtree(self, max_depth=None, include_self=True):
+        """
+        Return this comment's subtree ordered as a thread.
+
+        ``max_depth`` limits how many levels below this comment are included.
+        """
+        queryset = Comment.objects.filter(
+            feedback_id=self.feedback_id,
+            path__gte=self.path if include_self else self.path + "0",
+            path__lt=self.path + "~",
+        )
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=self.depth + max_depth)
+        return queryset.order_by("path")
+
+    def save(self, *args, **kwargs):
+        """Assign the materialized path and bump ancestor reply counts on insert."""
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            parent_path = ""
+            if self.parent_id:
+                parent = Comment.objects.only("path", "depth").get(pk=self.parent_id)
+                parent_path = parent.path
+                self.depth = parent.depth + 1
+            super().save(*args, **kwargs)
+
+            self.path = parent_path + self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if self.parent_id:
+                Comment.objects.filter(pk__in=self.ancestor_ids).update(
+                    reply_count=F("reply_count") + 1
+                )
+
     class Meta:
         ordering = ["created_at"]
         verbose_name = _("Comment")
         verbose_name_plural = _("Comments")
+        indexes = [
+            models.Index(fields=["feedback", "path"], name="comment_thread_path_idx"),
+            models.Index(
+                fields=["feedback", "created_at", "id"],
+                name="comment_feedback_created_idx",
+            ),
+        ]
+
+
+class BoardStats(models.Model):
+    """
+    Denormalized feedback and vote totals for a board.
+
+    Writes to feedback on the board adjust the totals in place (see
+    ``signals.py``), so neither readers nor writers aggregate. ``refresh``
+    recounts a board, to repair totals changed around the signals.
+    """
+
+    STATUS_TOTALS = {
+        Feedback.Status.OPEN: "open_total",
+        Feedback.Status.IN_PROGRESS: "in_progress_total",
+        Feedback.Status.COMPLETED: "completed_total",
+    }
+
+    board = models.OneToOneField(
+        Board, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    feedback_total = models.PositiveIntegerField(default=0)
+    open_total = models.PositiveIntegerField(default=0)
+    in_progress_total = models.PositiveIntegerField(default=0)
+    completed_total = models.PositiveIntegerField(default=0)
+    vote_total = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.board_id}"
+
+    @classmethod
+    def adjust(cls, board_id, statuses=(), votes=0):
+        """
+        Apply changes to one board's totals with a single ``UPDATE``.
+
+        ``statuses`` maps feedback statuses to the change in the number of
+        items in them; ``votes`` is the change in votes.
+        """
+        deltas = Counter({"vote_total": votes})
+        for status, delta in dict(statuses).items():
+            deltas["feedback_total"] += delta
+            if status in cls.STATUS_TOTALS:
+                deltas[cls.STATUS_TOTALS[status]] += delta
+        changes = {
+            column: Greatest(F(column) + delta, Value(0))
+            for column, delta in deltas.items()
+            if delta
+        }
+        if changes:
+            cls.objects.filter(board_id=board_id).update(
+                updated_at=timezone.now(), **changes
+            )
+
+    @classmethod
+    def refresh(cls, board_id):
+        """Recompute the totals of one board from its feedback and votes."""
+        totals = Feedback.objects.filter(board_id=board_id).aggregate(
+            feedback_total=models.Count("pk"),
+            open_total=models.Count("pk", filter=models.Q(status=Feedback.Status.OPEN)),
+            in_progress_total=models.Count(
+                "pk", filter=models.Q(status=Feedback.Status.IN_PROGRESS)
+            ),
+            completed_total=models.Count(
+                "pk", filter=models.Q(status=Feedback.Status.COMPLETED)
+            ),
+        )
+        totals["vote_total"] = Feedback.upvotes.through.objects.filter(
+            feedback__board_id=board_id
+        ).count()
+        totals["updated_at"] = timezone.now()
+        # Update in place so a refresh during a cascading board delete never
+        # inserts a row the deletion has already collected.
+        if not cls.objects.filter(board_id=board_id).update(**totals):
+            if Board.objects.filter(pk=board_id).exists():
+                cls.objects.update_or_create(board_id=board_id, defaults=totals)
+
+    class Meta:
+        verbose_name = _("Board statistics")
+        verbose_name_plural = _("Board statistics")
+
+
+class FeedbackSimilarityKey(models.Model):
+    """
+    One locality-sensitive hashing band of a feedback item's MinHash signature.
+
+    Feedback sharing a key is a near-duplicate candidate; see ``similarity.py``.
+    """
+
+    feedback = models.ForeignKey(
+        Feedback, related_name="similarity_keys", on_delete=models.CASCADE
+    )
+    key = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.key} for {self.feedback_id}"
+
+    class Meta:
+        verbose_name = _("Feedback similarity key")
+        verbose_name_plural = _("Feedback similarity keys")
+        indexes = [
+            # Covers the candidate lookup, which never touches the table rows
+            models.Index(fields=["key", "feedback"], name="similarity_key_idx"),
+        ]
+
+
+class FeedbackTransition(models.Model):
+    """
+    One change of a feedback item's status or priority.
+
+    Rows are only ever inserted, in the transaction of the change (see
+    ``history.py``). ``board`` is copied from the feedback so per-board and
+    per-period scans never join the feedback table.
+    """
+
+    class Field(models.TextChoices):
+        STATUS = "status", _("Status")
+        PRIORITY = "priority", _("Priority")
+
+    feedback = models.ForeignKey(
+        Feedback,
+        related_name="transitions",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    board = models.ForeignKey(
+        Board, related_name="+", on_delete=models.CASCADE, db_index=False
+    )
+    field = models.CharField(max_length=10, choices=Field.choices)
+    from_value = models.CharField(max_length=20)
+    to_value = models.CharField(max_length=20)
+    changed_by = models.ForeignKey(
+        User,
+        related_name="+",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        db_index=False,
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+    # Seconds from the feedback's creation to this change; lets analytics
+    # compute durations without reading or parsing feedback timestamps.
+    age_seconds = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.feedback_id} {self.field}: {self.from_value} -> {self.to_value}"
+
+    class Meta:
+        ordering = ["changed_at", "id"]
+        verbose_name = _("Feedback transition")
+        verbose_name_plural = _("Feedback transitions")
+        # The composite indexes lead with each foreign key, so the plain
+        # foreign key indexes would only add write cost.
+        indexes = [
+            models.Index(
+                fields=["feedback", "changed_at"], name="transition_feedback_idx"
+            ),
+            models.Index(fields=["board", "changed_at"], name="transition_board_idx"),
+            # Analytics scan the changes into one state over a period
+            models.Index(
+                fields=["field", "to_value", "changed_at"],
+                name="transition_period_idx",
+            ),
+        ]
+
+
+class FeedbackCycle(models.Model):
+    """
+    Where one feedback item stands in the workflow, in seconds since creation.
+
+    One row per item, kept current in the transaction of each change (see
+    ``history.py``), so cycle time and throughput analytics read one
+    pre-aggregated row per item instead of grouping its transitions and
+    comments. ``created_at`` and ``board`` are copied from the feedback; the
+    indexes cover the analytics queries, which never read the table itself.
+    """
+
+    feedback = models.OneToOneField(
+        Feedback, related_name="cycle", on_delete=models.CASCADE, primary_key=True
+    )
+    board = models.ForeignKey(
+        Board, related_name="+", on_delete=models.CASCADE, db_index=False
+    )
+    created_at = models.DateTimeField()
+    # First comment by someone other than the author
+    first_response_seconds = models.FloatField(null=True, blank=True)
+    # First move to in progress
+    started_seconds = models.FloatField(null=True, blank=True)
+    # Latest completion
+    completed_seconds = models.FloatField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Cycle of {self.feedback_id}"
+
+    class Meta:
+        verbose_name = _("Feedback cycle")
+        verbose_name_plural = _("Feedback cycles")
+        indexes = [
+            models.Index(
+                fields=["created_at", "board", "first_response_seconds"],
+                name="cycle_created_idx",
+            ),
+            models.Index(
+                fields=[
+                    "completed_at",
+                    "board",
+                    "started_seconds",
+                    "completed_seconds",
+                    # Not the rowid on SQLite, so not in the index by default
+                    "feedback",
+                ],
+                name="cycle_completed_idx",
+            ),
+        ]
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by ``manage.py run_worker``.
+
+    Jobs are claimed by flipping them from queued to running; handlers are
+    registered by name in ``tasks.py`` (see ``jobs.py``).
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("Queued")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    name = models.CharField(max_length=100, help_text=_("Registered task name"))
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    dedupe_key = models.CharField(
+        max_length=200,
+        blank=True,
+        default="",
+        help_text=_("A queued job with the same key makes new ones redundant"),
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(
+        default=timezone.now, help_text=_("Earliest time the job may run")
+    )
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        indexes = [
+            # Claiming scans queued jobs in run_at order
+            models.Index(fields=["status", "run_at", "id"], name="job_claim_idx"),
+            models.Index(
+                fields=["dedupe_key", "status"],
+                name="job_dedupe_idx",
+                condition=~models.Q(dedupe_key=""),
+            ),
+        ]
+
+
+def generate_webhook_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """An internal tool that receives feedback events (see ``webhooks.py``)."""
+
+    name = models.CharField(max_length=100)
+    url = models.URLField(help_text=_("Events are POSTed here in JSON batches"))
+    secret = models.CharField(
+        max_length=128,
+        default=generate_webhook_secret,
+        help_text=_("Key for the HMAC-SHA256 request signature"),
+    )
+    events = models.JSONField(
+        default=list,
+        blank=True,
+        help_text=_("Event types to send, e.g. feedback.created; empty for all"),
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    def wants(self, event_type):
+        """Whether this endpoint subscribes to ``event_type``."""
+        return not self.events or event_type in self.events
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = _("Webhook endpoint")
+        verbose_name_plural = _("Webhook endpoints")
+
+
+class WebhookEvent(models.Model):
+    """
+    An outbox record of something that happened to feedback.
+
+    Written in the same transaction as the change itself, so an event is
+    recorded if and only if the change commits.
+    """
+
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk}"
+
+    class Meta:
+        verbose_name = _("Webhook event")
+        verbose_name_plural = _("Webhook events")
+
+
+class WebhookDelivery(models.Model):
+    """Delivery state of one event to one endpoint."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        DELIVERED = "delivered", _("Delivered")
+        FAILED = "failed", _("Failed")
+
+    endpoint = models.ForeignKey(
+        WebhookEndpoint, related_name="deliveries", on_delete=models.CASCADE
+    )
+    event = models.ForeignKey(
+        WebhookEvent, related_name="deliveries", on_delete=models.CASCADE
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event} to {self.endpoint} ({self.status})"
+
+    class Meta:
+        verbose_name = _("Webhook delivery")
+        verbose_name_plural = _("Webhook deliveries")
+        indexes = [
+            # Each endpoint's due batch is one range scan in event order
+            models.Index(
+                fields=["endpoint", "status", "next_attempt_at", "id"],
+                name="webhook_delivery_due_idx",
+            ),
+        ]
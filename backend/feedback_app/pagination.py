@@ -0,0 +1,73 @@
+"""
+Feedback Management System Pagination
+
+This module contains the pagination classes used by list endpoints that
+can grow without bound.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class CommentThreadPagination(CursorPagination):
+    """
+    Keyset pagination over a comment subtree in thread order.
+
+    The cursor is the materialized ``path``, so every page is a range scan on
+    the ``(feedback, path)`` index regardless of how deep into the thread it is.
+    """
+
+    ordering = "path"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class NestedCursorPagination(CursorPagination):
+    """
+    Cursor pagination for sub-routes of a detail object.
+
+    The parent viewset's OrderingFilter applies to its own list, not to the
+    nested collection, so the ordering declared here is always used.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        if isinstance(self.ordering, str):
+            return (self.ordering,)
+        return tuple(self.ordering)
+
+
+class FeedbackCommentPagination(NestedCursorPagination):
+    """
+    Keyset pagination over the comments of one feedback item, oldest first.
+
+    Pages are range scans on the ``(feedback, created_at, id)`` index; ``id``
+    breaks ties between comments created in the same instant.
+    """
+
+    ordering = ("created_at", "id")
+
+
+class BoardMemberPagination(NestedCursorPagination):
+    """Keyset pagination over the members of a board, by user id."""
+
+    ordering = "id"
+    page_size = 100
+    max_page_size = 500
+
+
+class UserDirectoryPagination(CursorPagination):
+    """
+    Keyset pagination over the user directory, alphabetical by username.
+
+    Pages walk the unique ``username`` index, so the 10,000th page of a large
+    directory costs the same as the first and no total count is computed.
+    """
+
+    ordering = "username"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
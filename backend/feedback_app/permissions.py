@@ -9,6 +9,11 @@ from rest_framework import permissions
 from .models import User
 
 
+def is_board_member(user, board):
+    """Check membership with an EXISTS query instead of loading every member."""
+    return user.is_authenticated and board.members.filter(pk=user.pk).exists()
+
+
 class BoardPermission(permissions.BasePermission):
     """
     Custom permission for Board operations.
@@ -25,7 +30,7 @@ class BoardPermission(permissions.BasePermission):
             return False
 
         # Safe methods (GET, HEAD, OPTIONS) are allowed for authenticated users
-        if view.action in ["list", "retrieve"]:
+        if view.action in ["list", "retrieve", "members"]:
             return True
 
         # Only admins and moderators can create/update/delete boards
@@ -36,9 +41,9 @@ class BoardPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         """Check object-level permissions."""
-        if view.action == "retrieve":
+        if view.action in ["retrieve", "members"]:
             # Users can view public boards or boards they're members of
-            return obj.is_public or request.user in obj.members.all()
+            return obj.is_public or is_board_member(request.user, obj)
 
         if view.action in ["update", "partial_update"]:
             return request.user.role in [User.Role.ADMIN, User.Role.MODERATOR]
@@ -58,13 +63,27 @@ class FeedbackPermission(permissions.BasePermission):
     - List/Retrieve: Public boards or board members
     - Create: Board members only
     - Update/Delete: Author, Admin, or Moderator
+    - Bulk update: Authenticated users, for the items they could update
     - Vote: Authenticated users with board access
     """
 
     def has_permission(self, request, view):
         """Check if user has permission to perform the action."""
         # Analytics endpoints are available to all authenticated users
-        if view.action in ["list", "retrieve", "counts", "top_voted", "trends"]:
+        if view.action in [
+            "list",
+            "retrieve",
+            "comments",
+            "similar",
+            "counts",
+            "top_voted",
+            "trends",
+            "dashboard",
+            "cycle_times",
+            "throughput",
+            "tag_distribution",
+            "tag_co_occurrence",
+        ]:
             return True
 
         if view.action == "create":
@@ -73,18 +92,19 @@ class FeedbackPermission(permissions.BasePermission):
         if view.action in ["update", "partial_update", "destroy", "vote"]:
             return request.user.is_authenticated
 
+        if view.action == "bulk_update":
+            # Items the user may not edit are skipped by the view
+            return request.user.is_authenticated
+
         return False
 
     def has_object_permission(self, request, view, obj):
         """Check object-level permissions."""
-        if view.action == "retrieve":
+        if view.action in ["retrieve", "comments"]:
             # Can view if board is public or user is a member
             if obj.board.is_public:
                 return True
-            return (
-                request.user.is_authenticated
-                and request.user in obj.board.members.all()
-            )
+            return is_board_member(request.user, obj.board)
 
         if view.action in ["update", "partial_update", "destroy"]:
             # Authors, admins, and moderators can modify feedback
@@ -97,10 +117,7 @@ class FeedbackPermission(permissions.BasePermission):
             # Can vote if user has access to the feedback
             if obj.board.is_public:
                 return request.user.is_authenticated
-            return (
-                request.user.is_authenticated
-                and request.user in obj.board.members.all()
-            )
+            return is_board_member(request.user, obj.board)
 
         return False
 
@@ -117,7 +134,7 @@ class CommentPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         """Check if user has permission to perform the action."""
-        if view.action in ["list", "retrieve"]:
+        if view.action in ["list", "retrieve", "thread"]:
             return True
 
         if view.action == "create":
@@ -130,14 +147,11 @@ class CommentPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         """Check object-level permissions."""
-        if view.action == "retrieve":
+        if view.action in ["retrieve", "thread"]:
             # Can view if board is public or user is a member
             if obj.feedback.board.is_public:
                 return True
-            return (
-                request.user.is_authenticated
-                and request.user in obj.feedback.board.members.all()
-            )
+            return is_board_member(request.user, obj.feedback.board)
 
         if view.action in ["update", "partial_update", "destroy"]:
             # Authors, admins, and moderators can modify comments
@@ -161,6 +175,21 @@ class IsAdminOrModerator(permissions.BasePermission):
         ]
 
 
+class HasMetricsAccess(permissions.BasePermission):
+    """
+    Permission for the metrics endpoints: scrapers holding the metrics token,
+    or admin and moderator users.
+    """
+
+    def has_permission(self, request, view):
+        if request.auth == "metrics":
+            return True
+        return request.user.is_authenticated and request.user.role in [
+            User.Role.ADMIN,
+            User.Role.MODERATOR,
+        ]
+
+
 class IsBoardMember(permissions.BasePermission):
     """
     Custom permission to check if user is a member of the object's board.
@@ -174,7 +203,7 @@ class IsBoardMember(permissions.BasePermission):
             return request.user.is_authenticated
 
         # Private boards require membership
-        return request.user.is_authenticated and request.user in obj.board.members.all()
+        return is_board_member(request.user, obj.board)
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
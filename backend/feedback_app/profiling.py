@@ -0,0 +1,163 @@
+"""
+Feedback Management System Request Profiling
+
+This module contains helpers for on-demand profiling of single requests:
+signed profiling tokens, and conversion of cProfile statistics into a
+call-tree report that can be returned inline or stored on disk.
+"""
+
+import json
+import os
+import pstats
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+PROFILE_TOKEN_SALT = "feedback_app.profiling"
+
+DEFAULT_REQUEST_PROFILING = {
+    "ENABLED": True,
+    "TOKEN_MAX_AGE": 3600,
+    "REPORT_DIR": None,
+    "SQL_LIMIT": 200,
+    "TREE_MIN_PERCENT": 1.0,
+    "TREE_MAX_DEPTH": 30,
+    "TOP_FUNCTIONS": 30,
+}
+
+
+def get_request_profiling_setting(name):
+    """Read a REQUEST_PROFILING option, falling back to the defaults."""
+    return getattr(settings, "REQUEST_PROFILING", {}).get(
+        name, DEFAULT_REQUEST_PROFILING[name]
+    )
+
+
+def make_profile_token(user):
+    """Return a signed token that lets ``user`` profile their own requests."""
+    return signing.dumps({"uid": user.pk}, salt=PROFILE_TOKEN_SALT)
+
+
+def read_profile_token(token):
+    """Return the user id a profiling token was issued for, or None."""
+    try:
+        payload = signing.loads(
+            token,
+            salt=PROFILE_TOKEN_SALT,
+            max_age=get_request_profiling_setting("TOKEN_MAX_AGE"),
+        )
+    except signing.BadSignature:
+        return None
+    return payload.get("uid")
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{filename}:{line}({name})"
+
+
+def build_call_tree(stats, min_percent, max_depth):
+    """
+    Rebuild a call tree from cProfile's caller/callee statistics.
+
+    Children are attributed the cumulative time recorded for that specific
+    caller, and branches below ``min_percent`` of the total are pruned.
+    """
+    raw = stats.stats
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, caller_stats in callers.items():
+            callees[caller].append((func, caller_stats[1], caller_stats[3]))
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    total = sum(raw[func][3] for func in roots) or stats.total_tt or 1.0
+    threshold = total * min_percent / 100
+
+    def node(func, calls, cumulative, depth, path):
+        children = []
+        if depth < max_depth:
+            for child, child_calls, child_cumulative in sorted(
+                callees.get(func, ()), key=lambda item: item[2], reverse=True
+            ):
+                if child_cumulative < threshold or child in path:
+                    continue
+                children.append(
+                    node(
+                        child,
+                        child_calls,
+                        child_cumulative,
+                        depth + 1,
+                        path | {child},
+                    )
+                )
+        return {
+            "function": _label(func),
+            "calls": calls,
+            "cumulative_ms": round(cumulative * 1000, 3),
+            "self_ms": round(raw[func][2] * 1000, 3),
+            "children": children,
+        }
+
+    return [
+        node(func, raw[func][1], raw[func][3], 0, {func})
+        for func in sorted(roots, key=lambda f: raw[f][3], reverse=True)
+        if raw[func][3] >= threshold
+    ]
+
+
+def top_functions(stats, sort_key, limit):
+    """Return the most expensive functions by ``tottime`` or ``cumtime``."""
+    index = 2 if sort_key == "tottime" else 3
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)
+    return [
+        {
+            "function": _label(func),
+            "calls": entry[1],
+            "self_ms": round(entry[2] * 1000, 3),
+            "cumulative_ms": round(entry[3] * 1000, 3),
+        }
+        for func, entry in ranked[:limit]
+    ]
+
+
+def build_report(request, response, profiler, queries, duration_ms):
+    """Assemble the JSON-serializable report for a profiled request."""
+    stats = pstats.Stats(profiler)
+    limit = get_request_profiling_setting("TOP_FUNCTIONS")
+    return {
+        "id": uuid.uuid4().hex,
+        "created_at": timezone.now().isoformat(),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status_code": response.status_code,
+        "duration_ms": round(duration_ms, 3),
+        "sql": {
+            "count": len(queries),
+            "total_ms": round(sum(query["ms"] for query in queries), 3),
+            "queries": queries[: get_request_profiling_setting("SQL_LIMIT")],
+        },
+        "top_cumulative": top_functions(stats, "cumtime", limit),
+        "top_self": top_functions(stats, "tottime", limit),
+        "call_tree": build_call_tree(
+            stats,
+            get_request_profiling_setting("TREE_MIN_PERCENT"),
+            get_request_profiling_setting("TREE_MAX_DEPTH"),
+        ),
+    }
+
+
+def store_report(report):
+    """Write a report to REQUEST_PROFILING["REPORT_DIR"] and return its path."""
+    report_dir = get_request_profiling_setting("REPORT_DIR")
+    if not report_dir:
+        return None
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"{report['id']}.json")
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2)
+    return path
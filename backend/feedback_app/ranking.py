@@ -0,0 +1,120 @@
+"""
+Feedback Management System Hot Ranking
+
+This module maintains ``Feedback.hot_score``, an exponentially decayed vote
+count: every vote adds 1, and the whole score halves every
+``HOT_RANKING["HALF_LIFE_HOURS"]``. New feedback starts at 1, so fresh items
+surface before they have votes and fall back as they age.
+
+Each row remembers the Unix time its score was last decayed to
+(``hot_decayed_at``). Votes decay the row to now and add to it in one
+``UPDATE``; ``manage.py decay_hot_scores`` periodically brings every other row
+to the same reference time with chunked set-based updates, so ordering by the
+indexed ``hot_score`` column stays accurate between votes.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.db.models import Count, F, Value
+from django.db.models.functions import Exp, Greatest
+
+from .models import Feedback
+
+DEFAULT_HOT_RANKING = {
+    "HALF_LIFE_HOURS": 24.0,
+    "BATCH_SIZE": 5000,
+    # Scores below this are rounded to 0 and skipped by later decay passes.
+    "MIN_SCORE": 0.001,
+}
+
+
+def get_hot_ranking_setting(name):
+    """Read a HOT_RANKING option, falling back to the defaults."""
+    return getattr(settings, "HOT_RANKING", {}).get(name, DEFAULT_HOT_RANKING[name])
+
+
+def decay_rate():
+    """Return the decay constant per second."""
+    return math.log(2) / (get_hot_ranking_setting("HALF_LIFE_HOURS") * 3600)
+
+
+def decayed_score(now):
+    """SQL expression for ``hot_score`` decayed from ``hot_decayed_at`` to ``now``."""
+    return F("hot_score") * Exp((F("hot_decayed_at") - Value(now)) * decay_rate())
+
+
+def record_votes(feedback_ids, delta):
+    """Add ``delta`` votes to each feedback item, updating both scores."""
+    now = time.time()
+    Feedback.objects.filter(pk__in=feedback_ids).update(
+        vote_count=Greatest(F("vote_count") + delta, Value(0)),
+        hot_score=Greatest(decayed_score(now) + delta, Value(0.0)),
+        hot_decayed_at=now,
+    )
+
+
+def decay_all(now=None, batch_size=None):
+    """
+    Decay every non-zero score to ``now`` and return the number of rows touched.
+
+    Rows are processed in primary key ranges so no statement locks more than
+    ``batch_size`` rows at once.
+    """
+    now = time.time() if now is None else now
+    batch_size = batch_size or get_hot_ranking_setting("BATCH_SIZE")
+    min_score = get_hot_ranking_setting("MIN_SCORE")
+    scored = Feedback.objects.filter(hot_score__gt=0)
+    last_pk = scored.order_by("-pk").values_list("pk", flat=True).first()
+    start = scored.order_by("pk").values_list("pk", flat=True).first()
+    updated = 0
+    while start is not None and start <= last_pk:
+        chunk = scored.filter(pk__gte=start, pk__lt=start + batch_size)
+        updated += chunk.update(hot_score=decayed_score(now), hot_decayed_at=now)
+        chunk.filter(hot_score__lt=min_score).update(hot_score=0.0)
+        start += batch_size
+    return updated
+
+
+def initial_score(votes, created_at, now):
+    """Score of an item with ``votes`` votes, treating them as cast at creation."""
+    age = max(now - created_at.timestamp(), 0)
+    return (votes + 1) * math.exp(-decay_rate() * age)
+
+
+def rebuild_scores(batch_size=None):
+    """
+    Recompute vote counts and approximate hot scores from the upvote table.
+
+    Individual vote times are not stored, so votes are treated as cast when
+    the feedback was created. Used after bulk imports that bypass signals.
+    """
+    batch_size = batch_size or get_hot_ranking_setting("BATCH_SIZE")
+    now = time.time()
+    min_score = get_hot_ranking_setting("MIN_SCORE")
+    last_pk = 0
+    while True:
+        rows = list(
+            Feedback.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .annotate(num_votes=Count("upvotes"))
+            .values_list("pk", "created_at", "num_votes")[:batch_size]
+        )
+        if not rows:
+            return
+        updates = []
+        for pk, created_at, votes in rows:
+            score = initial_score(votes, created_at, now)
+            updates.append(
+                Feedback(
+                    pk=pk,
+                    vote_count=votes,
+                    hot_score=score if score >= min_score else 0.0,
+                    hot_decayed_at=now,
+                )
+            )
+        Feedback.objects.bulk_update(
+            updates, ["vote_count", "hot_score", "hot_decayed_at"]
+        )
+        last_pk = rows[-1][0]
@@ -2,8 +2,11 @@ from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.db.models.functions import Lower
 
-from .models import User, Board, Tag, Feedback, Comment
+from .batch import METHODS, get_batch_setting
+from .models import User, Board, BoardStats, Tag, Feedback, Comment
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -72,24 +75,111 @@ class UserSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class UserListSerializer(serializers.ModelSerializer):
+    """Read-only projection of users for the admin directory"""
+
+    full_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = (
+            "id",
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "full_name",
+            "role",
+            "is_active",
+            "date_joined",
+        )
+        read_only_fields = fields
+
+    def get_full_name(self, obj):
+        """Get user's full name or username"""
+        if obj.first_name and obj.last_name:
+            return f"{obj.first_name} {obj.last_name}"
+        return obj.username
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Public user fields for member listings"""
+
+    full_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ("id", "username", "first_name", "last_name", "full_name")
+
+    def get_full_name(self, obj):
+        """Get user's full name or username"""
+        if obj.first_name and obj.last_name:
+            return f"{obj.first_name} {obj.last_name}"
+        return obj.username
+
+
+class BoardStatsSerializer(serializers.ModelSerializer):
+    """Cached board totals"""
+
+    class Meta:
+        model = BoardStats
+        exclude = ("board",)
+
+
 class BoardSerializer(serializers.ModelSerializer):
-    """Simple Board serializer"""
+    """
+    Simple Board serializer
+
+    Members are write-only here; read them from the paginated
+    ``/boards/{id}/members/`` route.
+    """
 
     member_count = serializers.SerializerMethodField()
     feedback_count = serializers.SerializerMethodField()
+    is_member = serializers.SerializerMethodField()
+    stats = serializers.SerializerMethodField()
 
     class Meta:
         model = Board
-        fields = "__all__"
+        fields = (
+            "id",
+            "name",
+            "description",
+            "is_public",
+            "members",
+            "created_at",
+            "updated_at",
+            "member_count",
+            "feedback_count",
+            "is_member",
+            "stats",
+        )
         read_only_fields = ("created_at", "updated_at")
+        extra_kwargs = {"members": {"write_only": True, "required": False}}
 
     def get_member_count(self, obj):
         """Get number of board members"""
-        return obj.members.count()
+        return obj.member_count
 
     def get_feedback_count(self, obj):
         """Get number of feedback items"""
-        return obj.feedbacks.count()
+        return obj.feedback_count
+
+    def get_is_member(self, obj):
+        """Whether the current user is a member, preferring the annotation"""
+        if hasattr(obj, "is_member"):
+            return obj.is_member
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.members.filter(pk=request.user.pk).exists()
+
+    def get_stats(self, obj):
+        """Get cached totals, if they have been computed"""
+        try:
+            return BoardStatsSerializer(obj.stats).data
+        except BoardStats.DoesNotExist:
+            return None
 
     def validate_name(self, value):
         """Validate board name is not empty"""
@@ -98,6 +188,130 @@ class BoardSerializer(serializers.ModelSerializer):
         return value.strip()
 
 
+class BoardSummarySerializer(serializers.ModelSerializer):
+    """Board fields embedded in expanded feedback"""
+
+    class Meta:
+        model = Board
+        fields = ("id", "name", "description", "is_public")
+
+
+class FeedbackBulkUpdateSerializer(serializers.Serializer):
+    """A status and/or priority to set on many feedback items"""
+
+    MAX_ITEMS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=MAX_ITEMS
+    )
+    status = serializers.ChoiceField(choices=Feedback.Status.choices, required=False)
+    priority = serializers.ChoiceField(
+        choices=Feedback.Priority.choices, required=False
+    )
+
+    def validate(self, attrs):
+        """Require at least one field to change"""
+        if "status" not in attrs and "priority" not in attrs:
+            raise serializers.ValidationError("Provide status or priority.")
+        return attrs
+
+    @property
+    def changes(self):
+        return {
+            field: self.validated_data[field]
+            for field in ("status", "priority")
+            if field in self.validated_data
+        }
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    """One API call in a batch"""
+
+    method = serializers.ChoiceField(choices=METHODS, default="GET")
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """API calls to run together, optionally in parallel"""
+
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = get_batch_setting("MAX_REQUESTS")
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f"A batch holds at most {limit} requests."
+            )
+        return value
+
+
+class BoardMembersSerializer(serializers.Serializer):
+    """Users to add to or remove from a board, by username, id or email"""
+
+    MAX_USERS = 10000
+
+    usernames = serializers.ListField(
+        child=serializers.CharField(), required=False, max_length=MAX_USERS
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=MAX_USERS
+    )
+    emails = serializers.ListField(
+        child=serializers.EmailField(), required=False, max_length=MAX_USERS
+    )
+
+    def validate(self, attrs):
+        """Require at least one identifier, and cap the total"""
+        total = sum(len(attrs.get(key, ())) for key in ("usernames", "ids", "emails"))
+        if not total:
+            raise serializers.ValidationError(
+                "Provide at least one of usernames, ids or emails."
+            )
+        if total > self.MAX_USERS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_USERS} users can be changed per request."
+            )
+        return attrs
+
+    def resolve(self):
+        """
+        Look every identifier up in one query.
+
+        Returns the matched users as ``{id: username}`` and the identifiers
+        that matched nobody, in request order.
+        """
+        usernames = set(self.validated_data.get("usernames", ()))
+        ids = set(self.validated_data.get("ids", ()))
+        emails = {email.lower() for email in self.validated_data.get("emails", ())}
+
+        rows = (
+            User.objects.alias(email_lower=Lower("email"))
+            .filter(
+                Q(username__in=usernames) | Q(pk__in=ids) | Q(email_lower__in=emails)
+            )
+            .values_list("pk", "username", "email")
+        )
+
+        users = {}
+        found = set()
+        for pk, username, email in rows:
+            users[pk] = username
+            found.update(
+                [("usernames", username), ("ids", pk), ("emails", email.lower())]
+            )
+
+        not_found = [
+            value
+            for key in ("usernames", "ids", "emails")
+            for value in self.validated_data.get(key, ())
+            if (key, value.lower() if key == "emails" else value) not in found
+        ]
+        return users, not_found
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Simple Tag serializer"""
 
@@ -119,6 +333,7 @@ class FeedbackSerializer(serializers.ModelSerializer):
     board_name = serializers.SerializerMethodField()
     upvote_count = serializers.SerializerMethodField()
     comment_count = serializers.SerializerMethodField()
+    has_upvoted = serializers.SerializerMethodField()
 
     class Meta:
         model = Feedback
@@ -136,13 +351,45 @@ class FeedbackSerializer(serializers.ModelSerializer):
         return obj.board.name
 
     def get_upvote_count(self, obj):
-        """Get number of upvotes"""
-        return obj.upvotes.count()
+        """Get number of upvotes from the denormalized counter"""
+        return obj.vote_count
 
     def get_comment_count(self, obj):
-        """Get number of comments"""
+        """Get number of comments, preferring the queryset annotation"""
+        if hasattr(obj, "num_comments"):
+            return obj.num_comments
         return obj.comments.count()
 
+    def get_has_upvoted(self, obj):
+        """Whether the current user upvoted, preferring the queryset annotation"""
+        if hasattr(obj, "has_upvoted"):
+            return obj.has_upvoted
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.upvotes.filter(pk=request.user.pk).exists()
+
+    def get_fields(self):
+        """Drop bookkeeping fields, and the upvoter ids when the view asks"""
+        fields = super().get_fields()
+        # Bookkeeping for the hot score, meaningless to clients
+        fields.pop("hot_decayed_at", None)
+        if not self.context.get("include_upvotes", True):
+            fields.pop("upvotes", None)
+        return fields
+
+    def to_representation(self, instance):
+        """Replace related ids with objects for the requested expansions"""
+        data = super().to_representation(instance)
+        expand = self.context.get("expand", ())
+        if "tags" in expand:
+            data["tags"] = TagSerializer(instance.tags.all(), many=True).data
+        if "board" in expand:
+            data["board"] = BoardSummarySerializer(instance.board).data
+        if "my_vote" in expand:
+            data["my_vote"] = data["has_upvoted"]
+        return data
+
     def validate_title(self, value):
         """Validate title is not empty"""
         if not value or not value.strip():
@@ -202,3 +449,28 @@ class CommentSerializer(serializers.ModelSerializer):
         if not value or not value.strip():
             raise serializers.ValidationError("Comment content cannot be empty.")
         return value.strip()
+
+    def validate(self, attrs):
+        """Validate comments stay within their thread and the depth limit"""
+        parent = attrs.get("parent")
+        if self.instance is not None:
+            if "parent" in attrs and parent != self.instance.parent:
+                raise serializers.ValidationError(
+                    {"parent": "Replies cannot be moved to another comment."}
+                )
+            if "feedback" in attrs and attrs["feedback"] != self.instance.feedback:
+                raise serializers.ValidationError(
+                    {"feedback": "Comments cannot be moved to another feedback."}
+                )
+            return attrs
+
+        if parent is not None:
+            if parent.feedback_id != attrs["feedback"].id:
+                raise serializers.ValidationError(
+                    {"parent": "Parent comment belongs to different feedback."}
+                )
+            if parent.depth + 1 >= Comment.MAX_DEPTH:
+                raise serializers.ValidationError(
+                    {"parent": "Maximum reply depth reached."}
+                )
+        return attrs
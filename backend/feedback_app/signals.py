@@ -0,0 +1,459 @@
+"""
+Feedback Management System Signals
+
+This module contains the receivers that keep data derived from feedback,
+votes, tags and comments in step with writes to them.
+
+Board statistics, vote counts and hot scores are adjusted in the transaction
+of each write. Status transitions and each item's workflow cycle row are
+recorded there too, feedback events are added to the webhook outbox, and
+deleted comments are taken out of their ancestors' reply counts.
+Duplicate detection keys are queued for the job worker. The in-process tag
+autocomplete index, facts snapshot and tag co-occurrence matrix are patched
+once the write commits.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .autocomplete import tag_index
+from .cooccurrence import tag_co_occurrence
+from .facts import feedback_facts
+from .history import record_transitions
+from .jobs import enqueue
+from .models import Board, BoardStats, Comment, Feedback, FeedbackCycle, Tag
+from .ranking import record_votes
+from .webhooks import record_event
+
+
+@receiver(post_save, sender=Board)
+def create_board_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        BoardStats.objects.get_or_create(board=instance)
+
+
+PREVIOUS_FIELDS = ("board_id", "title", "content", "status", "priority")
+
+
+@receiver(pre_save, sender=Feedback)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    # Moving feedback to another board changes the totals of both boards, and
+    # only text changes need new similarity keys.
+    if instance.pk and not raw:
+        # Instances loaded from the database (or saved before) know their
+        # stored values; only the others need reading them back.
+        loaded = getattr(instance, "_loaded_values", {})
+        if all(field in loaded for field in PREVIOUS_FIELDS):
+            previous = [loaded[field] for field in PREVIOUS_FIELDS]
+        else:
+            previous = (
+                Feedback.objects.filter(pk=instance.pk)
+                .values_list(*PREVIOUS_FIELDS)
+                .first()
+            )
+        if previous is not None:
+            instance._previous_board_id = previous[0]
+            instance._previous_text = tuple(previous[1:3])
+            instance._previous_state = {"status": previous[3], "priority": previous[4]}
+
+
+@receiver(post_save, sender=Feedback)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        BoardStats.adjust(instance.board_id, {instance.status: 1})
+        return
+    previous_board = getattr(instance, "_previous_board_id", None)
+    previous_status = getattr(instance, "_previous_state", {}).get("status")
+    if previous_board is None:
+        return
+    if previous_board != instance.board_id:
+        votes = Feedback.upvotes.through.objects.filter(feedback_id=instance.pk).count()
+        BoardStats.adjust(previous_board, {previous_status: -1}, -votes)
+        BoardStats.adjust(instance.board_id, {instance.status: 1}, votes)
+    elif previous_status != instance.status:
+        BoardStats.adjust(instance.board_id, {previous_status: -1, instance.status: 1})
+
+
+@receiver(post_save, sender=Feedback)
+def remember_saved_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    # The next save of this instance compares against what this one stored;
+    # after a partial save only the database knows.
+    if update_fields is None:
+        instance._loaded_values = {
+            field: getattr(instance, field) for field in PREVIOUS_FIELDS
+        }
+    else:
+        instance.__dict__.pop("_loaded_values", None)
+
+
+@receiver(post_save, sender=Feedback)
+def index_similarity_keys(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    text = (instance.title, instance.content)
+    if created or getattr(instance, "_previous_text", None) != text:
+        enqueue(
+            "index_similarity_keys",
+            {"feedback_id": instance.pk},
+            dedupe_key=f"similarity:{instance.pk}",
+        )
+        instance._previous_text = text
+
+
+@receiver(pre_delete, sender=Feedback)
+def count_deleted_votes(sender, instance, **kwargs):
+    # The votes are deleted with the feedback, before post_delete
+    instance._deleted_votes = Feedback.upvotes.through.objects.filter(
+        feedback_id=instance.pk
+    ).count()
+
+
+@receiver(post_delete, sender=Feedback)
+def update_stats_on_delete(sender, instance, **kwargs):
+    BoardStats.adjust(
+        instance.board_id,
+        {instance.status: -1},
+        -getattr(instance, "_deleted_votes", 0),
+    )
+
+
+@receiver(m2m_changed, sender=Feedback.upvotes.through)
+def update_stats_on_vote(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        # update_vote_scores remembered the cleared votes on pre_clear
+        if reverse:
+            feedback_ids = getattr(instance, "_cleared_feedback_ids", [])
+            delta = -1
+        else:
+            feedback_ids = [instance.pk]
+            delta = -getattr(instance, "_cleared_vote_count", 0)
+    elif action in ("post_add", "post_remove") and pk_set:
+        delta = 1 if action == "post_add" else -1
+        if reverse:
+            # user.upvoted_feedbacks.add(...): one vote on each feedback item
+            feedback_ids = pk_set
+        else:
+            feedback_ids, delta = [instance.pk], delta * len(pk_set)
+    else:
+        return
+    if reverse:
+        boards = Counter(
+            Feedback.objects.filter(pk__in=feedback_ids).values_list(
+                "board_id", flat=True
+            )
+        )
+    else:
+        boards = {instance.board_id: 1}
+    for board_id, count in boards.items():
+        BoardStats.adjust(board_id, votes=delta * count)
+
+
+@receiver(m2m_changed, sender=Feedback.upvotes.through)
+def update_vote_scores(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # Which votes a clear removes is unknown afterwards; remember them
+        if reverse:
+            instance._cleared_feedback_ids = list(
+                instance.upvoted_feedbacks.values_list("pk", flat=True)
+            )
+        else:
+            instance._cleared_vote_count = instance.upvotes.count()
+        return
+    if action == "post_clear":
+        if reverse:
+            record_votes(getattr(instance, "_cleared_feedback_ids", []), -1)
+        else:
+            record_votes([instance.pk], -getattr(instance, "_cleared_vote_count", 0))
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    delta = 1 if action == "post_add" else -1
+    if reverse:
+        # user.upvoted_feedbacks.add(...): one vote on each feedback item
+        record_votes(pk_set, delta)
+    else:
+        record_votes([instance.pk], delta * len(pk_set))
+
+
+def feedback_payload(feedback):
+    return {
+        "id": feedback.pk,
+        "board": feedback.board_id,
+        "author": feedback.author_id,
+        "title": feedback.title,
+        "status": feedback.status,
+        "priority": feedback.priority,
+    }
+
+
+@receiver(post_save, sender=Feedback)
+def record_feedback_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_event("feedback.created", feedback_payload(instance))
+        return
+    previous = getattr(instance, "_previous_state", {})
+    previous_status = previous.get("status", instance.status)
+    if previous_status != instance.status:
+        payload = feedback_payload(instance)
+        payload["previous_status"] = previous_status
+        record_event("feedback.status_changed", payload)
+    else:
+        record_event("feedback.updated", feedback_payload(instance))
+
+
+@receiver(post_save, sender=Feedback)
+def record_status_history(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_state", None)
+    if created or raw or previous is None:
+        return
+    # Views set the acting user before saving
+    record_transitions(instance, previous, getattr(instance, "_changed_by", None))
+
+
+@receiver(post_save, sender=Feedback)
+def update_feedback_cycle(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        FeedbackCycle.objects.create(
+            feedback=instance,
+            board_id=instance.board_id,
+            created_at=instance.created_at,
+        )
+        return
+    previous = getattr(instance, "_previous_board_id", None)
+    if previous is not None and previous != instance.board_id:
+        FeedbackCycle.objects.filter(pk=instance.pk).update(board=instance.board_id)
+
+
+@receiver(post_save, sender=Comment)
+def record_first_response(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    feedback = instance.feedback
+    if instance.author_id == feedback.author_id:
+        return
+    FeedbackCycle.objects.filter(
+        pk=feedback.pk, first_response_seconds__isnull=True
+    ).update(
+        first_response_seconds=(
+            instance.created_at - feedback.created_at
+        ).total_seconds()
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def remove_reply(sender, instance, **kwargs):
+    """
+    Take a deleted comment out of the reply counts of its ancestors.
+
+    A cascade sends this for every comment in the subtree after all of them
+    are gone, so each decrements only the ancestors that remain.
+    """
+    ancestors = instance.ancestor_ids
+    if ancestors:
+        Comment.objects.filter(pk__in=ancestors).update(
+            reply_count=F("reply_count") - 1
+        )
+
+
+def bulk_changed(rows, changes):
+    """
+    Apply the side effects of ``history.bulk_change``, which saves no models.
+
+    ``rows`` holds the previous state of each changed item.
+    """
+    if "status" in changes:
+        statuses = defaultdict(Counter)
+        for row in rows:
+            statuses[row["board_id"]][row["status"]] -= 1
+            statuses[row["board_id"]][changes["status"]] += 1
+        for board_id, deltas in statuses.items():
+            BoardStats.adjust(board_id, deltas)
+    for row in rows:
+        payload = {
+            "id": row["pk"],
+            "board": row["board_id"],
+            "author": row["author_id"],
+            "title": row["title"],
+            "status": changes.get("status", row["status"]),
+            "priority": changes.get("priority", row["priority"]),
+        }
+        if payload["status"] != row["status"]:
+            payload["previous_status"] = row["status"]
+            record_event("feedback.status_changed", payload)
+        else:
+            record_event("feedback.updated", payload)
+    ids = [row["pk"] for row in rows]
+    transaction.on_commit(lambda: [feedback_facts.update(pk, **changes) for pk in ids])
+
+
+@receiver(post_delete, sender=Feedback)
+def record_feedback_deleted(sender, instance, **kwargs):
+    record_event("feedback.deleted", {"id": instance.pk, "board": instance.board_id})
+
+
+@receiver(m2m_changed, sender=Feedback.upvotes.through)
+def record_feedback_voted(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    vote = "added" if action == "post_add" else "removed"
+    if reverse:
+        pairs = [(feedback_id, instance.pk) for feedback_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+    for feedback_id, user_id in pairs:
+        record_event(
+            "feedback.voted",
+            {"feedback": feedback_id, "user": user_id, "action": vote},
+        )
+
+
+# The tag index is process memory, so it only changes once the write commits.
+
+
+@receiver(post_save, sender=Tag)
+def index_new_tag(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: tag_index.add(instance))
+
+
+@receiver(post_delete, sender=Tag)
+def unindex_deleted_tag(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: tag_index.remove(pk))
+
+
+@receiver(m2m_changed, sender=Feedback.tags.through)
+def update_tag_usage(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        # The cleared tags are unknown here; reload on the next lookup
+        transaction.on_commit(tag_index.invalidate)
+        return
+    if action not in ("post_add", "post_remove"):
+        return
+    delta = 1 if action == "post_add" else -1
+    if reverse:
+        # tag.feedbacks.add(...): one tag, len(pk_set) feedback items
+        tag_ids, delta = [instance.pk], delta * len(pk_set)
+    else:
+        tag_ids = list(pk_set)
+    transaction.on_commit(lambda: tag_index.adjust_usage(tag_ids, delta))
+
+
+# So is the facts snapshot.
+
+
+@receiver(post_save, sender=Feedback)
+def update_feedback_facts(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        transaction.on_commit(lambda: feedback_facts.add(instance))
+        return
+    pk = instance.pk
+    values = {
+        "board": instance.board_id,
+        "status": instance.status,
+        "priority": instance.priority,
+    }
+    transaction.on_commit(lambda: feedback_facts.update(pk, **values))
+
+
+@receiver(post_delete, sender=Feedback)
+def remove_feedback_facts(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: feedback_facts.remove(pk))
+
+
+@receiver(post_delete, sender=Tag)
+def remove_tag_facts(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: feedback_facts.remove_tag(pk))
+
+
+@receiver(m2m_changed, sender=Feedback.upvotes.through)
+def update_vote_facts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        transaction.on_commit(feedback_facts.invalidate)
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    delta = 1 if action == "post_add" else -1
+    if reverse:
+        feedback_ids = list(pk_set)
+    else:
+        feedback_ids, delta = [instance.pk], delta * len(pk_set)
+    transaction.on_commit(lambda: feedback_facts.add_votes(feedback_ids, delta))
+
+
+@receiver(m2m_changed, sender=Feedback.tags.through)
+def update_tag_facts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        transaction.on_commit(feedback_facts.invalidate)
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    if reverse:
+        feedback_ids, tag_ids = list(pk_set), [instance.pk]
+    else:
+        feedback_ids, tag_ids = [instance.pk], list(pk_set)
+    present = action == "post_add"
+    transaction.on_commit(
+        lambda: feedback_facts.set_tags(feedback_ids, tag_ids, present)
+    )
+
+
+# And so is the tag co-occurrence matrix.
+
+
+@receiver(post_save, sender=Feedback)
+def move_tag_co_occurrence(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_board_id", None)
+    if created or raw or previous is None or previous == instance.board_id:
+        return
+    pk, board_id = instance.pk, instance.board_id
+    transaction.on_commit(lambda: tag_co_occurrence.move(pk, board_id))
+
+
+@receiver(post_delete, sender=Feedback)
+def remove_tag_co_occurrence(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: tag_co_occurrence.remove(pk))
+
+
+@receiver(post_delete, sender=Tag)
+def reset_tag_co_occurrence(sender, instance, **kwargs):
+    transaction.on_commit(tag_co_occurrence.invalidate)
+
+
+@receiver(m2m_changed, sender=Feedback.tags.through)
+def update_tag_co_occurrence(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        transaction.on_commit(tag_co_occurrence.invalidate)
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    if reverse:
+        boards = dict(
+            Feedback.objects.filter(pk__in=pk_set).values_list("pk", "board_id")
+        )
+        tag_ids = [instance.pk]
+    else:
+        boards, tag_ids = {instance.pk: instance.board_id}, list(pk_set)
+    present = action == "post_add"
+    transaction.on_commit(lambda: tag_co_occurrence.set_tags(boards, tag_ids, present))
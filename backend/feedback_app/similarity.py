@@ -0,0 +1,157 @@
+"""
+Feedback Management System Duplicate Detection
+
+This module finds feedback that is probably a duplicate of a new submission.
+Title and content are reduced to character trigrams and summarized by a
+MinHash signature, which is cut into bands (locality-sensitive hashing).
+Every band is stored as one ``FeedbackSimilarityKey`` row, so finding
+candidates is a single indexed lookup of a few dozen keys, however large the
+table grows. The lookup only counts keys of feedback the caller may see, so
+the ``MAX_CANDIDATES`` best matches are all visible; they are then re-ranked
+by their exact trigram Jaccard similarity.
+
+Keys are written by the signal receivers in ``signals.py`` whenever the title
+or content of a feedback item changes. ``manage.py rebuild_similarity_index``
+backfills them for rows written without signals.
+"""
+
+import re
+import struct
+from hashlib import blake2b
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+
+from .models import Feedback, FeedbackSimilarityKey
+
+DEFAULT_DUPLICATE_DETECTION = {
+    "THRESHOLD": 0.3,
+    "LIMIT": 5,
+    "MAX_LIMIT": 20,
+    "MAX_CANDIDATES": 100,
+}
+
+# Changing any of these invalidates the stored keys; run
+# ``manage.py rebuild_similarity_index`` afterwards.
+NUM_BANDS = 32
+BAND_SIZE = 3
+MAX_TEXT_LENGTH = 1000
+SHINGLE_SIZE = 3
+
+# Each salted 64-byte BLAKE2b digest yields 16 independent 32-bit hashes, so
+# a shingle costs a handful of C-level hash calls instead of one Python-level
+# permutation per signature slot. Fixed salts keep signatures identical across
+# processes and restarts.
+_SIGNATURE_SIZE = NUM_BANDS * BAND_SIZE
+_SALTS = [
+    index.to_bytes(blake2b.SALT_SIZE, "big")
+    for index in range(-(-_SIGNATURE_SIZE // 16))
+]
+_UNPACK = struct.Struct(f"<{len(_SALTS) * 16}I").unpack
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def get_duplicate_detection_setting(name):
+    """Read a DUPLICATE_DETECTION option, falling back to the defaults."""
+    return getattr(settings, "DUPLICATE_DETECTION", {}).get(
+        name, DEFAULT_DUPLICATE_DETECTION[name]
+    )
+
+
+def shingles(title, content):
+    """Return the set of character trigrams of normalized title and content."""
+    text = _NON_WORD.sub(" ", f"{title} {content}".lower()).strip()
+    text = f" {text[:MAX_TEXT_LENGTH]} "
+    return {
+        text[start : start + SHINGLE_SIZE]
+        for start in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def jaccard(first, second):
+    """Jaccard similarity of two shingle sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def band_keys(shingle_set):
+    """Return the LSH band keys of a shingle set, one per band."""
+    if not shingle_set:
+        return []
+    rows = [
+        _UNPACK(
+            b"".join(blake2b(shingle.encode(), salt=salt).digest() for salt in _SALTS)
+        )
+        for shingle in shingle_set
+    ]
+    # MinHash: the smallest value each hash function takes over the shingles
+    signature = list(map(min, zip(*rows)))
+    keys = []
+    for band in range(NUM_BANDS):
+        values = signature[band * BAND_SIZE : (band + 1) * BAND_SIZE]
+        digest = blake2b(repr((band, values)).encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def index_feedback(feedback):
+    """Replace the stored band keys of one feedback item."""
+    keys = band_keys(shingles(feedback.title, feedback.content))
+    with transaction.atomic():
+        FeedbackSimilarityKey.objects.filter(feedback=feedback).delete()
+        FeedbackSimilarityKey.objects.bulk_create(
+            FeedbackSimilarityKey(feedback=feedback, key=key) for key in set(keys)
+        )
+
+
+def find_similar(queryset, title, content, exclude=None, limit=None):
+    """
+    Return feedback from ``queryset`` that looks like a duplicate.
+
+    ``queryset`` carries the caller's visibility rules; only candidates it
+    contains are returned. Results are dicts ordered by descending ``score``.
+    """
+    limit = limit or get_duplicate_detection_setting("LIMIT")
+    threshold = get_duplicate_detection_setting("THRESHOLD")
+    query = shingles(title, content)
+    keys = band_keys(query)
+    if not keys:
+        return []
+
+    # Invisible near-duplicates must not take up the candidate slots
+    candidates = FeedbackSimilarityKey.objects.filter(
+        Exists(queryset.filter(pk=OuterRef("feedback_id"))), key__in=keys
+    )
+    if exclude is not None:
+        candidates = candidates.exclude(feedback_id=exclude)
+    candidate_ids = list(
+        candidates.values("feedback_id")
+        .annotate(matches=Count("pk"))
+        .order_by("-matches")
+        .values_list("feedback_id", flat=True)[
+            : get_duplicate_detection_setting("MAX_CANDIDATES")
+        ]
+    )
+    if not candidate_ids:
+        return []
+
+    results = []
+    rows = Feedback.objects.filter(pk__in=candidate_ids).values_list(
+        "pk", "title", "content", "status", "board_id"
+    )
+    for pk, row_title, row_content, row_status, board_id in rows:
+        score = jaccard(query, shingles(row_title, row_content))
+        if score >= threshold:
+            results.append(
+                {
+                    "id": pk,
+                    "title": row_title,
+                    "status": row_status,
+                    "board": board_id,
+                    "score": round(score, 3),
+                }
+            )
+    results.sort(key=lambda result: (-result["score"], result["id"]))
+    return results[:limit]
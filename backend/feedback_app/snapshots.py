@@ -0,0 +1,94 @@
+"""
+Feedback Management System In-process Snapshots
+
+This module contains the refresh policy shared by the in-process indexes
+(tag autocomplete, feedback facts, tag co-occurrence): state built from the
+database, kept in memory for a TTL, patched by signal receivers once writes
+commit, and rebuilt when the TTL expires to pick up writes made by other
+worker processes.
+
+Rebuilds are single-flight. When the state expires, one thread rebuilds it
+while the others keep answering from the old state; only threads that find
+no state at all wait for the build.
+"""
+
+import threading
+import time
+
+from .metrics import metrics
+
+
+class TTLSnapshot:
+    """
+    Base class for state built by ``build`` and kept for ``ttl`` seconds.
+
+    Subclasses set ``cache_name`` (the label of the cache lookup metrics) and
+    implement ``build`` and ``ttl``. Incremental updates must hold ``_lock``
+    and leave ``_state`` alone while it is None.
+    """
+
+    cache_name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._state = None
+        self._expires = 0.0
+        self._generation = 0
+
+    def build(self):
+        """Build new state from the database."""
+        raise NotImplementedError
+
+    def ttl(self):
+        """Seconds before the state is rebuilt."""
+        raise NotImplementedError
+
+    def _load(self):
+        state = self._state
+        if state is not None and time.monotonic() < self._expires:
+            metrics.record_cache_lookup(self.cache_name, hit=True)
+            return state
+        if state is None:
+            self._rebuild_lock.acquire()
+        elif not self._rebuild_lock.acquire(blocking=False):
+            # Another thread is rebuilding; keep using the old state
+            metrics.record_cache_lookup(self.cache_name, hit=True)
+            return state
+        try:
+            state = self._state
+            if state is not None and time.monotonic() < self._expires:
+                # Rebuilt while this thread waited for the lock
+                metrics.record_cache_lookup(self.cache_name, hit=True)
+                return state
+            metrics.record_cache_lookup(self.cache_name, hit=False)
+            return self._rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def _rebuild(self):
+        generation = self._generation
+        state = self.build()
+        with self._lock:
+            self._state = state
+            if generation == self._generation:
+                self._expires = time.monotonic() + self.ttl()
+            else:
+                # Invalidated during the build, which may predate the write
+                self._expires = 0.0
+        return state
+
+    def _discard(self):
+        """Drop the state; the caller holds ``_lock``."""
+        self._state = None
+        self._generation += 1
+
+    def rebuild(self):
+        """Replace the state with a fresh build, after any build in progress."""
+        with self._rebuild_lock:
+            return self._rebuild()
+
+    def invalidate(self):
+        """Drop the state; the next lookup rebuilds it."""
+        with self._lock:
+            self._discard()
@@ -0,0 +1,44 @@
+"""
+Feedback Management System Tasks
+
+This module contains the background job handlers queued from ``signals.py``.
+Most are batched: a burst of votes or edits queues many jobs for the same
+board or feedback item, and each claimed batch does the work once per id.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .jobs import enqueue, task
+from .models import BoardStats, Feedback
+from .similarity import index_feedback
+from .webhooks import deliver_pending
+
+
+# Signals adjust the totals in place; this recount only repairs them
+@task("refresh_board_stats", batched=True)
+def refresh_board_stats(payloads):
+    for board_id in {payload["board_id"] for payload in payloads}:
+        BoardStats.refresh(board_id)
+
+
+@task("index_similarity_keys", batched=True)
+def index_similarity_keys(payloads):
+    ids = {payload["feedback_id"] for payload in payloads}
+    # Feedback deleted since the job was queued has no keys to write
+    for feedback in Feedback.objects.filter(pk__in=ids).only("title", "content"):
+        index_feedback(feedback)
+
+
+# POSTs to endpoints; never run inline on the request path
+@task("deliver_webhooks", eager=False)
+def deliver_webhooks(payload):
+    next_attempt = deliver_pending()
+    # Schedule the retries
+    if next_attempt is not None:
+        enqueue(
+            "deliver_webhooks",
+            delay=max(next_attempt - timezone.now(), timedelta()),
+            dedupe_key="deliver_webhooks",
+        )
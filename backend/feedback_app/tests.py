@@ -4,14 +4,75 @@ Feedback Management System Tests
 This module contains comprehensive test cases for the feedback management system.
 """
 
-from django.test import TestCase
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from rest_framework.test import APITestCase, APIClient
+from django.utils import timezone
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    APITestCase,
+    force_authenticate,
+)
 from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Board, Tag, Feedback, Comment
+from . import analytics
+from .autocomplete import tag_index
+from .cooccurrence import TagCoOccurrence, tag_co_occurrence
+from .facts import feedback_facts
+from .history import bulk_change, rebuild_cycles
+from .cache_backends import SampledCullFileBasedCache
+from .idempotency import IDEMPOTENCY_CACHE, idempotent
+from .jobs import Worker, claim_jobs, enqueue, requeue_stale, task
+from .metrics import MetricsRegistry, metrics
+from .middleware import RequestProfilingMiddleware
+from .snapshots import TTLSnapshot
+from .warmup import warm_up, warm_up_on_startup
+from .models import (
+    Board,
+    BoardStats,
+    Tag,
+    Feedback,
+    FeedbackCycle,
+    FeedbackSimilarityKey,
+    FeedbackTransition,
+    Comment,
+    Job,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from .profiling import make_profile_token
+from .signals import bulk_changed
+from .throttling import THROTTLE_CACHE
+from .views import FeedbackViewSet
+from .webhooks import pool
 from .constants import UserRoles, FeedbackStatus, FeedbackPriority
 
 User = get_user_model()
@@ -324,3 +385,2592 @@ class APITestCase(APITestCase):
         data = {"title": "Valid title", "content": "", "board": self.public_board.id}
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RequestMetricsTestCase(TestCase):
+    """Test cases for the request instrumentation middleware."""
+
+    def setUp(self):
+        """Set up test data and authentication."""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@test.com",
+            password="testpass123",
+            role=UserRoles.ADMIN,
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        """Sampled responses carry a Server-Timing header."""
+        response = self.client.get(reverse("board-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("queries", response["Server-Timing"])
+
+    def test_metrics_keyed_by_view_and_action(self):
+        """Histograms are aggregated per DRF view and action."""
+        self.client.get(reverse("feedback-list"))
+        self.client.get(reverse("feedback-counts"))
+
+        response = self.client.get(reverse("request_metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        keys = {(entry["view"], entry["action"]) for entry in response.data}
+        self.assertIn(("FeedbackViewSet", "list"), keys)
+        self.assertIn(("FeedbackViewSet", "counts"), keys)
+        entry = next(e for e in response.data if e["action"] == "counts")
+        self.assertEqual(entry["queries"]["count"], 1)
+        self.assertGreater(entry["queries"]["sum"], 0)
+
+
+class PerformanceToolingTestCase(TestCase):
+    """Test cases for the seed_data and benchmark_endpoints commands."""
+
+    def test_seed_data(self):
+        """Seeding creates the requested rows with bulk inserts."""
+        call_command(
+            "seed_data",
+            users=20,
+            boards=3,
+            tags=5,
+            feedback=40,
+            votes=100,
+            comments=30,
+            batch_size=16,
+            stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Board.objects.count(), 3)
+        self.assertEqual(Feedback.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertGreater(Feedback.upvotes.through.objects.count(), 0)
+        self.assertGreater(Board.members.through.objects.count(), 0)
+
+    def test_seed_data_requires_users_and_boards(self):
+        """Seeding without users or boards fails with a usage error."""
+        for options in ({"users": 0}, {"boards": 0}):
+            with self.assertRaises(CommandError):
+                call_command("seed_data", feedback=5, stdout=StringIO(), **options)
+        self.assertFalse(User.objects.exists())
+
+    def test_benchmark_endpoints_writes_json(self):
+        """Benchmark results are written as machine-readable JSON."""
+        call_command(
+            "seed_data", users=10, boards=2, tags=3, feedback=10, stdout=StringIO()
+        )
+        User.objects.filter(pk=User.objects.first().pk).update(role=UserRoles.ADMIN)
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_endpoints",
+                iterations=2,
+                warmup=0,
+                routes=["board-list", "feedback-counts"],
+                output=output.name,
+                stdout=StringIO(),
+            )
+            results = json.load(output)
+
+        self.assertEqual(results["dataset"]["feedback"], 10)
+        names = {result["name"] for result in results["results"]}
+        self.assertEqual(names, {"board-list", "feedback-counts"})
+        for result in results["results"]:
+            self.assertEqual(result["status_codes"], [200])
+            self.assertGreater(result["queries"]["mean"], 0)
+            self.assertIn("p95", result["latency_ms"])
+
+    def test_benchmark_writes_are_not_throttled(self):
+        """Repeated writes are timed, not answered with 429."""
+        caches[THROTTLE_CACHE].clear()
+        self.addCleanup(caches[THROTTLE_CACHE].clear)
+        call_command("seed_data", users=5, boards=1, feedback=5, stdout=StringIO())
+        User.objects.filter(pk=User.objects.first().pk).update(role=UserRoles.ADMIN)
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_endpoints",
+                iterations=25,
+                warmup=0,
+                include_writes=True,
+                routes=["feedback-create"],
+                output=output.name,
+                stdout=StringIO(),
+            )
+            results = json.load(output)
+        self.assertEqual(results["results"][0]["status_codes"], [201])
+
+    def test_benchmark_covers_routes_outside_the_router(self):
+        """Token, metrics, analytics query and batch routes are measured."""
+        call_command("seed_data", users=5, boards=1, feedback=5, stdout=StringIO())
+        User.objects.filter(pk=User.objects.first().pk).update(role=UserRoles.ADMIN)
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_endpoints",
+                iterations=1,
+                warmup=0,
+                routes=["token", "metrics", "analytics-query", "batch"],
+                output=output.name,
+                stdout=StringIO(),
+            )
+            results = json.load(output)
+        statuses = {
+            result["name"]: result["status_codes"] for result in results["results"]
+        }
+        self.assertEqual(
+            statuses,
+            {
+                "token-obtain-pair": [200],
+                "token-refresh": [200],
+                "metrics": [200],
+                "request-metrics": [200],
+                "analytics-query": [200],
+                "batch": [200],
+            },
+        )
+
+
+class RequestProfilingTestCase(TestCase):
+    """Test cases for the on-demand profiling middleware."""
+
+    def setUp(self):
+        """Set up users, JWT authentication and a scratch report directory."""
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        self.report_dir = report_dir.name
+        profiling_settings = override_settings(
+            REQUEST_PROFILING={"REPORT_DIR": self.report_dir}
+        )
+        profiling_settings.enable()
+        self.addCleanup(profiling_settings.disable)
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@test.com",
+            password="testpass123",
+            role=UserRoles.ADMIN,
+        )
+        self.contributor_user = User.objects.create_user(
+            username="contributor",
+            email="contributor@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+
+    def authenticate_user(self, user):
+        """Authenticate a user for API requests."""
+        token = str(RefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_admin_gets_inline_report(self):
+        """A valid admin token returns a call tree and the SQL executed."""
+        self.authenticate_user(self.admin_user)
+        response = self.client.get(
+            reverse("feedback-list"),
+            {"_profile_output": "inline"},
+            HTTP_X_PROFILE_TOKEN=make_profile_token(self.admin_user),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = response.json()
+        self.assertEqual(report["path"].split("?")[0], reverse("feedback-list"))
+        self.assertTrue(report["call_tree"])
+        self.assertGreater(report["sql"]["count"], 0)
+        # Returned inline only, not also stored
+        self.assertEqual(os.listdir(self.report_dir), [])
+
+    def test_report_stored_on_disk(self):
+        """Without inline output the report is written to REPORT_DIR."""
+        self.authenticate_user(self.admin_user)
+        response = self.client.get(
+            reverse("board-list"),
+            {"_profile": make_profile_token(self.admin_user)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        report_id = response["X-Profile-Report"]
+        with open(f"{self.report_dir}/{report_id}.json") as fh:
+            self.assertEqual(json.load(fh)["id"], report_id)
+
+    def test_non_admin_token_ignored(self):
+        """Tokens are only honored for admins."""
+        self.authenticate_user(self.contributor_user)
+        response = self.client.get(
+            reverse("board-list"),
+            {"_profile_output": "inline"},
+            HTTP_X_PROFILE_TOKEN=make_profile_token(self.contributor_user),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Report", response)
+        self.assertIsInstance(response.data, list)
+
+    def test_token_bound_to_user(self):
+        """An admin token cannot be replayed by another user."""
+        self.authenticate_user(self.contributor_user)
+        response = self.client.get(
+            reverse("board-list"),
+            {"_profile_output": "inline"},
+            HTTP_X_PROFILE_TOKEN=make_profile_token(self.admin_user),
+        )
+        self.assertIsInstance(response.data, list)
+
+    def test_busy_profiler_serves_request(self):
+        """With a profile already running the request is served unprofiled."""
+        self.authenticate_user(self.admin_user)
+        params = {"_profile_output": "inline"}
+        token = make_profile_token(self.admin_user)
+        with RequestProfilingMiddleware.lock:
+            response = self.client.get(
+                reverse("board-list"), params, HTTP_X_PROFILE_TOKEN=token
+            )
+        self.assertIsInstance(response.data, list)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.client.get(
+                reverse("board-list"), params, HTTP_X_PROFILE_TOKEN=token
+            )
+        finally:
+            profiler.disable()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+
+
+class MetricsEndpointTestCase(TestCase):
+    """Test cases for the Prometheus metrics endpoint."""
+
+    def setUp(self):
+        """Set up test data and authentication."""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@test.com",
+            password="testpass123",
+            role=UserRoles.ADMIN,
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.feedback = Feedback.objects.create(
+            title="Test Feedback",
+            content="This is test feedback",
+            board=self.board,
+            author=self.admin_user,
+        )
+        metrics.reset()
+
+    def test_prometheus_exposition(self):
+        """Latency histograms and domain counters are exposed as text."""
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.get(reverse("feedback-list"))
+        self.client.post(reverse("feedback-vote", kwargs={"pk": self.feedback.id}))
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn("# TYPE feedback_http_request_duration_seconds histogram", body)
+        self.assertIn(
+            'feedback_http_request_queries_count{action="list",'
+            'view="FeedbackViewSet"} 1',
+            body,
+        )
+        self.assertIn('feedback_votes_total{action="added"} 1', body)
+        self.assertIn("feedback_http_requests_in_flight 1", body)
+
+    def test_metrics_token(self):
+        """Scrapers authenticate with the static metrics token."""
+        with self.settings(METRICS={"TOKEN": "scrape-secret"}):
+            response = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-secret"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+            )
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_multiprocess_aggregation(self):
+        """Snapshots dumped by sibling workers are merged into a scrape."""
+        metrics.inc("feedback_created")
+        with tempfile.TemporaryDirectory() as directory:
+            with open(f"{directory}/999999.json", "w") as fh:
+                json.dump(
+                    {
+                        "histograms": [],
+                        "counters": [["feedback_created", [], 4]],
+                    },
+                    fh,
+                )
+            with self.settings(METRICS={"MULTIPROCESS_DIR": directory}):
+                snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"][("feedback_created", ())], 5)
+
+    def test_exited_workers_are_retired(self):
+        """Dumps of exited workers are folded into one file, minus gauges."""
+        exited = subprocess.Popen([sys.executable, "-c", ""])
+        exited.wait()
+        metrics.inc("feedback_created")
+        with tempfile.TemporaryDirectory() as directory:
+            for name in [f"{exited.pid}.json", "retired.json"]:
+                with open(f"{directory}/{name}", "w") as fh:
+                    json.dump(
+                        {
+                            "histograms": [],
+                            "counters": [
+                                ["feedback_created", [], 4],
+                                ["requests_in_flight", [], 2],
+                            ],
+                        },
+                        fh,
+                    )
+            with self.settings(METRICS={"MULTIPROCESS_DIR": directory}):
+                for _ in range(2):
+                    snapshot = metrics.snapshot()
+                    self.assertEqual(snapshot["counters"][("feedback_created", ())], 9)
+                    self.assertNotIn(("requests_in_flight", ()), snapshot["counters"])
+                self.assertEqual(
+                    sorted(name for name in os.listdir(directory)),
+                    [".lock", "retired.json"],
+                )
+
+    def test_finished_threads_are_retired(self):
+        """Shards of finished threads are merged instead of kept."""
+        registry = MetricsRegistry()
+        threads = [
+            threading.Thread(
+                target=registry.inc, args=("votes",), kwargs={"action": "added"}
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        snapshot = registry.local_snapshot()
+        self.assertEqual(snapshot["counters"], [["votes", [("action", "added")], 5]])
+        self.assertEqual(registry._shards, [])
+
+
+class CommentThreadTestCase(TestCase):
+    """Test cases for threaded comments."""
+
+    def setUp(self):
+        """Set up a feedback item with a small discussion tree."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor",
+            email="contributor@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.feedback = Feedback.objects.create(
+            title="Test Feedback",
+            content="This is test feedback",
+            board=self.board,
+            author=self.user,
+        )
+        self.root = Comment.objects.create(
+            feedback=self.feedback, author=self.user, content="Root comment"
+        )
+        self.reply = Comment.objects.create(
+            feedback=self.feedback,
+            author=self.user,
+            content="First reply",
+            parent=self.root,
+        )
+        self.nested = Comment.objects.create(
+            feedback=self.feedback,
+            author=self.user,
+            content="Nested reply",
+            parent=self.reply,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_materialized_path(self):
+        """Replies extend their parent's path and bump ancestor counts."""
+        self.assertEqual(self.nested.depth, 2)
+        self.assertEqual(self.nested.ancestor_ids, [self.root.id, self.reply.id])
+        self.assertTrue(self.nested.path.startswith(self.reply.path))
+        self.root.refresh_from_db()
+        self.reply.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 2)
+        self.assertEqual(self.reply.reply_count, 1)
+
+    def test_delete_updates_reply_counts(self):
+        """Deleting a reply removes its subtree from ancestor counts."""
+        self.reply.delete()
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 0)
+        self.assertFalse(Comment.objects.filter(pk=self.nested.pk).exists())
+
+    def test_bulk_and_cascade_deletes_update_reply_counts(self):
+        """Queryset and cascade deletes keep ancestor counts too."""
+        sibling = Comment.objects.create(
+            feedback=self.feedback,
+            author=self.user,
+            content="Second reply",
+            parent=self.root,
+        )
+        Comment.objects.filter(pk=self.nested.pk).delete()
+        self.root.refresh_from_db()
+        self.reply.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 2)
+        self.assertEqual(self.reply.reply_count, 0)
+
+        Comment.objects.create(
+            feedback=self.feedback,
+            author=self.user,
+            content="Nested reply",
+            parent=sibling,
+        )
+        Comment.objects.filter(pk=sibling.pk).delete()
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 1)
+
+        self.root.delete()
+        self.assertFalse(Comment.objects.filter(feedback=self.feedback).exists())
+
+    def test_comment_cannot_move_feedback(self):
+        """Updates cannot move a comment to another feedback item."""
+        other = Feedback.objects.create(
+            title="Other Feedback",
+            content="This is other feedback",
+            board=self.board,
+            author=self.user,
+        )
+        response = self.client.patch(
+            reverse("comment-detail", kwargs={"pk": self.reply.id}),
+            {"feedback": other.id},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("feedback", response.data)
+        self.reply.refresh_from_db()
+        self.assertEqual(self.reply.feedback_id, self.feedback.id)
+
+    def test_thread_endpoint(self):
+        """A thread comes back in order, depth-limited and paginated."""
+        url = reverse("comment-thread", kwargs={"pk": self.root.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [comment["id"] for comment in response.data["results"]]
+        self.assertEqual(ids, [self.root.id, self.reply.id, self.nested.id])
+
+        response = self.client.get(url, {"depth": 1})
+        ids = [comment["id"] for comment in response.data["results"]]
+        self.assertEqual(ids, [self.root.id, self.reply.id])
+
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(response.data["next"])
+        ids = [comment["id"] for comment in response.data["results"]]
+        self.assertEqual(ids, [self.nested.id])
+
+    def test_reply_must_match_feedback(self):
+        """Replies cannot point at a comment on another feedback item."""
+        other = Feedback.objects.create(
+            title="Other Feedback",
+            content="This is other feedback",
+            board=self.board,
+            author=self.user,
+        )
+        response = self.client.post(
+            reverse("comment-list"),
+            {"feedback": other.id, "parent": self.root.id, "content": "Reply"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            reverse("comment-list"),
+            {"feedback": self.feedback.id, "parent": self.root.id, "content": "Reply"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["depth"], 1)
+
+
+class FeedbackCommentsTestCase(TestCase):
+    """Test cases for the nested feedback comments route."""
+
+    def setUp(self):
+        """Set up a private board with a commented feedback item."""
+        self.client = APIClient()
+        self.member = User.objects.create_user(
+            username="member",
+            email="member@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+        self.outsider = User.objects.create_user(
+            username="outsider",
+            email="outsider@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+        self.board = Board.objects.create(name="Private Board", is_public=False)
+        self.board.members.add(self.member)
+        self.feedback = Feedback.objects.create(
+            title="Test Feedback",
+            content="This is test feedback",
+            board=self.board,
+            author=self.member,
+        )
+        self.url = reverse("feedback-comments", kwargs={"pk": self.feedback.id})
+
+    def add_comments(self, count):
+        for i in range(count):
+            author = User.objects.create_user(
+                username=f"commenter{Comment.objects.count()}",
+                password="testpass123",
+            )
+            self.board.members.add(author)
+            Comment.objects.create(
+                feedback=self.feedback, author=author, content=f"Comment {i}"
+            )
+
+    def test_constant_query_count(self):
+        """Loading a page takes the same number of queries at any volume."""
+        self.client.force_authenticate(user=self.member)
+        self.add_comments(2)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        self.add_comments(20)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 22)
+        self.assertEqual(response.data["results"][0]["content"], "Comment 0")
+
+    def test_private_board_requires_membership(self):
+        """Non-members cannot read the discussion of private feedback."""
+        self.add_comments(1)
+        self.client.force_authenticate(user=self.outsider)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pagination(self):
+        """Pages follow creation order and cover every comment once."""
+        self.client.force_authenticate(user=self.member)
+        self.add_comments(5)
+        response = self.client.get(self.url, {"page_size": 2})
+        seen = [comment["content"] for comment in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen += [comment["content"] for comment in response.data["results"]]
+        self.assertEqual(seen, [f"Comment {i}" for i in range(5)])
+
+    def test_comment_list_filter(self):
+        """The flat comment list can be filtered by feedback."""
+        self.client.force_authenticate(user=self.member)
+        self.add_comments(1)
+        other = Feedback.objects.create(
+            title="Other", content="Other", board=self.board, author=self.member
+        )
+        response = self.client.get(reverse("comment-list"), {"feedback": other.id})
+        self.assertEqual(response.data, [])
+
+
+class FeedbackExpandTestCase(TestCase):
+    """Test cases for the expanded feedback detail representation."""
+
+    def setUp(self):
+        """Set up tagged, voted and commented feedback on a private board."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="member",
+            email="member@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+        self.board = Board.objects.create(name="Private Board", is_public=False)
+        self.board.members.add(self.user)
+        self.feedback = Feedback.objects.create(
+            title="Test Feedback",
+            content="This is test feedback",
+            board=self.board,
+            author=self.user,
+        )
+        self.feedback.tags.add(
+            Tag.objects.create(name="ui"), Tag.objects.create(name="mobile")
+        )
+        self.url = reverse("feedback-detail", kwargs={"pk": self.feedback.id})
+        self.client.force_authenticate(user=self.user)
+
+    def add_activity(self, count):
+        for i in range(count):
+            voter = User.objects.create_user(
+                username=f"voter{User.objects.count()}", password="testpass123"
+            )
+            self.feedback.upvotes.add(voter)
+            Comment.objects.create(
+                feedback=self.feedback, author=voter, content=f"Comment {i}"
+            )
+
+    def test_expand_all(self):
+        """Every expansion comes back in one response."""
+        self.add_activity(3)
+        self.feedback.upvotes.add(self.user)
+        response = self.client.get(self.url, {"expand": "comments,tags,board,my_vote"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["board"]["name"], "Private Board")
+        self.assertEqual(
+            sorted(tag["name"] for tag in response.data["tags"]), ["mobile", "ui"]
+        )
+        self.assertTrue(response.data["my_vote"])
+        self.assertEqual(response.data["upvote_count"], 4)
+        self.assertEqual(response.data["comment_count"], 3)
+        self.assertEqual(len(response.data["comments"]), 3)
+        self.assertIsNone(response.data["comments_next"])
+
+    def test_bounded_query_count(self):
+        """The expanded detail takes the same queries at any volume."""
+        with self.assertNumQueries(5):
+            self.client.get(self.url, {"expand": "comments,tags,board,my_vote"})
+        self.add_activity(20)
+        with self.assertNumQueries(5):
+            response = self.client.get(
+                self.url, {"expand": "comments,tags,board,my_vote", "page_size": 5}
+            )
+        self.assertEqual(len(response.data["comments"]), 5)
+        self.assertIn(
+            reverse("feedback-comments", kwargs={"pk": self.feedback.id}),
+            response.data["comments_next"],
+        )
+
+    def test_unknown_expansion(self):
+        """Unknown expansions are rejected."""
+        response = self.client.get(self.url, {"expand": "tags,author"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FeedbackVoteStateTestCase(TestCase):
+    """Test cases for the has_upvoted flag and optional upvoter list."""
+
+    def setUp(self):
+        """Set up a public board with two feedback items."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="voter",
+            email="voter@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.voted = Feedback.objects.create(
+            title="Voted", content="Voted", board=self.board, author=self.user
+        )
+        self.other = Feedback.objects.create(
+            title="Other", content="Other", board=self.board, author=self.user
+        )
+        self.voted.upvotes.add(self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_has_upvoted(self):
+        """The flag reflects the current user's vote on each item."""
+        response = self.client.get(reverse("feedback-list"))
+        flags = {item["id"]: item["has_upvoted"] for item in response.data}
+        self.assertEqual(flags, {self.voted.id: True, self.other.id: False})
+
+        response = self.client.post(
+            reverse("feedback-vote", kwargs={"pk": self.other.id})
+        )
+        response = self.client.get(
+            reverse("feedback-detail", kwargs={"pk": self.other.id})
+        )
+        self.assertTrue(response.data["has_upvoted"])
+
+    def test_omit_upvoter_list(self):
+        """include_upvotes=false drops the upvoter ids but keeps the count."""
+        response = self.client.get(reverse("feedback-list"))
+        self.assertIn("upvotes", response.data[0])
+
+        url = reverse("feedback-detail", kwargs={"pk": self.voted.id})
+        response = self.client.get(url, {"include_upvotes": "false"})
+        self.assertNotIn("upvotes", response.data)
+        self.assertEqual(response.data["upvote_count"], 1)
+
+    def test_list_query_count(self):
+        """Listing takes the same number of queries for any item count."""
+        with self.assertNumQueries(2):
+            self.client.get(reverse("feedback-list"), {"include_upvotes": "false"})
+        for i in range(10):
+            feedback = Feedback.objects.create(
+                title=f"Item {i}", content="Item", board=self.board, author=self.user
+            )
+            feedback.upvotes.add(self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("feedback-list"), {"include_upvotes": "false"}
+            )
+        self.assertEqual(len(response.data), 12)
+
+
+class BoardListingTestCase(TestCase):
+    """Test cases for annotated board listings, members and statistics."""
+
+    def setUp(self):
+        """Set up a contributor with a public and a private board."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="member",
+            email="member@test.com",
+            password="testpass123",
+            role=UserRoles.CONTRIBUTOR,
+        )
+        self.public_board = Board.objects.create(name="Public Board", is_public=True)
+        self.private_board = Board.objects.create(name="Private Board", is_public=False)
+        self.private_board.members.add(self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_query_count(self):
+        """Listing boards takes the same number of queries at any size."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse("board-list"))
+        for i in range(10):
+            board = Board.objects.create(name=f"Board {i}", is_public=True)
+            board.members.add(self.user)
+            Feedback.objects.create(
+                title="Feedback", content="Feedback", board=board, author=self.user
+            )
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("board-list"))
+        self.assertEqual(len(response.data), 12)
+
+    def test_list_representation(self):
+        """Boards report counts and membership instead of member ids."""
+        response = self.client.get(reverse("board-list"))
+        boards = {board["name"]: board for board in response.data}
+        self.assertNotIn("members", boards["Private Board"])
+        self.assertTrue(boards["Private Board"]["is_member"])
+        self.assertFalse(boards["Public Board"]["is_member"])
+        self.assertEqual(boards["Private Board"]["member_count"], 1)
+        self.assertEqual(boards["Private Board"]["stats"]["feedback_total"], 0)
+
+    def test_members_route(self):
+        """Members are listed page by page, and only to those who can see them."""
+        for i in range(4):
+            self.private_board.members.add(
+                User.objects.create_user(username=f"user{i}", password="testpass123")
+            )
+        url = reverse("board-members", kwargs={"pk": self.private_board.id})
+        response = self.client.get(url, {"page_size": 3})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertNotIn("email", response.data["results"][0])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+
+        outsider = User.objects.create_user(username="outsider", password="testpass")
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_maintained_on_write(self):
+        """Creating, voting, moving and deleting feedback update the totals."""
+        feedback = Feedback.objects.create(
+            title="Feedback",
+            content="Feedback",
+            board=self.public_board,
+            author=self.user,
+        )
+        feedback.upvotes.add(self.user)
+        stats = BoardStats.objects.get(board=self.public_board)
+        self.assertEqual(
+            (stats.feedback_total, stats.open_total, stats.vote_total), (1, 1, 1)
+        )
+
+        feedback.status = Feedback.Status.COMPLETED
+        feedback.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.open_total, stats.completed_total), (0, 1))
+
+        feedback.board = self.private_board
+        feedback.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.feedback_total, stats.vote_total), (0, 0))
+        self.private_board.stats.refresh_from_db()
+        self.assertEqual(self.private_board.stats.vote_total, 1)
+
+        feedback.delete()
+        self.private_board.stats.refresh_from_db()
+        self.assertEqual(
+            (
+                self.private_board.stats.feedback_total,
+                self.private_board.stats.completed_total,
+                self.private_board.stats.vote_total,
+            ),
+            (0, 0, 0),
+        )
+
+    def test_stats_adjusted_in_place(self):
+        """Writes adjust the totals without recounting the board."""
+        items = [
+            Feedback.objects.create(
+                title=f"Feedback {i}",
+                content="Feedback",
+                board=self.public_board,
+                author=self.user,
+            )
+            for i in range(3)
+        ]
+        self.user.upvoted_feedbacks.add(*items)
+        loaded = Feedback.objects.get(pk=items[0].pk)
+        loaded.status = Feedback.Status.IN_PROGRESS
+        with CaptureQueriesContext(connection) as queries:
+            loaded.save()
+        # Neither the previous state nor the totals are read back
+        self.assertFalse(
+            [q for q in queries if 'FROM "feedback_app_feedback"' in q["sql"]]
+        )
+        changes = {"status": Feedback.Status.COMPLETED}
+        bulk_changed(bulk_change([items[1].pk, items[2].pk], changes), changes)
+        stats = BoardStats.objects.get(board=self.public_board)
+        self.assertEqual(
+            (
+                stats.feedback_total,
+                stats.open_total,
+                stats.in_progress_total,
+                stats.completed_total,
+                stats.vote_total,
+            ),
+            (3, 0, 1, 2, 3),
+        )
+
+        self.user.upvoted_feedbacks.clear()
+        stats.refresh_from_db()
+        self.assertEqual(stats.vote_total, 0)
+
+        # Repair after a write around the signals
+        Feedback.objects.filter(pk=items[0].pk).update(status=Feedback.Status.OPEN)
+        BoardStats.refresh(self.public_board.pk)
+        stats.refresh_from_db()
+        self.assertEqual((stats.open_total, stats.in_progress_total), (1, 0))
+
+
+class BoardBulkMembershipTestCase(TestCase):
+    """Test cases for bulk board membership changes."""
+
+    def setUp(self):
+        """Set up a moderator, a private board and some users."""
+        self.client = APIClient()
+        self.moderator = User.objects.create_user(
+            username="moderator",
+            email="moderator@test.com",
+            password="testpass123",
+            role=UserRoles.MODERATOR,
+        )
+        self.board = Board.objects.create(name="Private Board", is_public=False)
+        self.users = [
+            User.objects.create_user(
+                username=f"user{i}", email=f"User{i}@test.com", password="testpass"
+            )
+            for i in range(5)
+        ]
+        self.board.members.add(self.users[0])
+        self.client.force_authenticate(user=self.moderator)
+
+    def test_add_members(self):
+        """Users are resolved by any identifier and reported by outcome."""
+        url = reverse("board-add-members", kwargs={"pk": self.board.id})
+        payload = {
+            "usernames": ["user0", "user1", "ghost"],
+            "ids": [self.users[2].id, 999999],
+            "emails": ["user3@test.com", "user1@test.com"],
+        }
+        with self.assertNumQueries(4):
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(user["username"] for user in response.data["added"]),
+            ["user1", "user2", "user3"],
+        )
+        self.assertEqual(
+            [user["username"] for user in response.data["already_member"]],
+            ["user0"],
+        )
+        self.assertEqual(response.data["not_found"], ["ghost", 999999])
+        self.assertEqual(self.board.members.count(), 4)
+
+    def test_remove_members(self):
+        """Removing reports users that were not members."""
+        self.board.members.add(self.users[1])
+        url = reverse("board-remove-members", kwargs={"pk": self.board.id})
+        response = self.client.post(
+            url, {"usernames": ["user0", "user1", "user2"]}, format="json"
+        )
+        self.assertEqual(len(response.data["removed"]), 2)
+        self.assertEqual(response.data["not_member"][0]["username"], "user2")
+        self.assertEqual(self.board.members.count(), 0)
+
+    def test_requires_moderator(self):
+        """Contributors cannot change membership in bulk."""
+        self.client.force_authenticate(user=self.users[0])
+        url = reverse("board-add-members", kwargs={"pk": self.board.id})
+        response = self.client.post(url, {"usernames": ["user1"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_empty_request(self):
+        """At least one identifier is required."""
+        url = reverse("board-add-members", kwargs={"pk": self.board.id})
+        response = self.client.post(url, {"usernames": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class UserDirectoryTestCase(TestCase):
+    """Test cases for the paginated admin user directory."""
+
+    def setUp(self):
+        """Set up an admin and a handful of users."""
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@test.com",
+            password="testpass123",
+            role=UserRoles.ADMIN,
+        )
+        for name, role, active in [
+            ("alice", UserRoles.CONTRIBUTOR, True),
+            ("albert", UserRoles.MODERATOR, True),
+            ("bob", UserRoles.CONTRIBUTOR, False),
+            ("carol", UserRoles.CONTRIBUTOR, True),
+        ]:
+            User.objects.create_user(
+                username=name,
+                email=f"{name}@example.com",
+                first_name=name.title(),
+                last_name="Smith",
+                password="testpass123",
+                role=role,
+                is_active=active,
+            )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("user-list")
+
+    def usernames(self, response):
+        return [user["username"] for user in response.data["results"]]
+
+    def test_paginated_in_username_order(self):
+        """The directory is paged alphabetically without a total count."""
+        response = self.client.get(self.url, {"page_size": 3})
+        self.assertEqual(self.usernames(response), ["admin", "albert", "alice"])
+        self.assertNotIn("count", response.data)
+        self.assertNotIn("password", response.data["results"][0])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(self.usernames(response), ["bob", "carol"])
+
+    def test_prefix_search(self):
+        """Search matches the start of usernames, emails and names."""
+        response = self.client.get(self.url, {"search": "AL"})
+        self.assertEqual(self.usernames(response), ["albert", "alice"])
+        response = self.client.get(self.url, {"search": "carol@"})
+        self.assertEqual(self.usernames(response), ["carol"])
+        response = self.client.get(self.url, {"search": "lice"})
+        self.assertEqual(self.usernames(response), [])
+
+    def test_filters(self):
+        """Role and is_active narrow the directory."""
+        response = self.client.get(
+            self.url, {"role": UserRoles.CONTRIBUTOR, "is_active": "true"}
+        )
+        self.assertEqual(self.usernames(response), ["alice", "carol"])
+
+    def test_constant_query_count(self):
+        """A directory page is a single query."""
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"search": "a", "role": UserRoles.CONTRIBUTOR})
+
+
+class TagAutocompleteTestCase(TestCase):
+    """Test cases for the tag autocomplete index."""
+
+    def setUp(self):
+        """Set up tags with different usage counts."""
+        tag_index.invalidate()
+        self.addCleanup(tag_index.invalidate)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        board = Board.objects.create(name="Public Board", is_public=True)
+        self.tags = {
+            name: Tag.objects.create(name=name)
+            for name in ["mobile", "mobile-app", "monitoring", "ui"]
+        }
+        for count, name in [(1, "mobile"), (3, "monitoring"), (2, "mobile-app")]:
+            for i in range(count):
+                feedback = Feedback.objects.create(
+                    title=f"{name} {i}",
+                    content="Content",
+                    board=board,
+                    author=self.user,
+                )
+                feedback.tags.add(self.tags[name])
+        self.url = reverse("tag-autocomplete")
+
+    def names(self, response):
+        return [tag["name"] for tag in response.data]
+
+    def test_prefix_ranked_by_usage(self):
+        """Matches come back most used first."""
+        response = self.client.get(self.url, {"q": "Mo"})
+        self.assertEqual(self.names(response), ["monitoring", "mobile-app", "mobile"])
+        self.assertEqual(response.data[0]["usage_count"], 3)
+        response = self.client.get(self.url, {"q": "mob", "limit": 1})
+        self.assertEqual(self.names(response), ["mobile-app"])
+
+    def test_no_queries_once_loaded(self):
+        """Lookups after the first are answered from memory."""
+        self.client.get(self.url, {"q": "m"})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "u"})
+        self.assertEqual(self.names(response), ["ui"])
+
+    def test_incremental_updates(self):
+        """New tags and tag assignments reach the index on commit."""
+        self.client.get(self.url, {"q": "m"})
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(name="mockups")
+            feedback = Feedback.objects.first()
+            feedback.tags.add(tag)
+            Feedback.objects.last().tags.add(tag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags["monitoring"].delete()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "m"})
+        self.assertEqual(self.names(response), ["mobile-app", "mockups", "mobile"])
+
+
+class FeedbackSimilarityTestCase(TestCase):
+    """Test cases for near-duplicate feedback detection."""
+
+    def setUp(self):
+        """Set up existing feedback on a public and a private board."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.private_board = Board.objects.create(name="Private", is_public=False)
+        self.dark_mode = Feedback.objects.create(
+            title="Add dark mode to the dashboard",
+            content="It would be great to have a dark theme for the dashboard, "
+            "my eyes hurt at night.",
+            board=self.board,
+            author=self.user,
+        )
+        self.private_dark_mode = Feedback.objects.create(
+            title="Dark mode for the dashboard",
+            content="Please add a dark theme to the dashboard for night work.",
+            board=self.private_board,
+            author=self.user,
+        )
+        self.csv_export = Feedback.objects.create(
+            title="Export reports to CSV",
+            content="We need to export the monthly reports as CSV files.",
+            board=self.board,
+            author=self.user,
+        )
+        self.url = reverse("feedback-similar")
+
+    def test_similar_finds_visible_duplicates(self):
+        """Only visible feedback above the threshold is suggested."""
+        response = self.client.get(
+            self.url,
+            {
+                "title": "Dashboard dark mode",
+                "content": "Please support a dark theme on the dashboard. "
+                "Working at night is hard on the eyes.",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data], [self.dark_mode.pk])
+        self.assertGreaterEqual(response.data[0]["score"], 0.3)
+
+        self.private_board.members.add(self.user)
+        response = self.client.get(
+            self.url, {"title": "Dark mode for the dashboard", "content": ""}
+        )
+        self.assertEqual(response.data[0]["id"], self.private_dark_mode.pk)
+
+    def test_invisible_candidates_are_skipped(self):
+        """Feedback the user cannot see never takes up a candidate slot."""
+        draft = {"title": "Dark mode for the dashboard", "content": ""}
+        with self.settings(DUPLICATE_DETECTION={"MAX_CANDIDATES": 1}):
+            response = self.client.get(self.url, draft)
+        self.assertEqual([item["id"] for item in response.data], [self.dark_mode.pk])
+
+    def test_similar_requires_text(self):
+        """A draft without title or content is rejected."""
+        response = self.client.get(self.url, {"title": " "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_reports_possible_duplicates(self):
+        """The create response lists duplicates, never the new item itself."""
+        response = self.client.post(
+            reverse("feedback-list"),
+            {
+                "title": "CSV export for reports",
+                "content": "We need to export monthly reports as CSV files.",
+                "board": self.board.pk,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item["id"] for item in response.data["possible_duplicates"]],
+            [self.csv_export.pk],
+        )
+
+    def test_keys_follow_text_changes(self):
+        """Keys are rewritten when the text changes, and only then."""
+        keys = set(self.csv_export.similarity_keys.values_list("pk", flat=True))
+        self.assertEqual(len(keys), 32)
+        self.csv_export.status = Feedback.Status.IN_PROGRESS
+        self.csv_export.save()
+        self.assertEqual(
+            set(self.csv_export.similarity_keys.values_list("pk", flat=True)), keys
+        )
+
+        self.csv_export.title = "Dark mode for the dashboard"
+        self.csv_export.content = "Please add a dark theme to the dashboard."
+        self.csv_export.save()
+        response = self.client.get(
+            self.url, {"title": "Dark mode for the dashboard", "content": ""}
+        )
+        self.assertIn(self.csv_export.pk, [item["id"] for item in response.data])
+
+    def test_rebuild_command(self):
+        """The rebuild command restores keys for rows written without signals."""
+        FeedbackSimilarityKey.objects.all().delete()
+        call_command("rebuild_similarity_index", stdout=StringIO())
+        self.assertEqual(FeedbackSimilarityKey.objects.count(), 3 * 32)
+
+
+class HotRankingTestCase(TestCase):
+    """Test cases for stored vote counts and the hot ranking."""
+
+    def setUp(self):
+        """Set up an old, well voted item and a new one."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        board = Board.objects.create(name="Public Board", is_public=True)
+        self.voters = [
+            User.objects.create_user(username=f"voter{i}", password="testpass123")
+            for i in range(3)
+        ]
+        self.old = Feedback.objects.create(
+            title="Old popular request",
+            content="Voted on a lot, two days ago",
+            board=board,
+            author=self.user,
+        )
+        self.old.upvotes.add(*self.voters)
+        self.new = Feedback.objects.create(
+            title="New rising request",
+            content="Just posted and already voted on",
+            board=board,
+            author=self.user,
+        )
+        self.new.upvotes.add(self.voters[0])
+
+    def age(self, feedback, days):
+        """Pretend ``feedback`` was created and last scored ``days`` ago."""
+        Feedback.objects.filter(pk=feedback.pk).update(
+            created_at=F("created_at") - timedelta(days=days),
+            hot_decayed_at=F("hot_decayed_at") - days * 86400,
+        )
+
+    def test_votes_update_stored_scores(self):
+        """Adding and removing votes keeps counts and scores in step."""
+        self.new.refresh_from_db()
+        self.assertEqual(self.new.vote_count, 1)
+        self.assertAlmostEqual(self.new.hot_score, 2.0, places=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("feedback-vote", args=[self.new.pk]))
+        self.assertEqual(response.data["action"], "added")
+        self.assertEqual(response.data["upvotes"], 2)
+        # Neither the upvoters nor their number are read back
+        upvoter_reads = [
+            query["sql"]
+            for query in queries
+            if 'INNER JOIN "feedback_app_feedback_upvotes"' in query["sql"]
+            and "LIMIT 1" not in query["sql"]
+        ]
+        self.assertEqual(upvoter_reads, [])
+        response = self.client.post(reverse("feedback-vote", args=[self.new.pk]))
+        self.assertEqual(response.data["upvotes"], 1)
+        self.voters[0].upvoted_feedbacks.clear()
+        self.new.refresh_from_db()
+        self.assertEqual(self.new.vote_count, 0)
+        self.assertAlmostEqual(self.new.hot_score, 1.0, places=3)
+
+    def test_hot_ordering_favors_recent_votes(self):
+        """After decay an old item ranks below a newer one with fewer votes."""
+        self.age(self.old, 2)
+        out = StringIO()
+        call_command("decay_hot_scores", stdout=out)
+        self.assertIn("Decayed 2 hot scores", out.getvalue())
+        self.old.refresh_from_db()
+        self.assertAlmostEqual(self.old.hot_score, 1.0, places=3)
+
+        response = self.client.get(reverse("feedback-list"), {"ordering": "-hot"})
+        self.assertEqual(
+            [item["id"] for item in response.data], [self.new.pk, self.old.pk]
+        )
+        response = self.client.get(
+            reverse("feedback-list"), {"ordering": "-upvote_count"}
+        )
+        self.assertEqual(response.data[0]["id"], self.old.pk)
+        self.assertEqual(response.data[0]["upvote_count"], 3)
+
+    def test_top_voted_window(self):
+        """``window`` limits top_voted to recently created feedback."""
+        self.age(self.old, 10)
+        url = reverse("feedback-top-voted")
+        response = self.client.get(url)
+        self.assertEqual(
+            [item["id"] for item in response.data][:2], [self.old.pk, self.new.pk]
+        )
+        response = self.client.get(url, {"window": "7d"})
+        self.assertEqual([item["id"] for item in response.data], [self.new.pk])
+        for window in ["seven", "366d", "99999999999d"]:
+            response = self.client.get(url, {"window": window})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            reverse("feedback-dashboard"), {"window": "99999999999d"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_scores(self):
+        """Rebuilding restores counts for votes written without signals."""
+        Feedback.objects.update(vote_count=0, hot_score=0)
+        call_command("decay_hot_scores", "--rebuild", stdout=StringIO())
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.vote_count, 3)
+        self.assertAlmostEqual(self.old.hot_score, 4.0, places=2)
+
+
+flaky_calls = []
+
+
+@task("test_flaky", max_attempts=2)
+def flaky_task(payload):
+    """Fail on the first call, succeed afterwards."""
+    flaky_calls.append(payload)
+    if len(flaky_calls) == 1:
+        raise RuntimeError("temporary failure")
+
+
+@override_settings(JOB_QUEUE={"EAGER": False, "CONCURRENCY": 1})
+class JobQueueTestCase(TestCase):
+    """Test cases for the database-backed job queue."""
+
+    def setUp(self):
+        """Set up a board with one feedback item."""
+        flaky_calls.clear()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.feedback = Feedback.objects.create(
+            title="Queued side effects",
+            content="Stats are refreshed by the worker",
+            board=self.board,
+            author=self.user,
+        )
+        self.worker = Worker()
+
+    def test_side_effects_wait_for_the_worker(self):
+        """Similarity keys wait for the worker; stats never do."""
+        voters = [
+            User.objects.create_user(username=f"voter{i}", password="testpass123")
+            for i in range(3)
+        ]
+        for voter in voters:
+            self.feedback.upvotes.add(voter)
+        self.assertFalse(Job.objects.filter(name="refresh_board_stats").exists())
+        self.assertEqual(BoardStats.objects.get(board=self.board).vote_total, 3)
+        self.assertEqual(self.feedback.similarity_keys.count(), 0)
+
+        self.worker.run_once()
+        self.assertEqual(self.feedback.similarity_keys.count(), 32)
+        self.assertFalse(Job.objects.exclude(status=Job.Status.DONE).exists())
+
+    def test_retry_with_backoff_then_fail(self):
+        """Failed jobs are retried later, then marked failed."""
+        job = enqueue("test_flaky", {"n": 1})
+        with self.assertLogs("feedback_app.jobs", "WARNING"):
+            self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("temporary failure", job.last_error)
+        self.assertGreater(job.run_at, job.created_at)
+        self.assertEqual(claim_jobs("other", 10), [])
+
+        Job.objects.filter(pk=job.pk).update(run_at=job.created_at)
+        self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+
+        flaky_calls.clear()
+        job = enqueue("test_flaky", {"n": 2})
+        Job.objects.filter(pk=job.pk).update(max_attempts=1)
+        with self.assertLogs("feedback_app.jobs", "WARNING"):
+            self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+
+    def test_claims_are_exclusive_and_stale_jobs_requeued(self):
+        """A claimed job is invisible to other workers until it times out."""
+        Job.objects.all().delete()
+        job = enqueue("test_flaky", {"n": 3})
+        self.assertEqual(claim_jobs("first", 10), [job])
+        self.assertEqual(claim_jobs("second", 10), [])
+        self.assertEqual(requeue_stale(), 0)
+        with override_settings(JOB_QUEUE={"LOCK_TIMEOUT": -1}):
+            self.assertEqual(requeue_stale(), 1)
+        self.assertEqual([j.pk for j in claim_jobs("second", 10)], [job.pk])
+
+    def test_jobs_with_one_key_run_one_at_a_time(self):
+        """A job is not claimed while another job with its key is running."""
+        Job.objects.all().delete()
+        first = enqueue("test_flaky", {"n": 4}, dedupe_key="flaky")
+        self.assertEqual(claim_jobs("first", 10), [first])
+        second = enqueue("test_flaky", {"n": 5}, dedupe_key="flaky")
+        third = enqueue("test_flaky", {"n": 6}, dedupe_key="flaky")
+        self.assertIsNotNone(second)
+        self.assertIsNone(third)
+        self.assertEqual(claim_jobs("second", 10), [])
+
+        Job.objects.filter(pk=first.pk).update(status=Job.Status.DONE)
+        Job.objects.create(name="test_flaky", payload={"n": 7}, dedupe_key="flaky")
+        self.assertEqual(claim_jobs("second", 10), [second])
+
+    def test_run_worker_drain(self):
+        """The worker command processes the queue and exits when drained."""
+        out = StringIO()
+        call_command("run_worker", "--drain", "--concurrency", "1", stdout=out)
+        self.assertIn("Worker stopped.", out.getvalue())
+        self.assertFalse(Job.objects.exclude(status=Job.Status.DONE).exists())
+
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    """Records webhook requests and answers with ``server.status_code``."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.client_address, self.headers, body))
+        self.send_response(self.server.status_code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(JOB_QUEUE={"EAGER": False, "CONCURRENCY": 1})
+class WebhookTestCase(TestCase):
+    """Test cases for batched outbound webhooks."""
+
+    def setUp(self):
+        """Start a local receiver and subscribe an endpoint to it."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookReceiver)
+        self.server.received = []
+        self.server.status_code = 200
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(pool.close)
+
+        self.endpoint = WebhookEndpoint.objects.create(
+            name="Triage bot",
+            url=f"http://127.0.0.1:{self.server.server_address[1]}/hooks",
+        )
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.worker = Worker()
+
+    def received_events(self):
+        return [
+            event
+            for _, _, body in self.server.received
+            for event in json.loads(body)["events"]
+        ]
+
+    def test_events_are_batched_and_signed(self):
+        """Outbox events reach the endpoint in one signed request."""
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback = Feedback.objects.create(
+                title="Webhook me", content="Please", board=self.board, author=self.user
+            )
+        feedback_id = feedback.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("feedback-vote", kwargs={"pk": feedback_id}))
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.status = FeedbackStatus.IN_PROGRESS
+            feedback.save()
+        self.assertEqual(self.server.received, [])
+
+        self.worker.run_once()
+        self.assertEqual(len(self.server.received), 1)
+        _, headers, body = self.server.received[0]
+        expected = hmac.new(
+            self.endpoint.secret.encode(),
+            f"{headers['X-Webhook-Timestamp']}.".encode() + body,
+            hashlib.sha256,
+        ).hexdigest()
+        self.assertEqual(headers["X-Webhook-Signature"], f"sha256={expected}")
+        events = self.received_events()
+        self.assertEqual(
+            [event["type"] for event in events],
+            ["feedback.created", "feedback.voted", "feedback.status_changed"],
+        )
+        self.assertEqual(events[2]["data"]["previous_status"], FeedbackStatus.OPEN)
+        self.assertFalse(
+            WebhookDelivery.objects.exclude(
+                status=WebhookDelivery.Status.DELIVERED
+            ).exists()
+        )
+
+        # The next batch reuses the kept-alive connection
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.delete()
+        self.worker.run_once()
+        self.assertEqual(len(self.server.received), 2)
+        self.assertEqual(self.server.received[0][0], self.server.received[1][0])
+        self.assertEqual(self.received_events()[-1]["type"], "feedback.deleted")
+
+    def test_failed_batches_back_off_then_fail(self):
+        """Rejected deliveries are retried later, then marked failed."""
+        self.server.status_code = 500
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.create(
+                title="Unlucky", content="Down", board=self.board, author=self.user
+            )
+        self.worker.run_once()
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual(delivery.status, WebhookDelivery.Status.PENDING)
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(delivery.last_error, "HTTP 500")
+        # The retry is queued for when the endpoint's backoff ends
+        retry = Job.objects.get(name="deliver_webhooks", status=Job.Status.QUEUED)
+        self.assertGreater(retry.run_at, timezone.now())
+
+        with override_settings(WEBHOOKS={"MAX_ATTEMPTS": 2}):
+            Job.objects.filter(pk=retry.pk).update(run_at=timezone.now())
+            WebhookDelivery.objects.update(next_attempt_at=timezone.now())
+            self.worker.run_once()
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.Status.FAILED)
+        self.assertEqual(len(self.server.received), 2)
+
+    def test_endpoint_event_filter(self):
+        """Endpoints only receive subscribed events; none means no outbox."""
+        self.endpoint.events = ["feedback.deleted"]
+        self.endpoint.save()
+        feedback = Feedback.objects.create(
+            title="Quiet", content="No event", board=self.board, author=self.user
+        )
+        self.assertFalse(WebhookDelivery.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.delete()
+        self.worker.run_once()
+        self.assertEqual(
+            [event["type"] for event in self.received_events()], ["feedback.deleted"]
+        )
+
+    @override_settings(JOB_QUEUE={"EAGER": True, "CONCURRENCY": 1})
+    def test_eager_mode_never_delivers_inline(self):
+        """Writes only queue delivery, and only once they commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.create(
+                title="Eager", content="Queued", board=self.board, author=self.user
+            )
+        self.assertEqual(self.server.received, [])
+        self.assertTrue(
+            Job.objects.filter(
+                name="deliver_webhooks", status=Job.Status.QUEUED
+            ).exists()
+        )
+
+        # A rolled-back change queues nothing
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Feedback.objects.create(
+                    title="Undone", content="Never", board=self.board, author=self.user
+                )
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+
+        self.worker.run_once()
+        self.assertEqual(
+            [event["type"] for event in self.received_events()], ["feedback.created"]
+        )
+
+
+class FeedbackHistoryTestCase(TestCase):
+    """Test cases for the status and priority transition history."""
+
+    def setUp(self):
+        """Set up a moderator, a contributor and feedback by each."""
+        self.client = APIClient()
+        self.moderator = User.objects.create_user(
+            username="moderator", password="testpass123", role=UserRoles.MODERATOR
+        )
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.own = Feedback.objects.create(
+            title="Mine",
+            content="By the contributor",
+            board=self.board,
+            author=self.user,
+        )
+        self.other = Feedback.objects.create(
+            title="Theirs",
+            content="By the moderator",
+            board=self.board,
+            author=self.moderator,
+        )
+
+    def test_partial_update_records_transitions(self):
+        """Each changed field adds one row with the acting user."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse("feedback-detail", kwargs={"pk": self.own.pk})
+        response = self.client.patch(
+            url,
+            {"status": FeedbackStatus.IN_PROGRESS, "priority": FeedbackPriority.HIGH},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.patch(url, {"title": "Mine, renamed"})
+        transitions = list(
+            FeedbackTransition.objects.values_list(
+                "field", "from_value", "to_value", "changed_by", "board"
+            )
+        )
+        self.assertCountEqual(
+            transitions,
+            [
+                (
+                    "status",
+                    FeedbackStatus.OPEN,
+                    FeedbackStatus.IN_PROGRESS,
+                    self.user.pk,
+                    self.board.pk,
+                ),
+                (
+                    "priority",
+                    FeedbackPriority.MEDIUM,
+                    FeedbackPriority.HIGH,
+                    self.user.pk,
+                    self.board.pk,
+                ),
+            ],
+        )
+
+    def test_recording_costs_one_insert(self):
+        """A transition adds a single INSERT and no reads to the update."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse("feedback-detail", kwargs={"pk": self.own.pk})
+        with CaptureQueriesContext(connection) as unchanged:
+            self.client.patch(url, {"priority": FeedbackPriority.MEDIUM})
+        with CaptureQueriesContext(connection) as changed:
+            self.client.patch(url, {"priority": FeedbackPriority.LOW})
+        self.assertEqual(len(changed), len(unchanged) + 1)
+        self.assertEqual(FeedbackTransition.objects.count(), 1)
+
+    def test_bulk_update(self):
+        """Bulk updates skip unchanged and forbidden items."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse("feedback-bulk-update")
+        response = self.client.post(
+            url,
+            {"ids": [self.own.pk, self.other.pk], "status": FeedbackStatus.COMPLETED},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], [self.own.pk])
+        self.assertEqual(response.data["not_permitted"], [self.other.pk])
+        self.own.refresh_from_db()
+        self.assertEqual(self.own.status, FeedbackStatus.COMPLETED)
+        self.assertEqual(BoardStats.objects.get(board=self.board).completed_total, 1)
+
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.post(
+            url,
+            {"ids": [self.own.pk, self.other.pk], "status": FeedbackStatus.COMPLETED},
+            format="json",
+        )
+        self.assertEqual(response.data["updated"], [self.other.pk])
+        self.assertEqual(response.data["unchanged"], [self.own.pk])
+        self.assertEqual(
+            FeedbackTransition.objects.filter(changed_by=self.moderator).count(), 1
+        )
+        self.assertEqual(FeedbackTransition.objects.count(), 2)
+
+        response = self.client.post(url, {"ids": [self.own.pk]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cycle_follows_writes(self):
+        """Comments and status changes keep the cycle row current."""
+        fields = [
+            "first_response_seconds",
+            "started_seconds",
+            "completed_seconds",
+            "completed_at",
+        ]
+        Comment.objects.create(feedback=self.own, author=self.user, content="Bump")
+        Comment.objects.create(feedback=self.own, author=self.moderator, content="Hi")
+        Comment.objects.create(feedback=self.own, author=self.moderator, content="Re")
+        for item_status in [
+            FeedbackStatus.IN_PROGRESS,
+            FeedbackStatus.OPEN,
+            FeedbackStatus.IN_PROGRESS,
+            FeedbackStatus.COMPLETED,
+        ]:
+            self.own.status = item_status
+            self.own.save()
+        cycle = FeedbackCycle.objects.get(pk=self.own.pk)
+        first_response = Comment.objects.get(content="Hi").created_at
+        self.assertEqual(
+            cycle.first_response_seconds,
+            (first_response - self.own.created_at).total_seconds(),
+        )
+        first_start = FeedbackTransition.objects.filter(
+            to_value=FeedbackStatus.IN_PROGRESS
+        ).first()
+        self.assertEqual(cycle.started_seconds, first_start.age_seconds)
+        completion = FeedbackTransition.objects.get(to_value=FeedbackStatus.COMPLETED)
+        self.assertEqual(cycle.completed_at, completion.changed_at)
+        self.assertEqual(cycle.board_id, self.board.pk)
+        self.assertIsNone(FeedbackCycle.objects.get(pk=self.other.pk).started_seconds)
+
+        written = list(FeedbackCycle.objects.order_by("pk").values_list(*fields))
+        self.assertEqual(rebuild_cycles(), 2)
+        self.assertEqual(
+            list(FeedbackCycle.objects.order_by("pk").values_list(*fields)), written
+        )
+
+
+class WorkflowAnalyticsTestCase(TestCase):
+    """Test cases for cycle time and throughput analytics."""
+
+    def setUp(self):
+        """Set up feedback with a known workflow history."""
+        cache.clear()
+        self.client = APIClient()
+        self.moderator = User.objects.create_user(
+            username="moderator", password="testpass123", role=UserRoles.MODERATOR
+        )
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.private_board = Board.objects.create(name="Private", is_public=False)
+        self.tag = Tag.objects.create(name="ui")
+        now = timezone.now()
+        for hours, board in [
+            (2, self.board),
+            (10, self.board),
+            (6, self.private_board),
+        ]:
+            feedback = Feedback.objects.create(
+                title="Tracked", content="Work", board=board, author=self.user
+            )
+            feedback.tags.add(self.tag)
+            created = now - timedelta(days=3)
+            Feedback.objects.filter(pk=feedback.pk).update(created_at=created)
+            comment = Comment.objects.create(
+                feedback=feedback, author=self.moderator, content="On it"
+            )
+            Comment.objects.filter(pk=comment.pk).update(
+                created_at=created + timedelta(hours=hours)
+            )
+            for to_value, offset in [
+                (FeedbackStatus.IN_PROGRESS, hours),
+                (FeedbackStatus.COMPLETED, 2 * hours),
+            ]:
+                FeedbackTransition.objects.create(
+                    feedback=feedback,
+                    board=board,
+                    field=FeedbackTransition.Field.STATUS,
+                    from_value=FeedbackStatus.OPEN,
+                    to_value=to_value,
+                    changed_at=created + timedelta(hours=offset),
+                    age_seconds=offset * 3600,
+                )
+        # The history above was written around the signals
+        rebuild_cycles()
+
+    def test_cycle_times(self):
+        """Durations are summarized per visible board."""
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.get(reverse("feedback-cycle-times"), {"days": 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_response = response.data["first_response"]
+        self.assertEqual(first_response["count"], 3)
+        self.assertEqual(first_response["p50_hours"], 6.0)
+        self.assertEqual(first_response["mean_hours"], 6.0)
+        histogram = {
+            row["le_hours"]: row["count"] for row in first_response["histogram"]
+        }
+        self.assertEqual(histogram[4], 1)
+        self.assertEqual(histogram[24], 2)
+        self.assertEqual(response.data["open_to_completed"]["p50_hours"], 12.0)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            reverse("feedback-cycle-times"), {"board": self.board.pk}
+        )
+        self.assertEqual(response.data["in_progress_to_completed"]["count"], 2)
+        response = self.client.get(
+            reverse("feedback-cycle-times"), {"board": self.private_board.pk}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_throughput_is_cached(self):
+        """Completions are counted per week, board and tag, then cached."""
+        self.client.force_authenticate(user=self.moderator)
+        url = reverse("feedback-throughput")
+        response = self.client.get(url)
+        self.assertEqual(sum(row["completed"] for row in response.data["weeks"]), 3)
+        self.assertEqual(
+            sum(
+                row["completed"]
+                for row in response.data["by_board"]
+                if row["board"] == self.board.pk
+            ),
+            2,
+        )
+        self.assertEqual({row["tag"] for row in response.data["by_tag"]}, {"ui"})
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, response.data)
+
+
+class FeedbackFactsTestCase(TestCase):
+    """Test cases for the feedback facts snapshot and query endpoint."""
+
+    def setUp(self):
+        """Set up feedback over two days on a public and a private board."""
+        feedback_facts.invalidate()
+        self.addCleanup(feedback_facts.invalidate)
+        self.client = APIClient()
+        self.moderator = User.objects.create_user(
+            username="moderator", password="testpass123", role=UserRoles.MODERATOR
+        )
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.private_board = Board.objects.create(name="Private", is_public=False)
+        self.tag = Tag.objects.create(name="ui")
+        self.url = reverse("analytics_query")
+        now = timezone.now()
+        self.items = []
+        for days_ago, board, item_status in [
+            (2, self.board, FeedbackStatus.OPEN),
+            (2, self.board, FeedbackStatus.COMPLETED),
+            (1, self.board, FeedbackStatus.OPEN),
+            (1, self.private_board, FeedbackStatus.OPEN),
+        ]:
+            feedback = Feedback.objects.create(
+                title="Fact",
+                content="Counted",
+                board=board,
+                author=self.user,
+                status=item_status,
+            )
+            Feedback.objects.filter(pk=feedback.pk).update(
+                created_at=now - timedelta(days=days_ago)
+            )
+            self.items.append(feedback)
+        self.items[0].tags.add(self.tag)
+        self.items[0].upvotes.add(self.user, self.moderator)
+        self.today = timezone.localdate(now)
+
+    def test_filter_and_group(self):
+        """Counts and votes are grouped by dimension and day."""
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.get(self.url, {"group_by": "board,status"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], {"count": 4, "votes": 2})
+        rows = {(row["board"], row["status"]): row for row in response.data["rows"]}
+        self.assertEqual(rows[(self.board.pk, FeedbackStatus.OPEN)]["count"], 2)
+        self.assertEqual(rows[(self.board.pk, FeedbackStatus.OPEN)]["votes"], 2)
+        self.assertEqual(len(rows), 3)
+
+        response = self.client.get(
+            self.url,
+            {
+                "group_by": "day",
+                "status": FeedbackStatus.OPEN,
+                "start": (self.today - timedelta(days=1)).isoformat(),
+            },
+        )
+        self.assertEqual(
+            [(row["day"], row["count"]) for row in response.data["rows"]],
+            [(self.today - timedelta(days=1), 2)],
+        )
+
+        response = self.client.get(self.url, {"tag": self.tag.pk})
+        self.assertEqual(response.data["total"], {"count": 1, "votes": 2})
+
+    def test_incremental_updates(self):
+        """Committed writes reach the snapshot without a rebuild."""
+        self.client.force_authenticate(user=self.moderator)
+        self.client.get(self.url)
+        feedback = self.items[2]
+        with self.captureOnCommitCallbacks(execute=True):
+            feedback.status = FeedbackStatus.COMPLETED
+            feedback.save()
+            feedback.upvotes.add(self.user)
+            feedback.tags.add(self.tag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[1].delete()
+
+        with self.assertNumQueries(0):
+            groups, totals, _ = feedback_facts.query(
+                {"status": [FeedbackStatus.COMPLETED]}
+            )
+        self.assertEqual(totals, {"count": 1, "votes": 1})
+        _, totals, _ = feedback_facts.query({"tag": [self.tag.pk]})
+        self.assertEqual(totals, {"count": 2, "votes": 3})
+
+    def test_visibility_and_validation(self):
+        """Contributors only see their boards; bad parameters are rejected."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["total"]["count"], 3)
+        response = self.client.get(self.url, {"board": self.private_board.pk})
+        self.assertEqual(response.data["total"]["count"], 0)
+
+        for params in [
+            {"group_by": "author"},
+            {"group_by": "board,status,tag"},
+            {"board": "public"},
+            {"start": "yesterday"},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(FEEDBACK_FACTS={"MAX_GROUPS": 1}):
+            response = self.client.get(self.url, {"group_by": "status"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_days_follow_time_zone(self):
+        """Rows are bucketed by their day in TIME_ZONE, not in UTC."""
+        Feedback.objects.filter(pk=self.items[0].pk).update(
+            created_at=datetime(2026, 1, 2, 3, tzinfo=dt_timezone.utc)
+        )
+        with self.settings(TIME_ZONE="America/New_York"):
+            feedback_facts.rebuild()
+            groups, _, _ = feedback_facts.query(group_by=["day"], end=date(2026, 1, 1))
+        self.assertEqual(groups, [{"day": date(2026, 1, 1), "count": 1, "votes": 2}])
+
+
+class BlockingSnapshot(TTLSnapshot):
+    """Snapshot whose builds wait until the test lets them finish."""
+
+    cache_name = "blocking"
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+        self.building = threading.Event()
+        self.finish = threading.Event()
+
+    def ttl(self):
+        return 60
+
+    def build(self):
+        self.builds += 1
+        self.building.set()
+        self.finish.wait(5)
+        return self.builds
+
+
+class TTLSnapshotTestCase(TestCase):
+    """Test cases for the refresh policy of the in-process indexes."""
+
+    def rebuild_in_thread(self, snapshot):
+        snapshot.building.clear()
+        snapshot.finish.clear()
+        thread = threading.Thread(target=snapshot._load)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(snapshot.finish.set)
+        snapshot.building.wait(5)
+        return thread
+
+    def test_single_flight_rebuild(self):
+        """One thread rebuilds expired state; the others keep the old one."""
+        snapshot = BlockingSnapshot()
+        snapshot.finish.set()
+        self.assertEqual(snapshot._load(), 1)
+
+        snapshot._expires = 0.0
+        thread = self.rebuild_in_thread(snapshot)
+        self.assertEqual(snapshot._load(), 1)
+        snapshot.finish.set()
+        thread.join()
+        self.assertEqual(snapshot._load(), 2)
+        self.assertEqual(snapshot.builds, 2)
+
+    def test_invalidated_during_rebuild(self):
+        """A build that overlapped an invalidation is replaced on next use."""
+        snapshot = BlockingSnapshot()
+        thread = self.rebuild_in_thread(snapshot)
+        snapshot.invalidate()
+        snapshot.finish.set()
+        thread.join()
+        self.assertEqual(snapshot._state, 1)
+        self.assertEqual(snapshot._load(), 2)
+
+
+class TagAnalyticsTestCase(TestCase):
+    """Test cases for the tag distribution and co-occurrence analytics."""
+
+    def setUp(self):
+        """Set up tagged feedback on a public and a private board."""
+        cache.clear()
+        tag_co_occurrence.invalidate()
+        self.addCleanup(tag_co_occurrence.invalidate)
+        self.client = APIClient()
+        self.moderator = User.objects.create_user(
+            username="moderator", password="testpass123", role=UserRoles.MODERATOR
+        )
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.private_board = Board.objects.create(name="Private", is_public=False)
+        self.ui, self.bug, self.api = (
+            Tag.objects.create(name=name) for name in ("ui", "bug", "api")
+        )
+        self.items = []
+        for board, item_status, tags in [
+            (self.board, FeedbackStatus.OPEN, [self.ui, self.bug]),
+            (self.board, FeedbackStatus.COMPLETED, [self.ui, self.bug, self.api]),
+            (self.private_board, FeedbackStatus.OPEN, [self.ui, self.api]),
+        ]:
+            feedback = Feedback.objects.create(
+                title="Tagged",
+                content="Counted",
+                board=board,
+                author=self.user,
+                status=item_status,
+            )
+            feedback.tags.add(*tags)
+            self.items.append(feedback)
+
+    def pairs(self, response):
+        return {
+            tuple(tag["name"] for tag in pair["tags"]): pair["count"]
+            for pair in response.data["pairs"]
+        }
+
+    def test_tag_distribution(self):
+        """Tags are counted per status in one query, then cached."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse("feedback-tag-distribution")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = {row["name"]: row for row in response.data}
+        self.assertEqual(rows["ui"]["total"], 2)
+        self.assertEqual(rows["ui"]["by_status"][FeedbackStatus.COMPLETED], 1)
+        self.assertEqual(rows["api"]["total"], 1)
+        self.assertEqual(response.data[0]["name"], "bug")
+
+        self.client.force_authenticate(user=self.moderator)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual({row["name"]: row["total"] for row in response.data}["ui"], 3)
+        self.assertEqual(
+            sum("feedback_app_feedback_tags" in q["sql"] for q in queries), 1
+        )
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_tag_co_occurrence(self):
+        """Pairs are counted per visible board and follow tag changes."""
+        url = reverse("feedback-tag-co-occurrence")
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.pairs(response),
+            {("ui", "bug"): 2, ("ui", "api"): 2, ("bug", "api"): 1},
+        )
+        self.assertEqual(response.data["pairs"][0]["tags"][0]["count"], 3)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url, {"tag": self.api.pk})
+        self.assertEqual(self.pairs(response), {("ui", "api"): 1, ("bug", "api"): 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[0].tags.remove(self.ui)
+            self.api.feedbacks.add(self.items[0])
+            self.items[1].delete()
+        response = self.client.get(url)
+        self.assertEqual(self.pairs(response), {("bug", "api"): 1})
+
+        response = self.client.get(url, {"limit": "many"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_co_occurrence_rebuilds_once(self):
+        """Queries keep the expired matrix while one thread rebuilds it."""
+        matrix = tag_co_occurrence.rebuild()
+        builds = []
+        building, finish = threading.Event(), threading.Event()
+
+        class SlowCoOccurrence(TagCoOccurrence):
+            def build(self):
+                builds.append(self)
+                building.set()
+                finish.wait(5)
+                return matrix
+
+        index = SlowCoOccurrence()
+        index._state = matrix
+        thread = threading.Thread(target=index.query)
+        thread.start()
+        building.wait(5)
+        tags, _ = index.query(board_ids=[self.board.pk])
+        finish.set()
+        thread.join()
+        self.assertEqual(tags[self.ui.pk], 2)
+        self.assertEqual(len(builds), 1)
+
+
+def throttle_rates(**rates):
+    """Override the rates of some throttle scopes."""
+    return override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                **rates,
+            },
+        }
+    )
+
+
+class ThrottlingTestCase(TestCase):
+    """Test cases for the token bucket throttles on write actions."""
+
+    def setUp(self):
+        """Set up a user and feedback to vote on."""
+        caches[THROTTLE_CACHE].clear()
+        self.addCleanup(caches[THROTTLE_CACHE].clear)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.feedback = Feedback.objects.create(
+            title="Vote", content="Often", board=self.board, author=self.user
+        )
+
+    @throttle_rates(login="2/min")
+    def test_login_is_throttled_per_ip(self):
+        """Requests beyond the bucket get 429 until tokens refill."""
+        url = reverse("user-login")
+        data = {"username": "contributor", "password": "wrong"}
+        for _ in range(2):
+            response = self.client.post(url, data)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+        self.assertLessEqual(int(response["Retry-After"]), 30)
+
+        # The token endpoint checks passwords too and shares the bucket
+        response = self.client.post(reverse("token_obtain_pair"), data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Another client has its own bucket
+        response = self.client.post(url, data, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Half the period refills one token
+        store = caches[THROTTLE_CACHE]
+        key = "throttle:login:ip:127.0.0.1"
+        tokens, updated = store.get(key)
+        store.set(key, (tokens, updated - 30))
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @throttle_rates(login="2/min")
+    def test_token_endpoint_is_throttled(self):
+        """``/api/token/`` cannot be used to skip the login throttle."""
+        url = reverse("token_obtain_pair")
+        data = {"username": "contributor", "password": "wrong"}
+        for _ in range(2):
+            response = self.client.post(url, data)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(vote="1/hour")
+    def test_only_scoped_actions_use_the_bucket(self):
+        """Votes are counted per user; unscoped actions are never throttled."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse("feedback-vote", args=[self.feedback.pk])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        for _ in range(3):
+            response = self.client.get(reverse("feedback-list"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(
+            caches[THROTTLE_CACHE].get(f"throttle:list:user:{self.user.pk}")
+        )
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            override_settings(
+                CACHES={
+                    **settings.CACHES,
+                    THROTTLE_CACHE: {
+                        "BACKEND": "feedback_app.cache_backends.SampledCullFileBasedCache",
+                        "LOCATION": directory,
+                    },
+                }
+            ),
+        ):
+            # Buckets in the file cache are visible to every process
+            self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+            caches[THROTTLE_CACHE].close()
+            del caches[THROTTLE_CACHE]
+            response = self.client.post(url)
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class SlowLookupFileBasedCache(SampledCullFileBasedCache):
+    """File cache that answers key lookups late enough to interleave."""
+
+    def has_key(self, key, version=None):
+        found = super().has_key(key, version)
+        time.sleep(0.05)
+        return found
+
+
+class SlowCreateView(APIView):
+    """Idempotent view that counts its runs and takes a while."""
+
+    runs = []
+
+    @idempotent
+    def post(self, request):
+        self.runs.append(request.data)
+        time.sleep(0.2)
+        return Response({"created": True}, status=status.HTTP_201_CREATED)
+
+
+class IdempotencyTestCase(TestCase):
+    """Test cases for Idempotency-Key replays."""
+
+    def setUp(self):
+        """Set up a user and feedback to vote and comment on."""
+        caches[IDEMPOTENCY_CACHE].clear()
+        self.addCleanup(caches[IDEMPOTENCY_CACHE].clear)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.feedback = Feedback.objects.create(
+            title="Retry", content="Flaky network", board=self.board, author=self.user
+        )
+
+    def test_retried_vote_is_replayed(self):
+        """A retried toggle does not flip the vote back."""
+        url = reverse("feedback-vote", args=[self.feedback.pk])
+        first = self.client.post(url, HTTP_IDEMPOTENCY_KEY="vote-1")
+        self.assertEqual(first.data["action"], "added")
+        with self.assertNumQueries(0):
+            retry = self.client.post(url, HTTP_IDEMPOTENCY_KEY="vote-1")
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(self.feedback.upvotes.count(), 1)
+
+        # A new key is a new request
+        response = self.client.post(url, HTTP_IDEMPOTENCY_KEY="vote-2")
+        self.assertEqual(response.data["action"], "removed")
+
+    def test_retried_comment_creates_one_row(self):
+        """Retries replay the stored response; reused keys are rejected."""
+        url = reverse("comment-list")
+        data = {"content": "Same comment", "feedback": self.feedback.pk}
+        first = self.client.post(url, data, HTTP_IDEMPOTENCY_KEY="comment-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post(url, data, HTTP_IDEMPOTENCY_KEY="comment-1")
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(Comment.objects.filter(feedback=self.feedback).count(), 1)
+
+        response = self.client.post(
+            url,
+            {"content": "Other comment", "feedback": self.feedback.pk},
+            HTTP_IDEMPOTENCY_KEY="comment-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        # Rejected requests are not stored, so the key can be retried
+        invalid = {"feedback": self.feedback.pk}
+        response = self.client.post(url, invalid, HTTP_IDEMPOTENCY_KEY="comment-2")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, invalid, HTTP_IDEMPOTENCY_KEY="comment-2")
+        self.assertNotIn("Idempotent-Replayed", response)
+
+    def test_non_object_body(self):
+        """A JSON array body is rejected as invalid, with or without a key."""
+        url = reverse("feedback-list")
+        without_key = self.client.post(url, [1, 2], format="json")
+        with_key = self.client.post(
+            url, [1, 2], format="json", HTTP_IDEMPOTENCY_KEY="array-1"
+        )
+        self.assertEqual(without_key.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(with_key.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_retries_run_once(self):
+        """Of two concurrent requests with one key, only one runs the view."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        backend = f"{__name__}.{SlowLookupFileBasedCache.__name__}"
+        self.addCleanup(SlowCreateView.runs.clear)
+        factory = APIRequestFactory()
+        view = SlowCreateView.as_view()
+        barrier = threading.Barrier(2)
+        responses = []
+
+        def post():
+            request = factory.post(
+                "/slow/", {"title": "Once"}, format="json", HTTP_IDEMPOTENCY_KEY="k"
+            )
+            force_authenticate(request, user=self.user)
+            barrier.wait(5)
+            responses.append(view(request))
+
+        caches_setting = {
+            **settings.CACHES,
+            IDEMPOTENCY_CACHE: {"BACKEND": backend, "LOCATION": directory},
+        }
+        with self.settings(CACHES=caches_setting):
+            threads = [threading.Thread(target=post) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        print([(r.status_code, r.data) for r in responses])
+        self.assertEqual(len(SlowCreateView.runs), 1)
+        self.assertEqual(
+            sorted(response.status_code for response in responses),
+            [status.HTTP_201_CREATED, status.HTTP_409_CONFLICT],
+        )
+
+
+class DashboardTestCase(TestCase):
+    """Test cases for the combined dashboard action."""
+
+    def setUp(self):
+        """Set up voted feedback on a public and a private board."""
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        board = Board.objects.create(name="Public Board", is_public=True)
+        private_board = Board.objects.create(name="Private", is_public=False)
+        for title, feedback_board, item_status in [
+            ("Popular", board, FeedbackStatus.OPEN),
+            ("Done", board, FeedbackStatus.COMPLETED),
+            ("Hidden", private_board, FeedbackStatus.OPEN),
+        ]:
+            Feedback.objects.create(
+                title=title,
+                content="Widget",
+                board=feedback_board,
+                author=self.user,
+                status=item_status,
+            )
+        Feedback.objects.get(title="Popular").upvotes.add(self.user)
+
+    def test_dashboard_matches_the_widget_actions(self):
+        """All widgets come from one visibility scope and are cached together."""
+        url = reverse("feedback-dashboard")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["counts"],
+            self.client.get(reverse("feedback-counts")).data,
+        )
+        self.assertEqual(response.data["counts"]["total"], 2)
+        self.assertEqual(
+            [item["title"] for item in response.data["top_voted"]],
+            [
+                item["title"]
+                for item in self.client.get(reverse("feedback-top-voted")).data
+            ],
+        )
+        self.assertEqual(response.data["top_voted"][0]["title"], "Popular")
+        self.assertEqual(
+            response.data["trends"],
+            self.client.get(reverse("feedback-trends")).data,
+        )
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, response.data)
+
+    def test_dashboard_queryset_is_scoped(self):
+        """The dashboard action's queryset keeps the visibility filter."""
+        request = APIRequestFactory().get(reverse("feedback-dashboard"))
+        force_authenticate(request, user=self.user)
+        view = FeedbackViewSet(
+            action_map={"get": "dashboard"}, format_kwarg=None, kwargs={}
+        )
+        view.request = view.initialize_request(request)
+        titles = set(view.get_queryset().values_list("title", flat=True))
+        self.assertEqual(titles, {"Popular", "Done"})
+
+
+class BatchTestCase(TestCase):
+    """Test cases for the batch request endpoint."""
+
+    def setUp(self):
+        """Set up a signed-in user, a board and feedback."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.board = Board.objects.create(name="Public Board", is_public=True)
+        self.feedback = Feedback.objects.create(
+            title="Batched", content="Together", board=self.board, author=self.user
+        )
+        self.url = reverse("batch")
+
+    def test_screen_load_in_one_request(self):
+        """Sub-requests run as the batch's user, which is authenticated once."""
+        paths = ["/api/boards/", "/api/tags/", "/api/users/me/", "/api/feedback/"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url,
+                {
+                    "requests": [{"path": path} for path in paths],
+                    "parallel": True,
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        responses = response.data["responses"]
+        self.assertEqual([item["status"] for item in responses], [200] * 4)
+        self.assertEqual(responses[0]["body"][0]["name"], "Public Board")
+        self.assertEqual(responses[2]["body"]["username"], "contributor")
+        self.assertEqual(responses[3]["body"][0]["title"], "Batched")
+        user_lookups = [
+            query
+            for query in queries
+            if 'FROM "feedback_app_user" WHERE "feedback_app_user"."id"' in query["sql"]
+        ]
+        self.assertEqual(len(user_lookups), 1)
+
+    @throttle_rates(vote="2/hour")
+    def test_sub_request_headers_and_metrics(self):
+        """Sub-requests keep their headers and are recorded per view."""
+        caches[THROTTLE_CACHE].clear()
+        self.addCleanup(caches[THROTTLE_CACHE].clear)
+        caches[IDEMPOTENCY_CACHE].clear()
+        self.addCleanup(caches[IDEMPOTENCY_CACHE].clear)
+        metrics.reset()
+        vote = f"/api/feedback/{self.feedback.pk}/vote/"
+        response = self.client.post(
+            self.url,
+            {
+                "requests": [
+                    {
+                        "method": "POST",
+                        "path": vote,
+                        "headers": {"Idempotency-Key": "a"},
+                    },
+                    {
+                        "method": "POST",
+                        "path": vote,
+                        "headers": {"Idempotency-Key": "a"},
+                    },
+                    {
+                        "method": "POST",
+                        "path": vote,
+                        "headers": {"Idempotency-Key": "b"},
+                    },
+                ]
+            },
+            format="json",
+        )
+        replayed, throttled = response.data["responses"][1:]
+        self.assertEqual(replayed["headers"]["Idempotent-Replayed"], "true")
+        self.assertEqual(throttled["status"], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", throttled["headers"])
+        self.assertNotIn("Content-Type", throttled["headers"])
+
+        recorded = {
+            (entry["view"], entry["action"]): entry
+            for entry in metrics.request_histograms()
+        }
+        self.assertEqual(
+            recorded[("FeedbackViewSet", "vote")]["duration_ms"]["count"], 3
+        )
+        self.assertIn(("BatchView", "post"), recorded)
+
+    def test_writes_and_rejected_paths(self):
+        """Writes run in order; unknown paths fail only their own slot."""
+        vote = f"/api/feedback/{self.feedback.pk}/vote/"
+        response = self.client.post(
+            self.url,
+            {
+                "requests": [
+                    {"method": "POST", "path": vote},
+                    {"method": "POST", "path": vote},
+                    {"path": "/api/missing/"},
+                    {"path": "/admin/"},
+                    {"method": "POST", "path": "/api/batch/", "body": {}},
+                    {"path": "/api/feedback/?status=bogus"},
+                ],
+                "parallel": True,
+            },
+            format="json",
+        )
+        responses = response.data["responses"]
+        self.assertEqual(responses[0]["body"]["action"], "added")
+        self.assertEqual(responses[1]["body"]["action"], "removed")
+        self.assertEqual([item["status"] for item in responses[2:5]], [404] * 3)
+        self.assertEqual(responses[5]["status"], status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(BATCH={"MAX_REQUESTS": 1}):
+            response = self.client.post(
+                self.url,
+                {"requests": [{"path": "/api/tags/"}] * 2},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.credentials()
+        response = self.client.post(
+            self.url, {"requests": [{"path": "/api/tags/"}]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_parallel_batch_with_dashboard(self):
+        """The dashboard's queries run in turn on the batch's pool thread."""
+        response = self.client.post(
+            self.url,
+            {
+                "requests": [
+                    {"path": "/api/feedback/dashboard/"},
+                    {"path": "/api/tags/"},
+                ],
+                "parallel": True,
+            },
+            format="json",
+        )
+        responses = response.data["responses"]
+        self.assertEqual([item["status"] for item in responses], [200, 200])
+        self.assertEqual(responses[0]["body"]["counts"]["total"], 1)
+
+        # Nested the same way on a database served concurrently: the inner
+        # calls run on the outer call's pool thread, not on another one
+        pool = analytics._pool
+        analytics._pool = None
+
+        def restore_pool():
+            analytics._pool.shutdown()
+            analytics._pool = pool
+
+        self.addCleanup(restore_pool)
+
+        def dashboard():
+            outer = threading.current_thread().name
+            inner = analytics.gather(counts=lambda: threading.current_thread().name)
+            return outer, inner["counts"]
+
+        concurrent = SimpleNamespace(vendor="postgresql", in_atomic_block=False)
+        with mock.patch.object(analytics, "connection", concurrent):
+            with self.settings(
+                ANALYTICS={"CONCURRENT_QUERIES": 1, "SERVER_THREADS": 2}
+            ):
+                outer, inner = analytics.gather(dashboard=dashboard)["dashboard"]
+        self.assertTrue(outer.startswith("analytics"))
+        self.assertEqual(inner, outer)
+
+
+class WarmupTestCase(TestCase):
+    """Test cases for the worker warm-up."""
+
+    def setUp(self):
+        """Start from empty in-process indexes."""
+        for index in (tag_index, feedback_facts, tag_co_occurrence):
+            index.invalidate()
+            self.addCleanup(index.invalidate)
+        self.user = User.objects.create_user(
+            username="contributor", password="testpass123"
+        )
+        board = Board.objects.create(name="Public Board", is_public=True)
+        feedback = Feedback.objects.create(
+            title="Dark mode", content="Content", board=board, author=self.user
+        )
+        feedback.tags.add(Tag.objects.create(name="ui"))
+
+    def test_first_request_served_from_warm_indexes(self):
+        """After warm-up the first autocomplete request runs no query."""
+        timings = warm_up()
+        self.assertEqual(list(timings), list(settings.WARMUP["STEPS"]))
+        # Loading the indexes in every worker is opt-in
+        self.assertIsNone(tag_index._state)
+        warm_up(["caches"])
+
+        client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("tag-autocomplete"), {"q": "u"})
+        self.assertEqual(response.data[0]["usage_count"], 1)
+        self.assertEqual(len(queries), 0)
+
+    def test_startup_inside_event_loop(self):
+        """ASGI servers import the application in their loop; no step fails."""
+
+        async def start():
+            return warm_up_on_startup()
+
+        with self.settings(WARMUP={"ON_STARTUP": True, "STEPS": ("database",)}):
+            timings = asyncio.run(start())
+        self.assertEqual(list(timings), ["database"])
+
+    def test_command_reports_steps(self):
+        """``warm_up --steps`` runs only the named steps."""
+        out = StringIO()
+        call_command("warm_up", "--steps", "urls", "serializers", stdout=out)
+        self.assertIn("serializers", out.getvalue())
+        self.assertNotIn("caches", out.getvalue())
+        self.assertIsNone(tag_index._state)
@@ -0,0 +1,78 @@
+"""
+Feedback Management System Throttling
+
+This module contains the token bucket throttle applied to write actions such
+as ``vote``, ``register``, ``login`` and feedback and comment creation.
+
+Views name the throttled actions in ``throttle_scopes`` (action: scope; plain
+API views, which have no action, use the key None); the rate of each scope
+comes from ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]``.
+Requests are counted per user, or per client IP for anonymous requests. A
+bucket holds up to the scope's number of requests and refills continuously
+over its period, so bursts are allowed without a hard window reset.
+
+The whole bucket is one ``(tokens, updated)`` pair in the ``throttle`` cache,
+read and written once per throttled request; actions without a scope never
+touch it. The cache is file based by default (see ``cache_backends.py``), so
+every worker process on a host shares the same buckets without running
+another service. Two processes updating the same bucket at once may both be
+let through; the limits are approximate by at most the number of workers.
+"""
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .metrics import metrics
+
+THROTTLE_CACHE = "throttle"
+
+
+class ActionRateThrottle(SimpleRateThrottle):
+    """Token bucket per user or IP for the actions in ``view.throttle_scopes``."""
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # The scope depends on the view action; resolved in allow_request
+        self.tokens = 0.0
+
+    @property
+    def cache(self):
+        return caches[THROTTLE_CACHE]
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        scopes = getattr(view, "throttle_scopes", None)
+        self.scope = scopes and scopes.get(getattr(view, "action", None))
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        refill = (now - updated) * self.num_requests / self.duration
+        self.tokens = min(self.num_requests, tokens + refill)
+        if self.tokens < 1:
+            metrics.inc("throttled", scope=self.scope)
+            return False
+        # A full bucket is the same as no bucket; let the entry expire then
+        self.cache.set(self.key, (self.tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        """Seconds until the next token is available."""
+        return (1 - self.tokens) * self.duration / self.num_requests
@@ -6,9 +6,13 @@ from .views import (
     TagViewSet,
     FeedbackViewSet,
     CommentViewSet,
+    MetricsView,
+    RequestMetricsView,
+    AnalyticsQueryView,
+    BatchView,
+    TokenObtainView,
 )
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-
+from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet)
@@ -19,6 +23,10 @@ router.register(r"comments", CommentViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
-    path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("token/", TokenObtainView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("metrics/requests/", RequestMetricsView.as_view(), name="request_metrics"),
+    path("analytics/query/", AnalyticsQueryView.as_view(), name="analytics_query"),
+    path("batch/", BatchView.as_view(), name="batch"),
 ]
@@ -7,34 +7,102 @@ and business logic.
 """
 
 from django.contrib.auth import authenticate
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.renderers import BaseRenderer
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django_filters.rest_framework import DjangoFilterBackend
 
+from .analytics import (
+    cached_report,
+    cycle_times,
+    gather,
+    get_analytics_setting,
+    tag_distribution,
+    tag_names,
+    throughput,
+)
+from .authentication import MetricsTokenAuthentication
+from .batch import run_batch
+from .autocomplete import get_tag_autocomplete_setting, tag_index
+from .cooccurrence import get_tag_co_occurrence_setting, tag_co_occurrence
+from .facts import DIMENSIONS, TIME_BUCKETS, feedback_facts
+from .metrics import metrics, render_prometheus
+from .pagination import (
+    BoardMemberPagination,
+    CommentThreadPagination,
+    FeedbackCommentPagination,
+    UserDirectoryPagination,
+)
 from .models import User, Board, Tag, Feedback, Comment
+from .similarity import find_similar, get_duplicate_detection_setting
+from .history import bulk_change
+from .idempotency import idempotent
+from .signals import bulk_changed
 from .serializers import (
+    BatchSerializer,
     UserSerializer,
+    BoardMembersSerializer,
     BoardSerializer,
     TagSerializer,
+    UserListSerializer,
+    UserSummarySerializer,
     FeedbackSerializer,
+    FeedbackBulkUpdateSerializer,
     CommentSerializer,
 )
 from .permissions import (
     BoardPermission,
     FeedbackPermission,
     CommentPermission,
+    HasMetricsAccess,
     IsAdminOrModerator,
+    is_board_member,
 )
 
 
+def subquery_count(model, field):
+    """
+    Count ``model`` rows pointing at the outer row through ``field``.
+
+    Unlike ``Count`` this adds no join to the outer query, so it stays correct
+    next to other joins and ``distinct()``.
+    """
+    counts = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     Simple User ViewSet with authentication
@@ -43,6 +111,27 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = UserDirectoryPagination
+    filterset_fields = ["role", "is_active"]
+    # Prefix matches only; these are served by the case-insensitive
+    # pattern indexes added in migration 0009 on PostgreSQL.
+    search_fields = ["^username", "^email", "^first_name", "^last_name"]
+    throttle_scopes = {"register": "register", "login": "login"}
+    ordering_fields = ["username"]
+
+    def get_queryset(self):
+        """Load only the directory columns when listing"""
+        if self.action == "list":
+            fields = [
+                name for name in UserListSerializer.Meta.fields if name != "full_name"
+            ]
+            return User.objects.only(*fields)
+        return User.objects.all()
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return UserListSerializer
+        return UserSerializer
 
     def get_permissions(self):
         """Override permissions for specific actions."""
@@ -139,11 +228,31 @@ class BoardViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filter boards based on user permissions"""
         user = self.request.user
+        queryset = Board.objects.all()
+        if self.action in ["list", "retrieve"]:
+            queryset = queryset.select_related("stats").annotate(
+                num_members=subquery_count(Board.members.through, "board"),
+                num_feedback=subquery_count(Feedback, "board"),
+                is_member=Exists(
+                    Board.members.through.objects.filter(
+                        board=OuterRef("pk"), user=user
+                    )
+                ),
+            )
+
         if user.role in ["admin", "moderator"]:
-            return Board.objects.all()
+            return queryset
         else:
             # Contributors can only see public boards or boards they're members of
-            return Board.objects.filter(Q(is_public=True) | Q(members=user)).distinct()
+            return queryset.filter(Q(is_public=True) | Q(members=user)).distinct()
+
+    @action(detail=True, methods=["get"], pagination_class=BoardMemberPagination)
+    def members(self, request, pk=None):
+        """Get the members of a board"""
+        board = self.get_object()
+        page = self.paginate_queryset(board.members.all())
+        serializer = UserSummarySerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def join(self, request, pk=None):
@@ -155,7 +264,7 @@ class BoardViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if request.user in board.members.all():
+        if is_board_member(request.user, board):
             return Response({"message": "Already a member"}, status=status.HTTP_200_OK)
 
         board.members.add(request.user)
@@ -167,7 +276,7 @@ class BoardViewSet(viewsets.ModelViewSet):
     def leave(self, request, pk=None):
         """Leave a board"""
         board = self.get_object()
-        if request.user not in board.members.all():
+        if not is_board_member(request.user, board):
             return Response(
                 {"error": "Not a member of this board"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -205,6 +314,64 @@ class BoardViewSet(viewsets.ModelViewSet):
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
+    @action(detail=True, methods=["post"], permission_classes=[IsAdminOrModerator])
+    def add_members(self, request, pk=None):
+        """Add many users to a board by username, id or email"""
+        board = self.get_object()
+        serializer = BoardMembersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users, not_found = serializer.resolve()
+
+        through = Board.members.through
+        existing = set(
+            through.objects.filter(board=board, user_id__in=users).values_list(
+                "user_id", flat=True
+            )
+        )
+        # Rows added concurrently since the lookup above are skipped, not errors
+        through.objects.bulk_create(
+            [through(board=board, user_id=pk) for pk in users if pk not in existing],
+            ignore_conflicts=True,
+        )
+        return Response(
+            {
+                "added": [
+                    {"id": pk, "username": name}
+                    for pk, name in users.items()
+                    if pk not in existing
+                ],
+                "already_member": [
+                    {"id": pk, "username": users[pk]} for pk in existing
+                ],
+                "not_found": not_found,
+            }
+        )
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAdminOrModerator])
+    def remove_members(self, request, pk=None):
+        """Remove many users from a board by username, id or email"""
+        board = self.get_object()
+        serializer = BoardMembersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users, not_found = serializer.resolve()
+
+        memberships = Board.members.through.objects.filter(
+            board=board, user_id__in=users
+        )
+        removed = set(memberships.values_list("user_id", flat=True))
+        memberships.delete()
+        return Response(
+            {
+                "removed": [{"id": pk, "username": users[pk]} for pk in removed],
+                "not_member": [
+                    {"id": pk, "username": name}
+                    for pk, name in users.items()
+                    if pk not in removed
+                ],
+                "not_found": not_found,
+            }
+        )
+
 
 class TagViewSet(viewsets.ModelViewSet):
     """
@@ -215,6 +382,26 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticated]
 
+    @action(
+        detail=False,
+        methods=["get"],
+        # Trusts the token's claims instead of loading the user, so a
+        # keystroke costs no database query at all.
+        authentication_classes=[JWTStatelessUserAuthentication],
+    )
+    def autocomplete(self, request):
+        """Suggest tags starting with `q`, most used first"""
+        limit = request.query_params.get("limit")
+        try:
+            limit = int(limit) if limit else get_tag_autocomplete_setting("LIMIT")
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, get_tag_autocomplete_setting("MAX_LIMIT")))
+        return Response(tag_index.search(request.query_params.get("q", ""), limit))
+
 
 class FeedbackViewSet(viewsets.ModelViewSet):
     """
@@ -224,6 +411,7 @@ class FeedbackViewSet(viewsets.ModelViewSet):
     queryset = Feedback.objects.all()
     serializer_class = FeedbackSerializer
     permission_classes = [FeedbackPermission]
+    throttle_scopes = {"create": "feedback_create", "vote": "vote"}
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -237,23 +425,116 @@ class FeedbackViewSet(viewsets.ModelViewSet):
         "author__first_name",
         "author__last_name",
     ]
-    ordering_fields = ["created_at", "updated_at", "upvote_count", "title"]
+    ordering_fields = ["created_at", "updated_at", "upvote_count", "hot", "title"]
     ordering = ["-created_at"]
+    top_voted_windows = {"h": "hours", "d": "days", "w": "weeks"}
+    max_top_voted_window = timedelta(days=365)
+    expandable = ("comments", "tags", "board", "my_vote")
 
     def get_queryset(self):
         """Filter feedback based on board access"""
         user = self.request.user
+        # Public ordering names for the stored, indexed counters
+        queryset = Feedback.objects.alias(
+            upvote_count=F("vote_count"), hot=F("hot_score")
+        )
+        if self.action in ["list", "retrieve", "comments", "top_voted", "dashboard"]:
+            # The permission check and serializer read board; join it up front
+            queryset = queryset.select_related("board")
+        if self.action in ["list", "retrieve", "top_voted", "dashboard"]:
+            queryset = (
+                queryset.select_related("author")
+                .prefetch_related("tags")
+                .annotate(num_comments=subquery_count(Comment, "feedback"))
+            )
+            if self.include_upvotes():
+                queryset = queryset.prefetch_related(
+                    Prefetch("upvotes", queryset=User.objects.only("pk"))
+                )
+            if user.is_authenticated:
+                queryset = queryset.annotate(
+                    has_upvoted=Exists(
+                        Feedback.upvotes.through.objects.filter(
+                            feedback=OuterRef("pk"), user=user
+                        )
+                    )
+                )
+
         if user.is_anonymous:
             # Anonymous users can only see feedback from public boards
-            return Feedback.objects.filter(board__is_public=True)
+            return queryset.filter(board__is_public=True)
         elif user.role in ["admin", "moderator"]:
-            return Feedback.objects.all()
+            return queryset
         else:
             # Contributors can see feedback from public boards or boards they're members of
-            return Feedback.objects.filter(
+            return queryset.filter(
                 Q(board__is_public=True) | Q(board__members=user)
             ).distinct()
 
+    def get_expand(self):
+        """Parse the comma-separated ``expand`` parameter of a retrieve"""
+        value = self.request.query_params.get("expand")
+        if self.action != "retrieve" or not value:
+            return set()
+        expand = {part.strip() for part in value.split(",") if part.strip()}
+        unknown = expand.difference(self.expandable)
+        if unknown:
+            raise ValidationError(
+                {"expand": f"Unknown expansion: {', '.join(sorted(unknown))}"}
+            )
+        return expand
+
+    def include_upvotes(self):
+        """Whether to serialize the upvoter id list (``?include_upvotes=false``)"""
+        value = self.request.query_params.get("include_upvotes", "true")
+        return value.lower() not in ["false", "0", "no"]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["expand"] = self.get_expand()
+        context["include_upvotes"] = self.include_upvotes()
+        return context
+
+    def retrieve(self, request, *args, **kwargs):
+        """Get feedback, optionally with comments, tags, board and vote state"""
+        feedback = self.get_object()
+        data = self.get_serializer(feedback).data
+        if "comments" in self.get_expand():
+            # The first page of the discussion; `comments_next` continues it
+            # on the nested comments route.
+            paginator = FeedbackCommentPagination()
+            page = paginator.paginate_queryset(
+                Comment.objects.filter(feedback=feedback).select_related("author"),
+                request,
+                view=self,
+            )
+            paginator.base_url = request.build_absolute_uri(
+                reverse("feedback-comments", kwargs={"pk": feedback.pk})
+            )
+            data["comments"] = CommentSerializer(
+                page, many=True, context=self.get_serializer_context()
+            ).data
+            data["comments_next"] = paginator.get_next_link()
+        return Response(data)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Create feedback and report visible items it may duplicate"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        feedback = serializer.instance
+        data = serializer.data
+        data["possible_duplicates"] = find_similar(
+            self.get_queryset(), feedback.title, feedback.content, exclude=feedback.pk
+        )
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    # Writes are atomic so the webhook events recorded by the signal
+    # receivers commit or roll back together with the change itself.
+
+    @transaction.atomic
     def perform_create(self, serializer):
         """Validate board membership for private boards and set author"""
         board = serializer.validated_data.get("board")
@@ -263,25 +544,100 @@ class FeedbackViewSet(viewsets.ModelViewSet):
                     "You must be a member of this board to create feedback."
                 )
         serializer.save(author=self.request.user)
+        metrics.inc("feedback_created")
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Recorded on the status history by the post_save receiver
+        serializer.instance._changed_by = self.request.user
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @action(detail=False, methods=["post"])
+    @transaction.atomic
+    def bulk_update(self, request):
+        """Set the status and/or priority of many feedback items at once"""
+        serializer = FeedbackBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["ids"])
+        # Same rule as a single update: authors, admins and moderators
+        editable = self.get_queryset().filter(pk__in=ids)
+        if request.user.role not in [User.Role.ADMIN, User.Role.MODERATOR]:
+            editable = editable.filter(author=request.user)
+        editable_ids = set(editable.values_list("pk", flat=True))
+
+        changes = serializer.changes
+        changed = bulk_change(editable_ids, changes, request.user)
+        bulk_changed(changed, changes)
+        updated = {row["pk"] for row in changed}
+        return Response(
+            {
+                "updated": sorted(updated),
+                "unchanged": sorted(editable_ids - updated),
+                "not_permitted": sorted(ids - editable_ids),
+            }
+        )
+
+    @action(detail=True, methods=["get"], pagination_class=FeedbackCommentPagination)
+    def comments(self, request, pk=None):
+        """Get the comments on a feedback item, oldest first"""
+        # Visibility is checked once here; the comments need no further filtering
+        feedback = self.get_object()
+        queryset = Comment.objects.filter(feedback=feedback).select_related("author")
+        page = self.paginate_queryset(queryset)
+        serializer = CommentSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def similar(self, request):
+        """Find visible feedback resembling a draft `title` and `content`"""
+        title = request.query_params.get("title", "")
+        content = request.query_params.get("content", "")
+        if not (title.strip() or content.strip()):
+            return Response(
+                {"error": "title or content is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = request.query_params.get("limit")
+        try:
+            limit = int(limit) if limit else get_duplicate_detection_setting("LIMIT")
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, get_duplicate_detection_setting("MAX_LIMIT")))
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(find_similar(queryset, title, content, limit=limit))
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @idempotent
     def vote(self, request, pk=None):
         """Vote/unvote on feedback"""
         feedback = self.get_object()
         user = request.user
 
-        if user in feedback.upvotes.all():
-            feedback.upvotes.remove(user)
-            action_taken = "removed"
-        else:
-            feedback.upvotes.add(user)
-            action_taken = "added"
+        with transaction.atomic():
+            if feedback.upvotes.filter(pk=user.pk).exists():
+                feedback.upvotes.remove(user)
+                action_taken = "removed"
+            else:
+                feedback.upvotes.add(user)
+                action_taken = "added"
+        metrics.inc("votes", action=action_taken)
+        # Adjusted by the m2m_changed receivers
+        feedback.refresh_from_db(fields=["vote_count"])
 
         return Response(
             {
                 "success": True,
                 "action": action_taken,
-                "upvotes": feedback.upvotes.count(),
+                "upvotes": feedback.vote_count,
             }
         )
 
@@ -305,16 +661,212 @@ class FeedbackViewSet(viewsets.ModelViewSet):
             }
         )
 
+    def get_top_voted_window(self):
+        """Parse ``?window=`` such as ``24h``, ``7d`` or ``4w`` into a timedelta"""
+        value = self.request.query_params.get("window")
+        if not value:
+            return None
+        unit = self.top_voted_windows.get(value[-1:].lower())
+        try:
+            if unit is None or not value[:-1].isdigit():
+                raise ValueError
+            window = timedelta(**{unit: int(value[:-1])})
+        except (OverflowError, ValueError):
+            raise ValidationError(
+                {"window": "Use a number followed by h, d or w, e.g. 7d."}
+            )
+        if window > self.max_top_voted_window:
+            raise ValidationError({"window": "The window is at most 365 days."})
+        return window
+
     @action(detail=False, methods=["get"])
     def top_voted(self, request):
-        """Get top voted feedback"""
+        """Get top voted feedback, optionally created within `window`"""
         queryset = self.get_queryset()
-        top = queryset.annotate(num_upvotes=Count("upvotes")).order_by("-num_upvotes")[
-            :5
-        ]
+        window = self.get_top_voted_window()
+        if window is not None:
+            queryset = queryset.filter(created_at__gte=timezone.now() - window)
+        top = queryset.order_by("-vote_count", "-created_at")[:5]
         serializer = self.get_serializer(top, many=True)
         return Response(serializer.data)
 
+    def get_analytics_boards(self):
+        """
+        Parse ``?board=`` for the analytics actions.
+
+        Returns the visible board ids to cover (None for all) and a cache key
+        for that scope.
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            boards = Board.objects.filter(is_public=True)
+            scope = "public"
+        elif user.role in ["admin", "moderator"]:
+            boards = Board.objects.all()
+            scope = "all"
+        else:
+            boards = Board.objects.filter(Q(is_public=True) | Q(members=user))
+            scope = f"user:{user.pk}"
+
+        board = self.request.query_params.get("board")
+        if board:
+            if not board.isdigit() or not boards.filter(pk=board).exists():
+                raise ValidationError({"board": "Unknown board."})
+            return [int(board)], f"board:{board}"
+        if scope == "all":
+            return None, scope
+        return list(boards.values_list("pk", flat=True).distinct()), scope
+
+    def get_analytics_scope(self):
+        """
+        Parse ``?board=`` and ``?days=`` for the workflow analytics.
+
+        Returns the visible board ids to cover (None for all), a cache key
+        for that scope, and the number of days.
+        """
+        params = self.request.query_params
+        try:
+            days = int(params.get("days") or get_analytics_setting("DEFAULT_DAYS"))
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer."})
+        days = max(1, min(days, get_analytics_setting("MAX_DAYS")))
+        return *self.get_analytics_boards(), days
+
+    @action(detail=False, methods=["get"])
+    def cycle_times(self, request):
+        """Time to first response and time spent in each status, in hours"""
+        board_ids, scope, days = self.get_analytics_scope()
+        return Response(
+            cached_report(
+                "cycle_times", scope, days, lambda: cycle_times(board_ids, days)
+            )
+        )
+
+    @action(detail=False, methods=["get"])
+    def throughput(self, request):
+        """Feedback completed per week, overall, per board and per tag"""
+        board_ids, scope, days = self.get_analytics_scope()
+        return Response(
+            cached_report(
+                "throughput", scope, days, lambda: throughput(board_ids, days)
+            )
+        )
+
+    @action(detail=False, methods=["get"])
+    def tag_distribution(self, request):
+        """Feedback per tag, in total and per status"""
+        board_ids, scope = self.get_analytics_boards()
+        return Response(
+            cached_report(
+                "tag_distribution", scope, "all", lambda: tag_distribution(board_ids)
+            )
+        )
+
+    @action(detail=False, methods=["get"])
+    def tag_co_occurrence(self, request):
+        """Tags used most and the tag pairs most often found together"""
+        board_ids, _ = self.get_analytics_boards()
+        params = request.query_params
+        tag = params.get("tag")
+        limit = params.get("limit")
+        if tag and not tag.isdigit():
+            raise ValidationError({"tag": "Must be a tag id."})
+        try:
+            limit = int(limit) if limit else get_tag_co_occurrence_setting("LIMIT")
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        limit = max(1, min(limit, get_tag_co_occurrence_setting("MAX_LIMIT")))
+
+        tags, pairs = tag_co_occurrence.query(
+            board_ids, tag_id=int(tag) if tag else None, limit=limit
+        )
+        names = tag_names({tag_id for pair, _ in pairs for tag_id in pair})
+        return Response(
+            {
+                "pairs": [
+                    {
+                        "tags": [
+                            {
+                                "id": tag_id,
+                                "name": names.get(tag_id),
+                                "count": tags[tag_id],
+                            }
+                            for tag_id in pair
+                        ],
+                        "count": count,
+                    }
+                    for pair, count in pairs
+                ],
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def dashboard(self, request):
+        """Counts, top voted feedback and trends in one response"""
+        window = self.get_top_voted_window()
+
+        def compute():
+            board_ids, _ = self.get_analytics_boards()
+            visible = Feedback.objects.all()
+            if board_ids is not None:
+                visible = visible.filter(board_id__in=board_ids)
+
+            def counts():
+                return visible.aggregate(
+                    total=Count("pk"),
+                    **{
+                        name: Count("pk", filter=Q(status=value))
+                        for name, value in [
+                            ("active", Feedback.Status.OPEN),
+                            ("completed", Feedback.Status.COMPLETED),
+                            ("in_progress", Feedback.Status.IN_PROGRESS),
+                            ("under_review", Feedback.Status.UNDER_REVIEW),
+                        ]
+                    },
+                )
+
+            def top_voted():
+                top = self.get_queryset()
+                if board_ids is not None:
+                    top = top.filter(board_id__in=board_ids)
+                if window is not None:
+                    top = top.filter(created_at__gte=timezone.now() - window)
+                top = top.order_by("-vote_count", "-created_at")[:5]
+                return self.get_serializer(top, many=True).data
+
+            def trends():
+                since = timezone.now().date() - timedelta(days=30)
+                return list(
+                    visible.filter(created_at__date__gte=since)
+                    .annotate(day=TruncDate("created_at"))
+                    .values("day")
+                    .annotate(count=Count("id"))
+                    .order_by("day")
+                )
+
+            return gather(counts=counts, top_voted=top_voted, trends=trends)
+
+        # The user and parameters determine the visible boards, and top voted
+        # items carry the user's own vote state, so a hit needs no query
+        params = request.query_params
+        key = ":".join(
+            [
+                f"user:{request.user.pk}",
+                params.get("board", ""),
+                params.get("window", ""),
+                str(self.include_upvotes()),
+            ]
+        )
+        return Response(
+            cached_report(
+                "dashboard",
+                key,
+                30,
+                compute,
+                timeout=get_analytics_setting("DASHBOARD_CACHE_TTL"),
+            )
+        )
+
     @action(detail=False, methods=["get"])
     def trends(self, request):
         """Get feedback submission trends"""
@@ -342,19 +894,31 @@ class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [CommentPermission]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["feedback", "author", "parent"]
+    throttle_scopes = {"create": "comment_create"}
 
     def get_queryset(self):
         """Filter comments based on feedback access"""
         user = self.request.user
+        queryset = Comment.objects.select_related("author")
+        if self.action == "thread":
+            # The permission check reads feedback.board; join it up front
+            queryset = queryset.select_related("feedback__board")
+
         if user.is_anonymous:
-            return Comment.objects.filter(feedback__board__is_public=True)
+            return queryset.filter(feedback__board__is_public=True)
         elif user.role in ["admin", "moderator"]:
-            return Comment.objects.all()
+            return queryset
         else:
-            return Comment.objects.filter(
+            return queryset.filter(
                 Q(feedback__board__is_public=True) | Q(feedback__board__members=user)
             ).distinct()
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Validate board membership for commenting and set author"""
         feedback = serializer.validated_data.get("feedback")
@@ -362,3 +926,164 @@ class CommentViewSet(viewsets.ModelViewSet):
             if self.request.user not in feedback.board.members.all():
                 raise PermissionDenied("You must be a member of this board to comment.")
         serializer.save(author=self.request.user)
+        metrics.inc("comments_created")
+
+    @action(detail=True, methods=["get"], pagination_class=CommentThreadPagination)
+    def thread(self, request, pk=None):
+        """Get a comment and its replies in thread order, optionally depth-limited"""
+        comment = self.get_object()
+        max_depth = request.query_params.get("depth")
+        if max_depth is not None:
+            try:
+                max_depth = int(max_depth)
+            except ValueError:
+                return Response(
+                    {"error": "depth must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        queryset = comment.subtree(max_depth=max_depth).select_related("author")
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class TokenObtainView(TokenObtainPairView):
+    """Obtain a JWT pair; checks passwords, so it shares the login throttle"""
+
+    throttle_scopes = {None: "login"}
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Render pre-formatted Prometheus text exposition output."""
+
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors (401/403) arrive as dictionaries
+        return "\n".join(f"# {key}: {value}" for key, value in data.items()).encode()
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape endpoint
+    """
+
+    authentication_classes = [MetricsTokenAuthentication, JWTAuthentication]
+    permission_classes = [HasMetricsAccess]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        """Return request histograms and domain counters in text format"""
+        response = Response(render_prometheus(metrics.snapshot()))
+        response["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+        return response
+
+
+class RequestMetricsView(APIView):
+    """
+    Request histograms collected by QueryCountMiddleware
+    """
+
+    authentication_classes = [MetricsTokenAuthentication, JWTAuthentication]
+    permission_classes = [HasMetricsAccess]
+
+    def get(self, request):
+        """Return query count, DB time, render time and size histograms"""
+        return Response(metrics.request_histograms())
+
+
+class AnalyticsQueryView(APIView):
+    """
+    Filter and group-by queries over the in-memory feedback facts snapshot
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Count feedback and sum its votes.
+
+        ``?group_by=`` takes up to two of board, status, priority, tag, day,
+        week and month; ``?board=``, ``?status=``, ``?priority=`` and
+        ``?tag=`` take comma separated values; ``?start=`` and ``?end=``
+        bound the creation date.
+        """
+        params = request.query_params
+        group_by = [key for key in params.get("group_by", "").split(",") if key]
+        if len(group_by) > 2 or len(set(group_by)) < len(group_by):
+            raise ValidationError({"group_by": "Use at most two distinct keys."})
+        for key in group_by:
+            if key not in DIMENSIONS + TIME_BUCKETS:
+                raise ValidationError({"group_by": f"Unknown key {key!r}."})
+
+        filters = {}
+        for dimension in DIMENSIONS:
+            values = [value for value in params.get(dimension, "").split(",") if value]
+            if not values:
+                continue
+            if dimension in ("board", "tag"):
+                if not all(value.isdigit() for value in values):
+                    raise ValidationError({dimension: "Must be a list of ids."})
+                values = [int(value) for value in values]
+            filters[dimension] = values
+
+        bounds = {}
+        for name in ("start", "end"):
+            value = params.get(name)
+            if value:
+                try:
+                    bounds[name] = date.fromisoformat(value)
+                except ValueError:
+                    raise ValidationError({name: "Must be a date (YYYY-MM-DD)."})
+
+        user = request.user
+        boards = None
+        if user.role not in ["admin", "moderator"]:
+            boards = set(
+                Board.objects.filter(Q(is_public=True) | Q(members=user)).values_list(
+                    "pk", flat=True
+                )
+            )
+
+        try:
+            groups, totals, snapshot = feedback_facts.query(
+                filters, group_by, boards=boards, **bounds
+            )
+        except ValueError as exc:
+            raise ValidationError({"group_by": str(exc)})
+        return Response(
+            {
+                "rows": groups,
+                "total": totals,
+                "snapshot": {
+                    "rows": len(snapshot.ids),
+                    "built_at": datetime.fromtimestamp(
+                        snapshot.built_at, tz=timezone.get_current_timezone()
+                    ),
+                },
+            }
+        )
+
+
+class BatchView(APIView):
+    """
+    Several API calls in one request
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Run `requests` against the API and return their responses in order"""
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = run_batch(
+            request,
+            serializer.validated_data["requests"],
+            parallel=serializer.validated_data["parallel"],
+        )
+        return Response({"responses": responses})
@@ -0,0 +1,166 @@
+"""
+Feedback Management System Worker Warm-up
+
+A freshly started worker builds a lot lazily on its first requests: the URL
+resolver, the fields of every serializer, the filter sets of the viewsets,
+its database connection and the in-process indexes (tag autocomplete,
+feedback facts, tag co-occurrence). ``warm_up`` does that up front so the
+first requests a worker serves cost the same as the ones after them.
+
+Loading the indexes (the ``caches`` step) scans the feedback, tag and vote
+tables, once per worker process, so it is not in the default
+``WARMUP["STEPS"]``: add it where workers are few and the first requests
+matter more than the load a deploy puts on the database.
+
+``backend/wsgi.py`` and ``backend/asgi.py`` call it once the application is
+loaded when ``WARMUP["ON_STARTUP"]`` is set; ``manage.py warm_up`` runs it
+on its own and prints how long each step took, and ``manage.py
+benchmark_endpoints --cold-start`` measures what it saves.
+
+The database connection opened here is only kept for the first request when
+``CONN_MAX_AGE`` is above zero. It must not cross a fork: with a pre-forking
+server that loads the application in the parent (``gunicorn --preload``),
+call ``warm_up`` from the worker's post-fork hook instead. ASGI servers such
+as uvicorn import the application inside their event loop, where Django
+refuses database access; there the warm-up runs in a separate thread, whose
+connection cannot serve requests and is closed again.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest
+from django.urls import get_resolver, reverse
+from rest_framework import serializers as drf_serializers
+from rest_framework.request import Request
+
+logger = logging.getLogger("feedback_app.warmup")
+
+DEFAULT_WARMUP = {
+    "ON_STARTUP": False,
+    "STEPS": ("urls", "serializers", "filters", "database"),
+}
+
+
+def get_warmup_setting(name):
+    """Read a WARMUP option, falling back to the defaults."""
+    return getattr(settings, "WARMUP", {}).get(name, DEFAULT_WARMUP[name])
+
+
+def warm_urls():
+    """Populate the URL resolver and reverse every API list route."""
+    from .urls import router
+
+    get_resolver().url_patterns
+    reverse("api-root")
+    for _, _, basename in router.registry:
+        reverse(f"{basename}-list")
+
+
+def warm_serializers():
+    """Build the fields of every serializer in ``serializers.py``."""
+    from . import serializers
+
+    for value in vars(serializers).values():
+        if (
+            isinstance(value, type)
+            and issubclass(value, drf_serializers.BaseSerializer)
+            and value.__module__ == serializers.__name__
+        ):
+            value().fields
+
+
+def warm_filters():
+    """Build the filter sets and search and ordering terms of each viewset."""
+    from django.contrib.auth.models import AnonymousUser
+
+    from .urls import router
+
+    http_request = HttpRequest()
+    http_request.user = AnonymousUser()
+    request = Request(http_request)
+    for _, viewset, _ in router.registry:
+        view = viewset(action="list", request=request, format_kwarg=None, kwargs={})
+        queryset = viewset.queryset.all()
+        for backend in view.filter_backends:
+            # Builds the query without running it
+            backend().filter_queryset(request, queryset, view)
+
+
+def warm_database():
+    """Open the connection of every configured database."""
+    for connection in connections.all():
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+
+def warm_caches():
+    """Load the in-process indexes that would otherwise load on first use."""
+    from .autocomplete import tag_index
+    from .cooccurrence import tag_co_occurrence
+    from .facts import feedback_facts
+
+    tag_index.rebuild()
+    feedback_facts.rebuild()
+    tag_co_occurrence.rebuild()
+
+
+STEPS = {
+    "urls": warm_urls,
+    "serializers": warm_serializers,
+    "filters": warm_filters,
+    "database": warm_database,
+    "caches": warm_caches,
+}
+
+
+def warm_up(steps=None):
+    """
+    Run the warm-up ``steps`` (by default ``WARMUP["STEPS"]``) in order.
+
+    Returns the milliseconds each step took by name. A failing step is
+    logged and skipped: the worker still starts, it is only colder.
+    """
+    timings = {}
+    for name in steps or get_warmup_setting("STEPS"):
+        started = time.perf_counter()
+        try:
+            STEPS[name]()
+        except Exception:
+            logger.exception("Warm-up step %r failed", name)
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(
+        "Warmed up in %.1fms: %s",
+        sum(timings.values()),
+        ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items()),
+    )
+    return timings
+
+
+def warm_up_in_thread():
+    try:
+        return warm_up()
+    finally:
+        connections.close_all()
+
+
+def warm_up_on_startup():
+    """
+    Warm up the serving process if ``WARMUP["ON_STARTUP"]`` is set.
+
+    Returns the step timings, or None when disabled.
+    """
+    if not get_warmup_setting("ON_STARTUP"):
+        return None
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return warm_up()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(warm_up_in_thread).result()
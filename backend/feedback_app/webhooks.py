@@ -0,0 +1,296 @@
+"""
+Feedback Management System Webhooks
+
+This module pushes feedback events to internal tools. Writes only record
+them: ``record_event`` adds a ``WebhookEvent`` plus one ``WebhookDelivery``
+per subscribed endpoint to the outbox, inside the transaction of the change,
+and queues a ``deliver_webhooks`` job once that transaction commits, so
+rolled-back changes are never sent. The job always runs on a worker, even in
+eager mode; the worker POSTs each endpoint's due deliveries as one JSON batch
+over a kept-alive connection.
+
+Every request is signed: ``X-Webhook-Signature`` is ``sha256=`` followed by
+the hex HMAC-SHA256 of ``"<X-Webhook-Timestamp>.<body>"`` keyed with the
+endpoint's secret. A failed batch backs off the whole endpoint exponentially,
+so events stay in order and a down endpoint is not hammered; deliveries are
+marked failed after ``WEBHOOKS["MAX_ATTEMPTS"]`` attempts.
+
+Only one worker sends to an endpoint at a time. ``deliver_webhooks`` jobs run
+one at a time (they share a dedupe key, see ``jobs.py``), and where the
+database supports ``SKIP LOCKED`` each endpoint's row is locked while its
+deliveries are sent; an endpoint locked by another worker is skipped and
+retried after ``WEBHOOKS["BUSY_RETRY"]`` seconds.
+"""
+
+import hashlib
+import hmac
+import http.client
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .jobs import enqueue
+from .metrics import metrics
+from .models import WebhookDelivery, WebhookEndpoint, WebhookEvent
+
+DEFAULT_WEBHOOKS = {
+    "BATCH_SIZE": 100,
+    "MAX_BATCHES": 10,
+    "TIMEOUT": 5.0,
+    "MAX_ATTEMPTS": 8,
+    "BACKOFF_BASE": 10,
+    "BACKOFF_MAX": 6 * 3600,
+    "BUSY_RETRY": 5,
+}
+
+EVENT_TYPES = (
+    "feedback.created",
+    "feedback.updated",
+    "feedback.status_changed",
+    "feedback.deleted",
+    "feedback.voted",
+)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+
+
+def get_webhooks_setting(name):
+    """Read a WEBHOOKS option, falling back to the defaults."""
+    return getattr(settings, "WEBHOOKS", {}).get(name, DEFAULT_WEBHOOKS[name])
+
+
+def sign(secret, timestamp, body):
+    """Return the hex HMAC-SHA256 signature of a request body."""
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def record_event(event_type, payload):
+    """Add an event to the outbox for every endpoint subscribed to it."""
+    endpoints = [
+        endpoint
+        for endpoint in WebhookEndpoint.objects.filter(is_active=True)
+        if endpoint.wants(event_type)
+    ]
+    if not endpoints:
+        return None
+    event = WebhookEvent.objects.create(event_type=event_type, payload=payload)
+    WebhookDelivery.objects.bulk_create(
+        WebhookDelivery(endpoint=endpoint, event=event) for endpoint in endpoints
+    )
+    transaction.on_commit(
+        lambda: enqueue("deliver_webhooks", dedupe_key="deliver_webhooks")
+    )
+    return event
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections, one per host and thread.
+
+    A request on a reused connection that the server has meanwhile closed is
+    retried once on a fresh connection.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _connections(self):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        return connections
+
+    def post(self, url, body, headers, timeout):
+        """POST ``body`` and return the response status code."""
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        key = (parts.scheme, parts.netloc)
+        connections = self._connections()
+        for _ in range(2):
+            connection = connections.pop(key, None)
+            reused = connection is not None
+            if connection is None:
+                connection_class = (
+                    http.client.HTTPSConnection
+                    if parts.scheme == "https"
+                    else http.client.HTTPConnection
+                )
+                connection = connection_class(parts.netloc, timeout=timeout)
+            try:
+                connection.request("POST", path, body, headers)
+                response = connection.getresponse()
+                # The body must be drained before the connection can be reused
+                response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError):
+                connection.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                connections[key] = connection
+            return response.status
+
+    def close(self):
+        for connection in self._connections().values():
+            connection.close()
+        self._connections().clear()
+
+
+pool = ConnectionPool()
+
+
+def backoff(attempts):
+    """Seconds to wait after ``attempts`` failed attempts, with jitter."""
+    delay = min(
+        get_webhooks_setting("BACKOFF_BASE") * 2 ** (attempts - 1),
+        get_webhooks_setting("BACKOFF_MAX"),
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def deliver_batch(endpoint, now):
+    """
+    Send the endpoint's oldest due deliveries in one request.
+
+    Returns ``(sent, ok)``: the number of deliveries attempted and whether the
+    endpoint accepted them.
+    """
+    deliveries = list(
+        WebhookDelivery.objects.filter(
+            endpoint=endpoint,
+            status=WebhookDelivery.Status.PENDING,
+            next_attempt_at__lte=now,
+        )
+        .select_related("event")
+        .order_by("id")[: get_webhooks_setting("BATCH_SIZE")]
+    )
+    if not deliveries:
+        return 0, True
+
+    body = json.dumps(
+        {
+            "events": [
+                {
+                    "id": delivery.event_id,
+                    "type": delivery.event.event_type,
+                    "created_at": delivery.event.created_at,
+                    "data": delivery.event.payload,
+                }
+                for delivery in deliveries
+            ]
+        },
+        cls=DjangoJSONEncoder,
+    ).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "feedback-webhooks/1.0",
+        TIMESTAMP_HEADER: timestamp,
+        SIGNATURE_HEADER: f"sha256={sign(endpoint.secret, timestamp, body)}",
+    }
+    try:
+        status_code = pool.post(
+            endpoint.url, body, headers, get_webhooks_setting("TIMEOUT")
+        )
+        error = None if 200 <= status_code < 300 else f"HTTP {status_code}"
+    except (OSError, http.client.HTTPException) as exc:
+        error = f"{type(exc).__name__}: {exc}"
+
+    ids = [delivery.pk for delivery in deliveries]
+    if error is None:
+        WebhookDelivery.objects.filter(pk__in=ids).update(
+            status=WebhookDelivery.Status.DELIVERED,
+            attempts=F("attempts") + 1,
+            delivered_at=now,
+            last_error="",
+        )
+        metrics.inc("webhook_deliveries", len(ids), result="delivered")
+        return len(ids), True
+
+    max_attempts = get_webhooks_setting("MAX_ATTEMPTS")
+    exhausted = [d.pk for d in deliveries if d.attempts + 1 >= max_attempts]
+    WebhookDelivery.objects.filter(pk__in=ids).update(
+        attempts=F("attempts") + 1, last_error=error
+    )
+    WebhookDelivery.objects.filter(pk__in=exhausted).update(
+        status=WebhookDelivery.Status.FAILED
+    )
+    # Back off the whole endpoint so later events wait behind this batch
+    retry_at = now + timedelta(seconds=backoff(max(d.attempts for d in deliveries) + 1))
+    WebhookDelivery.objects.filter(
+        endpoint=endpoint,
+        status=WebhookDelivery.Status.PENDING,
+        next_attempt_at__lt=retry_at,
+    ).update(next_attempt_at=retry_at)
+    if exhausted:
+        metrics.inc("webhook_deliveries", len(exhausted), result="failed")
+    if len(ids) > len(exhausted):
+        metrics.inc("webhook_deliveries", len(ids) - len(exhausted), result="retried")
+    return len(ids), False
+
+
+def claim_endpoint(endpoint):
+    """
+    Lock the endpoint's row for the current transaction.
+
+    Returns False when another worker holds it. Without ``SKIP LOCKED``
+    (SQLite) the row is not locked; run a single worker there.
+    """
+    if not transaction.get_connection().features.has_select_for_update_skip_locked:
+        return True
+    return (
+        WebhookEndpoint.objects.filter(pk=endpoint.pk)
+        .select_for_update(skip_locked=True)
+        .values_list("pk", flat=True)
+        .first()
+        is not None
+    )
+
+
+def deliver_pending():
+    """
+    Deliver due events to every endpoint.
+
+    Returns when the next pending delivery is due, or None if none is left.
+    """
+    now = timezone.now()
+    endpoints = WebhookEndpoint.objects.filter(
+        is_active=True,
+        deliveries__status=WebhookDelivery.Status.PENDING,
+        deliveries__next_attempt_at__lte=now,
+    ).distinct()
+    batch_size = get_webhooks_setting("BATCH_SIZE")
+    busy = False
+    for endpoint in endpoints:
+        with transaction.atomic():
+            if not claim_endpoint(endpoint):
+                busy = True
+                continue
+            for _ in range(get_webhooks_setting("MAX_BATCHES")):
+                sent, ok = deliver_batch(endpoint, now)
+                if not ok or sent < batch_size:
+                    break
+    next_attempt = WebhookDelivery.objects.filter(
+        status=WebhookDelivery.Status.PENDING, endpoint__is_active=True
+    ).aggregate(next_attempt=Min("next_attempt_at"))["next_attempt"]
+    if busy:
+        # Come back once the other worker is likely done with its endpoint
+        retry_at = now + timedelta(seconds=get_webhooks_setting("BUSY_RETRY"))
+        next_attempt = max(next_attempt or retry_at, retry_at)
+    return next_attempt
@@ -62,8 +62,18 @@ export const authAPI = {
     return response.data
   },
 
-  getUsers: async () => {
-    const response = await api.get('/users/')
+  // Returns one page: { results, next, previous }. Pass `next` back as
+  // `cursorUrl` to load the following page with the same filters.
+  getUsers: async ({ search, role, isActive, cursorUrl } = {}) => {
+    if (cursorUrl) {
+      const response = await api.get(cursorUrl)
+      return response.data
+    }
+    const params = {}
+    if (search) params.search = search
+    if (role) params.role = role
+    if (isActive !== undefined) params.is_active = isActive
+    const response = await api.get('/users/', { params })
     return response.data
   }
 }
@@ -71,7 +81,8 @@ export const authAPI = {
 // Feedback operations with proper filtering and sorting
 export const getFeedbackList = async (filters = {}) => {
   try {
-    const params = {}
+    // List views only need the vote count and has_upvoted, not every upvoter id
+    const params = { include_upvotes: false }
     if (filters.status) params.status = filters.status
     if (filters.search) params.search = filters.search
     if (filters.ordering) params.ordering = filters.ordering
@@ -84,9 +95,11 @@ export const getFeedbackList = async (filters = {}) => {
   }
 }
 
-export const getFeedbackDetails = async (id) => {
+export const getFeedbackDetails = async (id, expand = [], extraParams = {}) => {
   try {
-    const response = await api.get(`feedback/${id}/`)
+    const params = { ...extraParams }
+    if (expand.length) params.expand = expand.join(',')
+    const response = await api.get(`feedback/${id}/`, { params })
     return response.data
   } catch (error) {
     // console.error('Failed to fetch feedback details:', error)
@@ -104,6 +117,17 @@ export const createFeedback = async (data) => {
   }
 }
 
+// Visible feedback that looks like a duplicate of a draft
+export const findSimilarFeedback = async (title, content) => {
+  try {
+    const response = await api.get('feedback/similar/', { params: { title, content } })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to check for similar feedback:', error)
+    return []
+  }
+}
+
 export const updateFeedback = async (id, data) => {
   try {
     const response = await api.patch(`feedback/${id}/`, data)
@@ -114,6 +138,16 @@ export const updateFeedback = async (id, data) => {
   }
 }
 
+export const bulkUpdateFeedback = async (ids, data) => {
+  try {
+    const response = await api.post('feedback/bulk_update/', { ids, ...data })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to bulk update feedback:', error)
+    throw error
+  }
+}
+
 export const voteFeedback = async (id) => {
   try {
     const response = await api.post(`feedback/${id}/vote/`)
@@ -127,8 +161,18 @@ export const voteFeedback = async (id) => {
 // Comments
 export const getComments = async (feedbackId = null) => {
   try {
-    const params = feedbackId ? { feedback: feedbackId } : {}
-    const response = await api.get('comments/', { params })
+    if (feedbackId) {
+      // Cursor-paginated; follow `next` until the whole discussion is loaded
+      const comments = []
+      let url = `feedback/${feedbackId}/comments/`
+      while (url) {
+        const response = await api.get(url)
+        comments.push(...response.data.results)
+        url = response.data.next
+      }
+      return comments
+    }
+    const response = await api.get('comments/')
     return Array.isArray(response.data) ? response.data : response.data.results || []
   } catch (error) {
     // console.error('Failed to fetch comments:', error)
@@ -136,6 +180,11 @@ export const getComments = async (feedbackId = null) => {
   }
 }
 
+export const getCommentPage = async (url) => {
+  const response = await api.get(url)
+  return response.data
+}
+
 export const addComment = async (feedbackId, content) => {
   try {
     const response = await api.post('comments/', { feedback: feedbackId, content })
@@ -248,7 +297,51 @@ export const addMemberToBoard = async (boardId, username) => {
   }
 }
 
+// `users` is { usernames: [], ids: [], emails: [] }; any key may be omitted
+export const addMembersToBoard = async (boardId, users) => {
+  try {
+    const response = await api.post(`boards/${boardId}/add_members/`, users)
+    return response.data
+  } catch (error) {
+    // console.error('Failed to add members to board:', error)
+    throw error
+  }
+}
+
+export const removeMembersFromBoard = async (boardId, users) => {
+  try {
+    const response = await api.post(`boards/${boardId}/remove_members/`, users)
+    return response.data
+  } catch (error) {
+    // console.error('Failed to remove members from board:', error)
+    throw error
+  }
+}
+
+// Several API calls in one round trip; resolves to one { status, body } per request
+export const batchRequests = async (requests, { parallel = true } = {}) => {
+  const response = await api.post('batch/', {
+    requests: requests.map((request) =>
+      typeof request === 'string' ? { path: `/api/${request}` } : request
+    ),
+    parallel,
+  })
+  return response.data.responses
+}
+
 // Dashboard analytics
+// Counts, top voted feedback and trends in one request
+export const getDashboard = async (window = null) => {
+  try {
+    const params = window ? { window } : {}
+    const response = await api.get('feedback/dashboard/', { params })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to fetch dashboard:', error)
+    return { counts: {}, top_voted: [], trends: [] }
+  }
+}
+
 export const getDashboardStats = async () => {
   try {
     const response = await api.get('feedback/counts/')
@@ -259,9 +352,11 @@ export const getDashboardStats = async () => {
   }
 }
 
-export const getTopVotedFeedback = async () => {
+// window limits results to recently created feedback, e.g. '7d' or '24h'
+export const getTopVotedFeedback = async (window = null) => {
   try {
-    const response = await api.get('feedback/top_voted/')
+    const params = window ? { window } : {}
+    const response = await api.get('feedback/top_voted/', { params })
     return response.data
   } catch (error) {
     // console.error('Failed to fetch top voted feedback:', error)
@@ -279,6 +374,68 @@ export const getFeedbackTrends = async () => {
   }
 }
 
+export const getCycleTimes = async ({ board = null, days = null } = {}) => {
+  try {
+    const params = {}
+    if (board) params.board = board
+    if (days) params.days = days
+    const response = await api.get('feedback/cycle_times/', { params })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to fetch cycle times:', error)
+    return null
+  }
+}
+
+export const getThroughput = async ({ board = null, days = null } = {}) => {
+  try {
+    const params = {}
+    if (board) params.board = board
+    if (days) params.days = days
+    const response = await api.get('feedback/throughput/', { params })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to fetch throughput:', error)
+    return null
+  }
+}
+
+export const getTagDistribution = async ({ board = null } = {}) => {
+  try {
+    const params = {}
+    if (board) params.board = board
+    const response = await api.get('feedback/tag_distribution/', { params })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to fetch tag distribution:', error)
+    return []
+  }
+}
+
+export const getTagCoOccurrence = async ({ board = null, tag = null, limit = null } = {}) => {
+  try {
+    const params = {}
+    if (board) params.board = board
+    if (tag) params.tag = tag
+    if (limit) params.limit = limit
+    const response = await api.get('feedback/tag_co_occurrence/', { params })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to fetch tag co-occurrence:', error)
+    return null
+  }
+}
+
+export const queryFeedbackFacts = async (params = {}) => {
+  try {
+    const response = await api.get('analytics/query/', { params })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to query feedback facts:', error)
+    return null
+  }
+}
+
 // Tags
 export const getTags = async () => {
   try {
@@ -290,6 +447,16 @@ export const getTags = async () => {
   }
 }
 
+export const autocompleteTags = async (prefix, limit = 8) => {
+  try {
+    const response = await api.get('tags/autocomplete/', { params: { q: prefix, limit } })
+    return response.data
+  } catch (error) {
+    // console.error('Failed to fetch tag suggestions:', error)
+    return []
+  }
+}
+
 export const createTag = async (name) => {
   try {
     const response = await api.post('tags/', { name })
@@ -38,7 +38,7 @@ export default function FeedbackDashboard() {
 
       // Top voted feedback
       const topVoted = feedback
-        .sort((a, b) => (b.upvotes || 0) - (a.upvotes || 0))
+        .sort((a, b) => (b.upvote_count || 0) - (a.upvote_count || 0))
         .slice(0, 5)
 
       // Status distribution
@@ -220,7 +220,7 @@ export default function FeedbackDashboard() {
                   <svg className="w-4 h-4 mr-1" fill="currentColor" viewBox="0 0 20 20">
                     <path d="M2 10.5a1.5 1.5 0 113 0v6a1.5 1.5 0 01-3 0v-6zM6 10.333v5.43a2 2 0 001.106 1.79l.05.025A4 4 0 008.943 18h5.416a2 2 0 001.962-1.608l1.2-6A2 2 0 0014.56 8H7.333a2 2 0 00-1.147.333L6 8.667z"/>
                   </svg>
-                  <span className="text-sm font-medium">{item.upvotes || 0}</span>
+                  <span className="text-sm font-medium">{item.upvote_count || 0}</span>
                 </div>
               </div>
             ))}
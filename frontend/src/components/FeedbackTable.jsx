@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import { updateFeedback } from '../api'
+import { bulkUpdateFeedback } from '../api'
 
 export default function FeedbackTable({ feedback = [], onUpdate }) {
   const [selectedItems, setSelectedItems] = useState([])
@@ -30,16 +30,13 @@ export default function FeedbackTable({ feedback = [], onUpdate }) {
   const handleBulkStatusUpdate = async (newStatus) => {
     setIsUpdating(true)
     try {
-      await Promise.all(
-        selectedItems.map(id => 
-          updateFeedback(id, { status: newStatus })
-        )
-      )
+      // One request; items the user may not edit are skipped by the server
+      const { updated } = await bulkUpdateFeedback(selectedItems, { status: newStatus })
       setSelectedItems([])
       // Refresh feedback list if onUpdate callback provided
       if (onUpdate) {
         const updatedFeedback = feedback.map(item => 
-          selectedItems.includes(item.id) 
+          updated.includes(item.id) 
             ? { ...item, status: newStatus }
             : item
         )
@@ -4,7 +4,7 @@ import { getBoards, deleteBoard, joinBoard, leaveBoard } from '../api'
 import { useAuth } from '../contexts/AuthContext'
 
 export default function BoardManagement() {
-  const { user, isAdmin, isModerator } = useAuth()
+  const { isAdmin, isModerator } = useAuth()
   const [boards, setBoards] = useState([])
   const [loading, setLoading] = useState(true)
   const [actionLoading, setActionLoading] = useState({})
@@ -39,7 +39,7 @@ export default function BoardManagement() {
   }
 
   const handleJoinLeave = async (board) => {
-    const isCurrentlyMember = board.members.includes(user.id)
+    const isCurrentlyMember = board.is_member
     const action = isCurrentlyMember ? 'leaving' : 'joining'
     
     setActionLoading(prev => ({ ...prev, [board.id]: action }))
@@ -55,9 +55,7 @@ export default function BoardManagement() {
         b.id === board.id 
           ? {
               ...b,
-              members: isCurrentlyMember 
-                ? b.members.filter(id => id !== user.id)
-                : [...b.members, user.id],
+              is_member: !isCurrentlyMember,
               member_count: isCurrentlyMember 
                 ? b.member_count - 1 
                 : b.member_count + 1
@@ -103,7 +101,7 @@ export default function BoardManagement() {
       {boards.length > 0 ? (
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
           {boards.map(board => {
-            const isMember = board.members.includes(user.id)
+            const isMember = board.is_member
             const currentAction = actionLoading[board.id]
             
             return (
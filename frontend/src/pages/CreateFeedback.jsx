@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
-import { createFeedback, getBoards } from '../api'
-import { useNavigate } from 'react-router-dom'
+import { createFeedback, getBoards, autocompleteTags, findSimilarFeedback } from '../api'
+import { Link, useNavigate } from 'react-router-dom'
 
 export default function CreateFeedback() {
   const [formData, setFormData] = useState({
@@ -13,6 +13,8 @@ export default function CreateFeedback() {
   const [boards, setBoards] = useState([])
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
+  const [tagSuggestions, setTagSuggestions] = useState([])
+  const [similarFeedback, setSimilarFeedback] = useState([])
   const navigate = useNavigate()
 
   useEffect(() => {
@@ -38,6 +40,26 @@ export default function CreateFeedback() {
       [e.target.name]: e.target.value
     })
   }
+
+  // Point out existing feedback the draft may duplicate, once a field is left
+  const checkForDuplicates = async () => {
+    if (!formData.title.trim() && !formData.content.trim()) return
+    setSimilarFeedback(await findSimilarFeedback(formData.title, formData.content))
+  }
+
+  // Suggest completions for the tag currently being typed (after the last comma)
+  const handleTagsChange = async (e) => {
+    handleChange(e)
+    const current = e.target.value.split(',').pop().trim()
+    setTagSuggestions(current ? await autocompleteTags(current) : [])
+  }
+
+  const applyTagSuggestion = (name) => {
+    const parts = formData.tags.split(',').map(t => t.trim())
+    parts[parts.length - 1] = name
+    setFormData({ ...formData, tags: parts.join(', ') + ', ' })
+    setTagSuggestions([])
+  }
   
   const handleSubmit = async e => {
     e.preventDefault()
@@ -122,6 +144,7 @@ export default function CreateFeedback() {
               type="text"
               value={formData.title} 
               onChange={handleChange} 
+              onBlur={checkForDuplicates}
               placeholder="Enter feedback title" 
               required 
               className="w-full p-3 border border-gray-300 dark:border-gray-600 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 dark:bg-gray-700 dark:text-white" 
@@ -138,6 +161,7 @@ export default function CreateFeedback() {
               name="content"
               value={formData.content} 
               onChange={handleChange} 
+              onBlur={checkForDuplicates}
               placeholder="Describe your feedback in detail" 
               required 
               rows={6}
@@ -145,6 +169,22 @@ export default function CreateFeedback() {
             />
           </div>
 
+          {similarFeedback.length > 0 && (
+            <div className="bg-yellow-50 border border-yellow-200 text-yellow-800 px-4 py-3 rounded-md text-sm">
+              <p className="font-medium mb-2">Similar feedback already exists. Consider upvoting it instead:</p>
+              <ul className="space-y-1">
+                {similarFeedback.map(item => (
+                  <li key={item.id}>
+                    <Link to={`/feedback/${item.id}`} className="underline">
+                      {item.title}
+                    </Link>{' '}
+                    <span className="text-yellow-600">({item.status.replace('_', ' ')})</span>
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+
           {/* Priority */}
           <div>
             <label htmlFor="priority" className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-2">
@@ -173,10 +213,25 @@ export default function CreateFeedback() {
               name="tags"
               type="text"
               value={formData.tags} 
-              onChange={handleChange} 
+              onChange={handleTagsChange} 
+              autoComplete="off"
               placeholder="feature, bug, improvement (comma separated)" 
               className="w-full p-3 border border-gray-300 dark:border-gray-600 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 dark:bg-gray-700 dark:text-white" 
             />
+            {tagSuggestions.length > 0 && (
+              <div className="flex flex-wrap gap-2 mt-2">
+                {tagSuggestions.map(tag => (
+                  <button
+                    key={tag.id}
+                    type="button"
+                    onClick={() => applyTagSuggestion(tag.name)}
+                    className="px-3 py-1 bg-gray-100 hover:bg-gray-200 dark:bg-gray-600 text-gray-700 dark:text-gray-300 rounded-full text-sm"
+                  >
+                    {tag.name} <span className="text-gray-400">({tag.usage_count})</span>
+                  </button>
+                ))}
+              </div>
+            )}
             <p className="text-sm text-gray-500 dark:text-gray-400 mt-1">
               Separate multiple tags with commas
             </p>
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext'
-import { getDashboardStats, getTopVotedFeedback } from '../api'
+import { getDashboard } from '../api'
 
 export default function Dashboard() {
   const { user, isAdmin, isModerator } = useAuth()
@@ -23,14 +23,11 @@ export default function Dashboard() {
     try {
       setLoading(true)
       
-      // Fetch dashboard stats
-      const statsData = await getDashboardStats()
-      setStats(statsData)
-      
-      // Fetch top voted feedback
-      const topVoted = await getTopVotedFeedback()
-      setTopFeedback(topVoted)
-      
+      // Stats and top voted feedback come from one request
+      const dashboard = await getDashboard()
+      setStats(dashboard.counts)
+      setTopFeedback(dashboard.top_voted)
+
     } catch (error) {
       // console.error('Error fetching dashboard data:', error)
     } finally {
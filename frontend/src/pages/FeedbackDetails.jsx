@@ -1,13 +1,12 @@
 import { useEffect, useState } from 'react'
 import { useParams, Link } from 'react-router-dom'
-import { getFeedbackDetails, addComment, voteFeedback, getComments } from '../api'
-import { useAuth } from '../contexts/AuthContext'
+import { getFeedbackDetails, addComment, voteFeedback, getCommentPage } from '../api'
 
 export default function FeedbackDetails() {
   const { id } = useParams()
-  const { user } = useAuth()
   const [feedback, setFeedback] = useState(null)
   const [comments, setComments] = useState([])
+  const [commentsNext, setCommentsNext] = useState(null)
   const [comment, setComment] = useState('')
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
@@ -20,12 +19,11 @@ export default function FeedbackDetails() {
   const fetchData = async () => {
     try {
       setLoading(true)
-      const [feedbackData, commentsData] = await Promise.all([
-        getFeedbackDetails(id),
-        getComments(id)
-      ])
+      // One round trip: the first page of comments, tags, board and vote state
+      const feedbackData = await getFeedbackDetails(id, ['comments', 'tags', 'board', 'my_vote'], { include_upvotes: false })
       setFeedback(feedbackData)
-      setComments(commentsData)
+      setComments(feedbackData.comments || [])
+      setCommentsNext(feedbackData.comments_next)
     } catch (err) {
       setError('Failed to load feedback details')
       // console.error('Error fetching feedback:', err)
@@ -43,9 +41,8 @@ export default function FeedbackDetails() {
       setFeedback(prev => ({
         ...prev,
         upvote_count: result.upvotes,
-        upvotes: result.action === 'added' 
-          ? [...(prev.upvotes || []), user.id]
-          : (prev.upvotes || []).filter(uid => uid !== user.id)
+        my_vote: result.action === 'added',
+        has_upvoted: result.action === 'added'
       }))
     } catch (err) {
       // console.error('Failed to vote:', err)
@@ -54,6 +51,16 @@ export default function FeedbackDetails() {
     }
   }
 
+  const loadMoreComments = async () => {
+    try {
+      const page = await getCommentPage(commentsNext)
+      setComments(prev => [...prev, ...page.results])
+      setCommentsNext(page.next)
+    } catch (err) {
+      // console.error('Failed to load comments:', err)
+    }
+  }
+
   const handleComment = async (e) => {
     e.preventDefault()
     if (!comment.trim()) return
@@ -157,8 +164,8 @@ export default function FeedbackDetails() {
             <h4 className="text-sm font-medium text-gray-700 dark:text-gray-300 mb-2">Tags:</h4>
             <div className="flex flex-wrap gap-2">
               {feedback.tags.map(tag => (
-                <span key={tag} className="px-3 py-1 bg-gray-100 dark:bg-gray-600 text-gray-700 dark:text-gray-300 rounded-full text-sm">
-                  {tag}
+                <span key={tag.id} className="px-3 py-1 bg-gray-100 dark:bg-gray-600 text-gray-700 dark:text-gray-300 rounded-full text-sm">
+                  {tag.name}
                 </span>
               ))}
             </div>
@@ -176,7 +183,7 @@ export default function FeedbackDetails() {
               onClick={handleVote}
               disabled={voting}
               className={`flex items-center gap-1 px-3 py-1 rounded-lg transition-colors ${
-                feedback.upvotes && feedback.upvotes.includes(user?.id)
+                feedback.my_vote
                   ? 'bg-blue-100 text-blue-700 hover:bg-blue-200'
                   : 'bg-gray-100 hover:bg-gray-200 text-gray-700'
               }`}
@@ -199,7 +206,7 @@ export default function FeedbackDetails() {
       {/* Comments Section */}
       <div className="bg-white dark:bg-gray-800 rounded-lg shadow p-6">
         <h3 className="text-xl font-bold text-gray-900 dark:text-white mb-4">
-          Comments ({comments.length})
+          Comments ({feedback.comment_count || 0})
         </h3>
         
         {comments.length > 0 ? (
@@ -217,6 +224,14 @@ export default function FeedbackDetails() {
                 <p className="text-gray-700 dark:text-gray-300">{c.content}</p>
               </div>
             ))}
+            {commentsNext && (
+              <button
+                onClick={loadMoreComments}
+                className="text-blue-600 hover:text-blue-800 text-sm font-medium"
+              >
+                Load more comments
+              </button>
+            )}
           </div>
         ) : (
           <p className="text-gray-500 dark:text-gray-400 mb-6">No comments yet. Be the first to comment!</p>
@@ -121,6 +121,7 @@ export default function FeedbackList() {
               onChange={(e) => handleFilterChange('ordering', e.target.value)}
               className="px-3 py-2 border border-gray-300 dark:border-gray-600 rounded-lg bg-white dark:bg-gray-700 text-gray-900 dark:text-white focus:outline-none focus:ring-2 focus:ring-blue-500"
             >
+              <option value="-hot">Hot</option>
               <option value="-created_at">Newest First</option>
               <option value="created_at">Oldest First</option>
               <option value="-upvote_count">Most Voted</option>